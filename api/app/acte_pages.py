@@ -0,0 +1,67 @@
+# app/acte_pages.py
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from .models import Acte, ActePage
+
+
+# ==================================================
+# Texte intégral des actes, page par page
+# ==================================================
+#
+# Le texte extrait (souvent des centaines de Ko d'OCR) n'est plus une
+# colonne de actes : une ligne par page dans acte_pages. Charger un acte
+# (listes, détail, mises à jour) ne lit donc jamais ce texte, et une
+# recherche sait sur quelle page le mot a été trouvé (search.py).
+# actes.search_vector reste le document de recherche de tout l'acte :
+# recalculé par trigger quand ses pages changent (main._ensure_search_vector),
+# une seule fois quand save_pages remplace toutes les pages d'un acte.
+
+# lignes par INSERT multi-lignes : le trigger "par instruction" recalcule le
+# document de l'acte une fois par INSERT (un executemany, une fois par page)
+INSERT_CHUNK = 1000
+
+
+def insert_pages(db: Session, rows: List[dict]):
+    """INSERT multi-lignes de pages {"acte_id", "page_no", "text"} (sans commit)."""
+    for i in range(0, len(rows), INSERT_CHUNK):
+        db.execute(insert(ActePage).values(rows[i:i + INSERT_CHUNK]))
+
+
+def save_pages(db: Session, acte_id: int, pages: Iterable[Tuple[int, str]]):
+    """
+    Remplace le texte de l'acte par pages = [(numéro de page, texte), ...]
+    (ExtractionResult.numbered_pages). Les pages vides ne sont pas gardées ;
+    pages vide : l'acte n'a plus de texte (extraction en attente).
+    """
+    rows = [
+        {"acte_id": acte_id, "page_no": page_no, "text": text}
+        for page_no, text in pages
+        if text and text.strip()
+    ]
+    # DELETE puis INSERT(s) déclencheraient chacun le recalcul du document
+    # de l'acte : triggers suspendus le temps du remplacement (réglage local
+    # à la transaction, annulé avec elle en cas d'erreur), un seul recalcul
+    db.execute(select(func.set_config("actes.defer_search_refresh", "on", True)))
+    db.execute(delete(ActePage).where(ActePage.acte_id == acte_id))
+    insert_pages(db, rows)
+    db.execute(select(func.set_config("actes.defer_search_refresh", "off", True)))
+    db.execute(
+        update(Acte)
+        .where(Acte.id == acte_id)
+        .values(search_vector=func.actes_search_document(
+            Acte.titre, Acte.resume, func.actes_pages_text(Acte.id)
+        ))
+    )
+
+
+def acte_text(db: Session, acte_id: int) -> str:
+    """Texte intégral de l'acte (pages dans l'ordre), "" si aucun."""
+    stmt = (
+        select(ActePage.text)
+        .where(ActePage.acte_id == acte_id)
+        .order_by(ActePage.page_no)
+    )
+    return "\n".join(db.execute(stmt).scalars()).strip()
@@ -0,0 +1,218 @@
+# app/backfill.py
+# Ré-extraction des actes dont le texte vient d'une ancienne version de
+# l'extraction (réglages OCR ou heuristiques de pdf_utils modifiés).
+#
+# Lancement :  python -m app.backfill [--metadata] [--max-pending N] [--once] [--dry-run]
+#
+# Les ré-extractions passent par la file ingest_jobs (kind "reextract",
+# file "bulk") : elles sont faites par les workers, en parallèle, jamais
+# par l'API, et cèdent le pas aux extractions interactives (lanes.py) et
+# aux nouveaux PDF de la file bulk (worker.claim_next_job).
+# - bridé : au plus BACKFILL_MAX_PENDING jobs de ré-extraction en cours ;
+#   la commande complète la file toutes les BACKFILL_POLL_SECONDS
+# - reprenable : l'état est en base (version de chaque acte, un job par
+#   acte et par version) ; relancer la commande, ou POST /admin/reextract,
+#   reprend où on s'était arrêté
+# - l'ancien texte reste en ligne (et cherchable) jusqu'au nouveau
+from typing import Optional
+import argparse
+import time
+
+from sqlalchemy import select, insert, exists, and_, or_
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from .config import settings
+from .database import Base, engine, SessionLocal
+from .models import Acte, IngestJob
+from .extraction_cache import extraction_version
+from .lanes import BULK
+
+REEXTRACT = "reextract"
+REEXTRACT_METADATA = "reextract_metadata"
+REEXTRACT_KINDS = (REEXTRACT, REEXTRACT_METADATA)
+
+ACTIVE_JOB_STATUSES = ("pending", "running", "cancel_requested")
+
+# verrou consultatif : deux compléments simultanés (commande + endpoint)
+# ne créent pas deux jobs pour le même acte
+_ENQUEUE_LOCK_ID = 0x62616B66
+
+
+def _targets():
+    """
+    (version courante, version d'un texte tronqué avec le budget courant),
+    voir extraction_cache.extraction_version. Un acte tronqué est à jour
+    tant que le budget ne change pas ; les jobs sont enregistrés avec la
+    seconde : un nouveau budget permet un nouveau job.
+    """
+    return extraction_version(), extraction_version(partial=True)
+
+
+def _up_to_date(version: str, partial_version: str):
+    return Acte.extraction_version.in_((version, partial_version))
+
+
+def _stale(version: str, partial_version: str):
+    """
+    Condition SQL d'un acte à ré-extraire : version différente, pas
+    d'extraction en attente, et pas encore de job pour cette version et
+    ce budget (un job échoué ou annulé n'est pas relancé automatiquement).
+    """
+    has_job = exists().where(
+        IngestJob.acte_id == Acte.id,
+        IngestJob.kind.in_(REEXTRACT_KINDS),
+        IngestJob.extraction_version == partial_version,
+    )
+    return and_(
+        Acte.extraction_version.is_distinct_from(version),
+        Acte.extraction_version.is_distinct_from(partial_version),
+        or_(Acte.extraction_status.is_(None), Acte.extraction_status != "pending"),
+        ~has_job,
+    )
+
+
+def backfill_status(db: Session) -> dict:
+    """Avancement de la ré-extraction vers la version courante."""
+    version, partial_version = _targets()
+    jobs = dict(
+        db.query(IngestJob.status, func.count(IngestJob.id))
+        .filter(
+            IngestJob.kind.in_(REEXTRACT_KINDS),
+            IngestJob.extraction_version == partial_version,
+        )
+        .group_by(IngestJob.status)
+        .all()
+    )
+    return {
+        "version": version,
+        "actes": db.query(func.count(Acte.id)).scalar() or 0,
+        "up_to_date": db.query(func.count(Acte.id))
+        .filter(_up_to_date(version, partial_version))
+        .scalar() or 0,
+        "stale": db.query(func.count(Acte.id))
+        .filter(_stale(version, partial_version))
+        .scalar() or 0,
+        "jobs_pending": jobs.get("pending", 0),
+        "jobs_running": jobs.get("running", 0) + jobs.get("cancel_requested", 0),
+        "jobs_done": jobs.get("done", 0),
+        "jobs_failed": jobs.get("failed", 0),
+        "jobs_cancelled": jobs.get("cancelled", 0),
+    }
+
+
+def _lock_enqueue(db: Session):
+    db.execute(select(func.pg_advisory_xact_lock(_ENQUEUE_LOCK_ID)))
+
+
+def enqueue_reextraction(
+    db: Session,
+    overwrite_metadata: bool = False,
+    max_pending: Optional[int] = None,
+    limit: Optional[int] = None,
+) -> int:
+    """
+    Complète la file des ré-extractions jusqu'à max_pending jobs en cours
+    (BACKFILL_MAX_PENDING par défaut), plus anciens actes d'abord, en un
+    seul INSERT multi-lignes. Renvoie le nombre de jobs créés.
+    overwrite_metadata : type / service détectés remplacent l'existant
+    (sinon ils ne complètent que les champs vides).
+    """
+    version, partial_version = _targets()
+    _lock_enqueue(db)
+
+    active = (
+        db.query(func.count(IngestJob.id))
+        .filter(
+            IngestJob.kind.in_(REEXTRACT_KINDS),
+            IngestJob.status.in_(ACTIVE_JOB_STATUSES),
+        )
+        .scalar() or 0
+    )
+    cap = settings.BACKFILL_MAX_PENDING if max_pending is None else max_pending
+    room = max(0, cap - active)
+    if limit is not None:
+        room = min(room, limit)
+    if room == 0:
+        db.commit()
+        return 0
+
+    rows = db.execute(
+        select(Acte.id, Acte.pdf_path)
+        .where(_stale(version, partial_version))
+        .order_by(Acte.id)
+        .limit(room)
+    ).all()
+    if rows:
+        kind = REEXTRACT_METADATA if overwrite_metadata else REEXTRACT
+        db.execute(
+            insert(IngestJob),
+            [
+                {
+                    "acte_id": acte_id,
+                    "pdf_path": pdf_path,
+                    "status": "pending",
+                    "lane": BULK,
+                    "kind": kind,
+                    "extraction_version": partial_version,
+                }
+                for acte_id, pdf_path in rows
+            ],
+        )
+    db.commit()
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Ré-extraction des actes d'une ancienne version de l'extraction"
+    )
+    parser.add_argument(
+        "--metadata",
+        action="store_true",
+        help="remplace aussi type / service par ceux détectés (sinon : champs vides seulement)",
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=settings.BACKFILL_MAX_PENDING,
+        help="jobs de ré-extraction en cours au plus",
+    )
+    parser.add_argument("--once", action="store_true", help="complète la file une fois puis s'arrête")
+    parser.add_argument("--dry-run", action="store_true", help="affiche l'état sans créer de job")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        status = backfill_status(db)
+    print(
+        f"[backfill] version {status['version']} : {status['stale']} actes à ré-extraire "
+        f"({status['up_to_date']}/{status['actes']} à jour)"
+    )
+    if args.dry_run:
+        return
+
+    t0 = time.monotonic()
+    done_at_start = status["jobs_done"]
+    while True:
+        with SessionLocal() as db:
+            created = enqueue_reextraction(
+                db, overwrite_metadata=args.metadata, max_pending=args.max_pending
+            )
+            status = backfill_status(db)
+
+        minutes = max(time.monotonic() - t0, 1e-6) / 60
+        in_flight = status["jobs_pending"] + status["jobs_running"]
+        print(
+            f"[backfill] +{created} jobs — {status['stale']} à faire, "
+            f"{status['jobs_pending']} en attente, {status['jobs_running']} en cours, "
+            f"{status['jobs_done']} faits, {status['jobs_failed']} en échec — "
+            f"{(status['jobs_done'] - done_at_start) / minutes:.1f} actes/min"
+        )
+        if args.once or (status["stale"] == 0 and in_flight == 0):
+            break
+        time.sleep(settings.BACKFILL_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
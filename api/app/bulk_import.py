@@ -0,0 +1,579 @@
+# app/bulk_import.py
+# Import hors ligne d'archives d'actes (scans papier : des dizaines de
+# milliers de PDF), sans passer par l'API HTTP.
+#
+# Lancement :
+#   python -m app.bulk_import /archives/2009-2023
+#   python -m app.bulk_import archives.zip --manifest actes.csv --workers 8
+#
+# - source : un dossier (parcouru récursivement) ou un fichier ZIP
+# - manifeste CSV facultatif (séparateur ; ou ,), une ligne par PDF :
+#     fichier;titre;type;service;date_signature;date_publication;statut;resume
+#   "fichier" = chemin relatif dans la source (ou simple nom de fichier).
+#   Les colonnes renseignées l'emportent sur la détection automatique.
+# - extraction (texte natif / OCR) + guess_metadata_from_text dans
+#   --workers threads (l'OCR des pages part dans le pool d'ocr_engine)
+# - actes et journal d'audit insérés par lots (--batch lignes par INSERT
+#   multi-lignes, un commit par lot)
+# - point de reprise (--checkpoint, JSON lines) : relancée après une
+#   interruption, la commande saute les fichiers déjà importés
+# - progression et débit (documents/s, pages/s, Mo/s) affichés à chaque lot
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Optional, List, Dict, Iterator, NamedTuple, Set, Tuple, IO
+import argparse
+import csv
+import hashlib
+import json
+import os
+import tempfile
+import time
+import zipfile
+
+from sqlalchemy import select, insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from .config import settings
+from .database import Base, engine, SessionLocal
+from .models import Acte, AuditLog
+from .acte_pages import insert_pages
+from .models_refs import load_known_refs
+from .pdf_utils import extract_document, guess_metadata_from_text
+from .extraction_cache import extraction_version
+from .ocr_engine import shutdown_ocr_pool
+from .utils import PDF_MAGIC, ensure_dir, remove_quietly, parse_date
+
+CHUNK_SIZE = 1024 * 1024
+
+# sous-dossier de UPLOAD_DIR recevant les PDF importés
+ARCHIVES_SUBDIR = "archives"
+
+# colonnes du manifeste reprises telles quelles sur l'acte (taille max)
+MANIFEST_TEXT_FIELDS = {"titre": 255, "type": 50, "service": 100, "statut": 50, "resume": None}
+MANIFEST_DATE_FIELDS = ("date_signature", "date_publication")
+
+# progression affichée à chaque lot, et au moins toutes les N secondes
+PROGRESS_EVERY_SECONDS = 30.0
+
+
+# ==================================================
+# 1. Source : dossier ou ZIP
+# ==================================================
+
+class _Source:
+    """Liste et lit les PDF d'un dossier ou d'une archive ZIP."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = Path(path).name
+        # ZipFile partagé entre les threads : les lectures sont sérialisées
+        # par zipfile, le temps passe de toute façon dans l'OCR
+        self._zip = zipfile.ZipFile(path) if zipfile.is_zipfile(path) else None
+        if self._zip is None and not os.path.isdir(path):
+            raise SystemExit(f"[import] source introuvable : {path}")
+
+    def entries(self) -> List[str]:
+        """Chemins relatifs (séparateur /) des PDF, dans un ordre stable."""
+        if self._zip is not None:
+            keys = [
+                info.filename for info in self._zip.infolist()
+                if not info.is_dir() and info.filename.lower().endswith(".pdf")
+            ]
+        else:
+            root = Path(self.path)
+            keys = [
+                p.relative_to(root).as_posix() for p in root.rglob("*")
+                if p.is_file() and p.suffix.lower() == ".pdf"
+            ]
+        return sorted(keys)
+
+    def open(self, key: str) -> IO[bytes]:
+        if self._zip is not None:
+            return self._zip.open(key)
+        return open(os.path.join(self.path, key), "rb")
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+
+
+def _safe_filename(key: str) -> str:
+    name = os.path.basename(key) or "document.pdf"
+    name = "".join(c if c.isalnum() or c in "-_. " else "_" for c in name).strip()
+    base, _ = os.path.splitext(name)
+    return f"{base or 'document'}.pdf"
+
+
+def _copy_into_uploads(source: _Source, key: str) -> Tuple[str, int, str]:
+    """
+    Copie le PDF `key` dans UPLOAD_DIR/archives/ en calculant son SHA-256
+    au passage. Le chemin final dépend du contenu
+    (archives/<sha[:2]>/<sha[:12]>_<nom>.pdf) : une reprise après
+    interruption réécrit le même fichier au lieu d'en créer un autre.
+    Renvoie (chemin, taille, sha256).
+    """
+    archives_dir = os.path.join(settings.UPLOAD_DIR, ARCHIVES_SUBDIR)
+    ensure_dir(archives_dir)
+    fd, tmp_path = tempfile.mkstemp(prefix="import_", suffix=".pdf", dir=archives_dir)
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with source.open(key) as src, os.fdopen(fd, "wb") as out:
+            head = True
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                if head:
+                    if not chunk.startswith(PDF_MAGIC):
+                        raise ValueError("Fichier non PDF (signature %PDF- absente)")
+                    head = False
+                h.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        if size == 0:
+            raise ValueError("Fichier vide")
+
+        sha256 = h.hexdigest()
+        dest_dir = os.path.join(archives_dir, sha256[:2])
+        ensure_dir(dest_dir)
+        dest = os.path.join(dest_dir, f"{sha256[:12]}_{_safe_filename(key)}")
+        os.replace(tmp_path, dest)
+        return dest, size, sha256
+    except BaseException:
+        remove_quietly(tmp_path)
+        raise
+
+
+# ==================================================
+# 2. Manifeste CSV
+# ==================================================
+
+def load_manifest(path: str) -> Dict[str, dict]:
+    """
+    {fichier: {colonne: valeur}} ; les dates sont converties (date) ou,
+    si invalides, remplacées par une erreur ("_error") : le fichier sera
+    compté en échec sans bloquer le reste de l'import.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=";,\t").delimiter
+        except csv.Error:
+            delimiter = ";"
+        reader = csv.DictReader(f, delimiter=delimiter)
+        fields = [c.strip().lower() for c in (reader.fieldnames or [])]
+        if "fichier" not in fields:
+            raise SystemExit(f"[import] manifeste {path} : colonne 'fichier' manquante")
+        reader.fieldnames = fields
+
+        manifest: Dict[str, dict] = {}
+        for row in reader:
+            key = (row.get("fichier") or "").strip().replace("\\", "/")
+            if not key:
+                continue
+            meta = {}
+            for field, max_len in MANIFEST_TEXT_FIELDS.items():
+                value = (row.get(field) or "").strip()
+                if value:
+                    meta[field] = value[:max_len] if max_len else value
+            for field in MANIFEST_DATE_FIELDS:
+                try:
+                    value = parse_date(row.get(field))
+                except ValueError as e:
+                    meta["_error"] = f"manifeste, {field} : {e}"
+                    continue
+                if value:
+                    meta[field] = value
+            manifest[key] = meta
+    return manifest
+
+
+def _manifest_row(manifest: Dict[str, dict], key: str) -> dict:
+    """Ligne du manifeste d'un fichier : chemin relatif, sinon nom seul."""
+    return manifest.get(key) or manifest.get(os.path.basename(key)) or {}
+
+
+# ==================================================
+# 3. Traitement d'un PDF (dans un thread)
+# ==================================================
+
+class _Imported(NamedTuple):
+    key: str
+    pdf_path: str
+    sha256: str
+    size: int
+    pages: int
+    row: dict     # colonnes de l'acte
+    texts: List[Tuple[int, str]]    # texte page par page (acte_pages)
+
+
+def _process(
+    source: _Source,
+    key: str,
+    meta: dict,
+    known_services: List[str],
+    known_types: List[str],
+) -> _Imported:
+    """Copie, extraction du texte, détection des métadonnées."""
+    if "_error" in meta:
+        raise ValueError(meta["_error"])
+
+    pdf_path, size, sha256 = _copy_into_uploads(source, key)
+    try:
+        result = extract_document(pdf_path)
+        text = result.text
+        date_auto, service_auto, type_auto = guess_metadata_from_text(
+            text, known_services=known_services, known_types=known_types
+        )
+        date_sig = meta.get("date_signature")
+        if date_sig is None and date_auto:
+            try:
+                date_sig = parse_date(date_auto)
+            except ValueError:
+                date_sig = None
+    except BaseException:
+        remove_quietly(pdf_path)
+        raise
+
+    row = {
+        "titre": meta.get("titre") or Path(key).stem[:255],
+        "type": meta.get("type") or type_auto,
+        "service": meta.get("service") or service_auto,
+        "date_signature": date_sig,
+        "date_publication": meta.get("date_publication"),
+        "statut": meta.get("statut"),
+        "resume": meta.get("resume"),
+        "pdf_path": pdf_path,
+        "extraction_status": "partial" if result.partial else "done",
+        "extraction_note": result.note,
+        "extraction_version": extraction_version(partial=result.partial),
+    }
+    return _Imported(
+        key, pdf_path, sha256, size, len(result.pages), row, result.numbered_pages()
+    )
+
+
+# ==================================================
+# 4. Point de reprise
+# ==================================================
+
+class _Checkpoint:
+    """
+    Journal JSON lines des fichiers traités :
+      {"key": ..., "status": "done" | "duplicate" | "failed", ...}
+    Une ligne "done" n'est écrite qu'après le commit de son lot.
+    À la reprise, les fichiers "done" / "duplicate" sont sautés, les
+    "failed" sont retentés.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[str] = set()
+        self.shas: Dict[str, str] = {}    # sha256 -> PDF déjà importé (pdf_path)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue   # dernière ligne tronquée par l'interruption
+                    if entry.get("status") in ("done", "duplicate"):
+                        self.done.add(entry["key"])
+                    elif entry.get("status") == "failed":
+                        self.done.discard(entry["key"])
+                    if entry.get("status") == "done" and entry.get("sha256"):
+                        self.shas[entry["sha256"]] = entry.get("pdf_path")
+        self._f = open(path, "a", encoding="utf-8")
+
+    def write(self, entries: List[dict]):
+        for entry in entries:
+            self._f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def close(self):
+        self._f.close()
+
+
+# ==================================================
+# 5. Écriture en base par lots
+# ==================================================
+
+def _already_in_db(db, paths: List[str]) -> Set[str]:
+    """
+    PDF déjà présents en base (même contenu, même nom) : lot commité juste
+    avant une interruption mais pas encore noté dans le point de reprise,
+    ou archive déjà importée avec un autre point de reprise.
+    """
+    return set(db.execute(select(Acte.pdf_path).where(Acte.pdf_path.in_(paths))).scalars())
+
+
+def _insert_rows(db, items: List[_Imported], detail: str) -> List[int]:
+    """INSERT multi-lignes des actes, de leurs pages puis des entrées d'audit (sans commit)."""
+    ids = db.execute(
+        insert(Acte).returning(Acte.id, sort_by_parameter_order=True),
+        [item.row for item in items],
+    ).scalars().all()
+    pages = [
+        {"acte_id": acte_id, "page_no": page_no, "text": text}
+        for item, acte_id in zip(items, ids)
+        for page_no, text in item.texts
+        if text.strip()
+    ]
+    insert_pages(db, pages)
+    db.execute(
+        insert(AuditLog),
+        [{"acte_id": acte_id, "user_id": None, "action": "create", "detail": detail}
+         for acte_id in ids],
+    )
+    return ids
+
+
+def _flush_batch(items: List[_Imported], detail: str) -> List[dict]:
+    """
+    Enregistre un lot : un seul commit si tout passe ; sinon le lot est
+    rejoué ligne par ligne pour isoler les actes en erreur.
+    Renvoie les entrées du point de reprise (done / duplicate / failed).
+    """
+    if not items:
+        return []
+    entries: List[dict] = []
+    failed: List[dict] = []
+
+    with SessionLocal() as db:
+        present = _already_in_db(db, [item.pdf_path for item in items])
+        if present:
+            entries += [
+                {"key": i.key, "status": "duplicate", "sha256": i.sha256}
+                for i in items if i.pdf_path in present
+            ]
+            items = [i for i in items if i.pdf_path not in present]
+
+        try:
+            ids = _insert_rows(db, items, detail)
+            db.commit()
+            pairs = list(zip(items, ids))
+        except SQLAlchemyError:
+            db.rollback()
+            pairs = []
+            for item in items:
+                try:
+                    (acte_id,) = _insert_rows(db, [item], detail)
+                    db.commit()
+                    pairs.append((item, acte_id))
+                except SQLAlchemyError as e:
+                    db.rollback()
+                    remove_quietly(item.pdf_path)
+                    failed.append({
+                        "key": item.key,
+                        "status": "failed",
+                        "error": f"{type(e).__name__}: {str(e).splitlines()[0]}",
+                    })
+
+    entries += [
+        {
+            "key": item.key,
+            "status": "done",
+            "sha256": item.sha256,
+            "pdf_path": item.pdf_path,
+            "acte_id": acte_id,
+        }
+        for item, acte_id in pairs
+    ]
+    return entries + failed
+
+
+# ==================================================
+# 6. Boucle principale
+# ==================================================
+
+class _Progress:
+    def __init__(self, total: int):
+        self.total = total
+        self.t0 = time.monotonic()
+        self.docs = 0          # documents traités (importés, doublons, échecs)
+        self.imported = 0
+        self.duplicates = 0
+        self.failed = 0
+        self.pages = 0
+        self.bytes = 0
+        self._last_print = self.t0
+
+    def due(self) -> bool:
+        """True toutes les PROGRESS_EVERY_SECONDS (progression entre deux lots)."""
+        now = time.monotonic()
+        if now - self._last_print < PROGRESS_EVERY_SECONDS:
+            return False
+        self._last_print = now
+        return True
+
+    def line(self) -> str:
+        elapsed = max(time.monotonic() - self.t0, 1e-6)
+        docs_s = self.docs / elapsed
+        left = self.total - self.docs
+        eta = f"{left / docs_s / 60:.0f} min" if docs_s > 0 else "?"
+        pct = 100.0 * self.docs / self.total if self.total else 100.0
+        return (
+            f"{self.docs}/{self.total} ({pct:.1f} %) — "
+            f"{self.imported} importés, {self.duplicates} doublons, {self.failed} échecs — "
+            f"{docs_s:.2f} docs/s, {self.pages / elapsed:.1f} pages/s, "
+            f"{self.bytes / elapsed / 1e6:.1f} Mo/s — reste ~{eta}"
+        )
+
+
+def run_import(
+    source_path: str,
+    manifest_path: Optional[str],
+    checkpoint_path: str,
+    workers: int,
+    batch_size: int,
+    limit: Optional[int] = None,
+) -> _Progress:
+    source = _Source(source_path)
+    manifest = load_manifest(manifest_path) if manifest_path else {}
+    checkpoint = _Checkpoint(checkpoint_path)
+    with SessionLocal() as db:
+        known_types, known_services = load_known_refs(db)
+    detail = f"Import d'archives ({source.name})"
+
+    keys = source.entries()
+    todo = [k for k in keys if k not in checkpoint.done]
+    skipped = len(keys) - len(todo)
+    if limit:
+        todo = todo[:limit]
+    print(
+        f"[import] {source.path} : {len(keys)} PDF, {skipped} déjà "
+        f"importés (point de reprise {checkpoint.path}), {len(todo)} à traiter"
+    )
+
+    progress = _Progress(len(todo))
+    seen_shas = dict(checkpoint.shas)
+    batch: List[_Imported] = []
+    pending: Dict[Future, str] = {}
+    todo_iter: Iterator[str] = iter(todo)
+
+    def flush():
+        entries = _flush_batch(batch, detail)
+        checkpoint.write(entries)
+        for entry in entries:
+            if entry["status"] == "done":
+                progress.imported += 1
+            elif entry["status"] == "duplicate":
+                progress.duplicates += 1
+            else:
+                progress.failed += 1
+                print(f"[import][WARN] {entry['key']} : {entry['error']}")
+        batch.clear()
+        progress.due()
+        print(f"[import] {progress.line()}")
+
+    def on_result(fut: Future, key: str):
+        progress.docs += 1
+        if progress.due():
+            print(f"[import] {progress.line()}")
+        try:
+            item: _Imported = fut.result()
+        except Exception as e:
+            progress.failed += 1
+            checkpoint.write([{"key": key, "status": "failed", "error": f"{type(e).__name__}: {e}"}])
+            print(f"[import][WARN] {key} : {type(e).__name__}: {e}")
+            return
+        progress.pages += item.pages
+        progress.bytes += item.size
+
+        if item.sha256 in seen_shas:
+            # même contenu déjà importé (sous un autre nom) : on garde le premier
+            first_path = seen_shas[item.sha256]
+            if item.pdf_path != first_path:
+                remove_quietly(item.pdf_path)
+            progress.duplicates += 1
+            checkpoint.write([{"key": key, "status": "duplicate", "sha256": item.sha256}])
+            return
+        seen_shas[item.sha256] = item.pdf_path
+        batch.append(item)
+        if len(batch) >= batch_size:
+            flush()
+
+    # au plus 2 documents en attente par thread : la mémoire reste
+    # bornée quelle que soit la taille de l'archive
+    max_inflight = workers * 2
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="import") as pool:
+            try:
+                while True:
+                    while len(pending) < max_inflight:
+                        key = next(todo_iter, None)
+                        if key is None:
+                            break
+                        meta = _manifest_row(manifest, key)
+                        fut = pool.submit(_process, source, key, meta, known_services, known_types)
+                        pending[fut] = key
+                    if not pending:
+                        break
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        on_result(fut, pending.pop(fut))
+                flush()
+            except KeyboardInterrupt:
+                # Ctrl+C : les documents déjà extraits sont enregistrés, le
+                # reste sera repris au prochain lancement
+                print("[import] interruption : enregistrement du lot en cours…")
+                for fut in pending:
+                    fut.cancel()
+                flush()
+                print("[import] attente des extractions commencées (Ctrl+C pour quitter tout de suite)")
+                raise
+    finally:
+        checkpoint.close()
+        source.close()
+    return progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import hors ligne d'archives d'actes (PDF)")
+    parser.add_argument("source", help="dossier ou fichier ZIP contenant les PDF")
+    parser.add_argument("--manifest", help="CSV des métadonnées (colonne 'fichier' obligatoire)")
+    parser.add_argument(
+        "--checkpoint",
+        help="fichier de reprise (défaut : <source>.import.jsonl)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.EXTRACTION_THREADS,
+        help="documents extraits en parallèle",
+    )
+    parser.add_argument(
+        "--batch",
+        type=int,
+        default=200,
+        help="actes insérés par commit",
+    )
+    parser.add_argument("--limit", type=int, help="ne traite que les N premiers fichiers restants")
+    args = parser.parse_args()
+
+    checkpoint = args.checkpoint or f"{args.source.rstrip('/')}.import.jsonl"
+
+    Base.metadata.create_all(bind=engine)
+    try:
+        progress = run_import(
+            args.source,
+            args.manifest,
+            checkpoint,
+            workers=max(1, args.workers),
+            batch_size=max(1, args.batch),
+            limit=args.limit,
+        )
+    finally:
+        shutdown_ocr_pool()
+
+    elapsed = time.monotonic() - progress.t0
+    print(
+        f"[import] terminé en {elapsed:.0f}s : {progress.imported} actes importés, "
+        f"{progress.duplicates} doublons, {progress.failed} échecs — "
+        f"{progress.docs / max(elapsed, 1e-6):.2f} docs/s, "
+        f"{progress.pages / max(elapsed, 1e-6):.1f} pages/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
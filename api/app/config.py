@@ -14,6 +14,62 @@ class Settings(BaseSettings):
     CORS_ORIGINS: str = "http://localhost:3000"
     MAX_UPLOAD_MB: int = 20
 
+    # --- OCR (pool de processus, voir ocr_engine.py) ---
+    OCR_WORKERS: int = 0                     # 0 = un processus par cœur
+    OCR_MAX_INFLIGHT_PAGES: int = 8          # pages soumises au pool en même temps
+    OCR_DPI: int = 300
+    OCR_BACKEND: str = "tesserocr"           # ou "pytesseract" (un process tesseract par page)
+    OCR_LANG: str = "fra"
+    OCR_PSM: int = 6                         # 6 = lecture en bloc
+    OCR_BLANK_INK_RATIO: float = 0.0002      # moins de 0,02 % de pixels sombres = page blanche (une ligne ~0,05 %)
+    OCR_MAX_SIDE_PX: int = 0                 # réduction des pages avant OCR (0 = non)
+    OCR_DESKEW: bool = False                 # redressement des scans penchés
+    OCR_DESKEW_MAX_ANGLE: float = 5.0
+    OCR_MIN_PAGE_CHARS: int = 50             # page avec moins de texte natif -> OCR
+    OCR_IMAGE_COVERAGE: float = 0.5          # page couverte d'images à 50 % -> OCR si peu de texte
+
+    # --- Budget par document (au-delà : texte partiel, noté sur l'acte) ---
+    EXTRACTION_MAX_PAGES: int = 300          # 0 = pas de limite
+    EXTRACTION_MAX_SECONDS: int = 900        # temps max d'OCR d'un document (0 = pas de limite)
+    OCR_MAX_PIXELS_PER_PAGE: int = 40_000_000  # au-delà, la page est rendue à un DPI plus bas
+
+    # --- Mode "métadonnées" de /admin/analyse-pdf (pages lues) ---
+    METADATA_HEAD_PAGES: int = 2
+    METADATA_TAIL_PAGES: int = 1
+    METADATA_WIDEN_PAGES: int = 2            # élargissement si un champ manque
+    METADATA_MAX_PAGES: int = 10
+    REFS_CACHE_SECONDS: int = 60             # listes services / types relues au plus toutes les N s
+    SEARCH_FUZZY_THRESHOLD: float = 0.5      # recherche approchée : similarité mini (0..1, pg_trgm)
+    ANALYSE_BATCH_MAX_FILES: int = 50        # /admin/analyse-pdf/batch
+    BULK_INGEST_CONCURRENCY: int = 4         # /admin/actes/bulk : PDF écrits en parallèle
+    BULK_COMMIT_BATCH: int = 50              # actes enregistrés par commit
+    STAGING_TTL_SECONDS: int = 3600          # PDF analysé gardé N s en attente de la création de l'acte
+
+    # --- Envoi reprenable par morceaux (/admin/uploads) ---
+    UPLOAD_CHUNK_MAX_MB: int = 8             # taille max d'un morceau
+    UPLOAD_SESSION_TTL_SECONDS: int = 86400  # session sans nouveau morceau -> supprimée
+
+    # --- Exécuteur des analyses lancées par l'API (hors boucle asyncio) ---
+    EXTRACTION_THREADS: int = 4              # analyses de PDF en même temps
+    EXTRACTION_QUEUE_MAX: int = 100          # par file ; au-delà : 503 + Retry-After
+
+    # --- Files de priorité (interactive / bulk), voir app/lanes.py ---
+    LANE_INTERACTIVE_WEIGHT: int = 4         # part des choix quand les 2 files attendent
+    LANE_BULK_WEIGHT: int = 1
+    LANE_STARVATION_SECONDS: float = 30.0    # une tâche plus vieille passe devant
+
+    # --- Cache des extractions (clé = SHA-256 du PDF + réglages OCR) ---
+    EXTRACTION_CACHE_MAX_MB: int = 512       # au-delà : éviction LRU
+
+    # --- Workers d'extraction (file ingest_jobs, voir worker.py) ---
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_STALE_SECONDS: int = 600             # job "running" sans heartbeat -> repris
+    WORKER_POLL_SECONDS: float = 2.0
+
+    # --- Ré-extraction des actes d'une ancienne version (voir backfill.py) ---
+    BACKFILL_MAX_PENDING: int = 200          # jobs de ré-extraction en cours au plus
+    BACKFILL_POLL_SECONDS: float = 10.0      # python -m app.backfill : complément de la file
+
     # --- SMTP / Envoi d'e-mails ---
     SMTP_HOST: Optional[str] = None          # ex: smtp.gmail.com
     SMTP_PORT: int = 587
@@ -0,0 +1,256 @@
+# app/extraction_cache.py
+from typing import Optional, List, Dict
+import hashlib
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import ExtractionCache
+from .pdf_utils import (
+    PdfSource,
+    ExtractionResult,
+    EXTRACTION_VERSION,
+    extract_document,
+    pack_pages,
+    unpack_pages,
+)
+from .ocr_engine import PageCallback, StopCheck
+from .ocr_backends import ocr_backend_identity
+from .ocr_preprocess import INK_CONTRAST
+
+
+# ==================================================
+# Cache des extractions, indexé par le contenu du PDF
+# ==================================================
+#
+# Le même fichier passe d'abord par /admin/analyse-pdf (pré-remplissage
+# du formulaire) puis par la création de l'acte : avec ce cache, il n'est
+# OCRisé qu'une seule fois.
+
+
+def sha256_of_pdf(data: PdfSource) -> str:
+    """SHA-256 (hex) d'un PDF en mémoire ou sur disque (lu par blocs)."""
+    h = hashlib.sha256()
+    if isinstance(data, str):
+        with open(data, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+    else:
+        h.update(data)
+    return h.hexdigest()
+
+
+def _ocr_settings() -> List[str]:
+    """
+    Réglages qui changent le texte produit (backend, DPI, langue, PSM,
+    seuils de décision OCR par page, pré-traitement des images).
+    Backend et langue : ceux réellement utilisés, pas ceux demandés
+    (repli sur pytesseract, langue OCR_LANG non installée).
+    """
+    backend, lang = ocr_backend_identity()
+    return [
+        f"backend={backend}",
+        f"dpi={settings.OCR_DPI}",
+        f"lang={lang}",
+        f"psm={settings.OCR_PSM}",
+        f"min_chars={settings.OCR_MIN_PAGE_CHARS}",
+        f"coverage={settings.OCR_IMAGE_COVERAGE}",
+        f"blank={settings.OCR_BLANK_INK_RATIO}",
+        f"ink_contrast={INK_CONTRAST}",
+        f"max_side={settings.OCR_MAX_SIDE_PX}",
+        f"deskew={settings.OCR_DESKEW}",
+    ]
+
+
+def extraction_version(partial: bool = False) -> str:
+    """
+    Version de l'extraction enregistrée sur l'acte (Acte.extraction_version) :
+    EXTRACTION_VERSION + empreinte des réglages OCR, ex. "1.3f9a0c2e".
+    partial : texte tronqué par le budget (pages / temps), le budget est
+    ajouté, ex. "1.3f9a0c2e~p300s900" : backfill reprend ces actes dès que
+    EXTRACTION_MAX_PAGES ou EXTRACTION_MAX_SECONDS changent.
+    """
+    settings_hash = hashlib.sha256("|".join(_ocr_settings()).encode("utf-8")).hexdigest()
+    version = f"{EXTRACTION_VERSION}.{settings_hash[:8]}"
+    if partial:
+        version += f"~p{settings.EXTRACTION_MAX_PAGES}s{settings.EXTRACTION_MAX_SECONDS}"
+    return version
+
+
+def extraction_cache_key(pdf_sha256: str) -> str:
+    """
+    Clé de cache : empreinte du PDF + version des heuristiques + réglages
+    OCR (une nouvelle version ne reprend pas les anciens textes).
+    """
+    parts = [pdf_sha256, f"version={EXTRACTION_VERSION}", *_ocr_settings()]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def get_cached_text(db: Session, key: str) -> Optional[str]:
+    """Texte en cache pour cette clé (et mise à jour de last_used_at), ou None."""
+    entry = db.get(ExtractionCache, key)
+    if entry is None:
+        return None
+    entry.last_used_at = func.now()
+    db.commit()
+    return entry.text
+
+
+# une éviction ramène le cache à 90 % de EXTRACTION_CACHE_MAX_MB : les
+# enregistrements suivants ne la relancent pas aussitôt
+EVICT_TARGET = 0.9
+
+
+def _evict_lru(db: Session):
+    """
+    Éviction LRU : si le cache dépasse EXTRACTION_CACHE_MAX_MB, on garde
+    les entrées les plus récemment utilisées tant que leur taille cumulée
+    reste sous EVICT_TARGET de la limite. Sous la limite, seul le total
+    est lu (pas de tri de toute la table).
+    """
+    max_bytes = int(settings.EXTRACTION_CACHE_MAX_MB) * 1024 * 1024
+    total = db.execute(
+        select(func.coalesce(func.sum(ExtractionCache.size_bytes), 0))
+    ).scalar_one()
+    if total <= max_bytes:
+        return
+
+    cumul = (
+        select(
+            ExtractionCache.key,
+            func.sum(ExtractionCache.size_bytes)
+            .over(order_by=ExtractionCache.last_used_at.desc())
+            .label("cumul"),
+        )
+        .subquery()
+    )
+    db.execute(
+        delete(ExtractionCache).where(
+            ExtractionCache.key.in_(
+                select(cumul.c.key).where(cumul.c.cumul > max_bytes * EVICT_TARGET)
+            )
+        )
+    )
+
+
+def store_texts(db: Session, texts: Dict[str, str], evict: bool = True):
+    """
+    Enregistre plusieurs textes {clé: texte} (upsert), puis éviction LRU
+    (evict=False : laissée au prochain enregistrement d'un document).
+    """
+    if not texts:
+        return
+    rows = [
+        {"key": k, "text": t, "size_bytes": len(t.encode("utf-8"))}
+        for k, t in texts.items()
+    ]
+    stmt = insert(ExtractionCache).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ExtractionCache.key],
+        set_={
+            "text": stmt.excluded.text,
+            "size_bytes": stmt.excluded.size_bytes,
+            "last_used_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+    if evict:
+        _evict_lru(db)
+    db.commit()
+
+
+def store_text(db: Session, key: str, text: str):
+    """Enregistre le texte extrait d'un document, puis éviction LRU."""
+    store_texts(db, {key: text})
+
+
+# --------------------------------------------------
+# Cache par page
+# --------------------------------------------------
+#
+# Quand un PDF est remplacé (page re-signée, annexe ajoutée), le document
+# entier change d'empreinte mais la plupart de ses pages non. Le texte OCR
+# de chaque page est donc aussi mis en cache, indexé par l'empreinte de
+# contenu de la page (pdf_utils.page_content_hashes) : seules les pages
+# modifiées repassent par Tesseract. Même table, même budget LRU.
+
+
+def page_cache_key(page_hash: str) -> str:
+    """
+    Clé de cache d'une page : empreinte de contenu + réglages OCR (le texte
+    OCR d'une page ne dépend pas des heuristiques : il reste valable d'une
+    version à l'autre).
+    """
+    parts = [f"page:{page_hash}", *_ocr_settings()]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+class PageOcrCache:
+    """Cache du texte OCR par page (voir pdf_utils.PageTextCache)."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_many(self, page_hashes: List[str]) -> Dict[str, str]:
+        keys = {page_cache_key(h): h for h in page_hashes}
+        if not keys:
+            return {}
+        entries = self.db.execute(
+            select(ExtractionCache).where(ExtractionCache.key.in_(list(keys)))
+        ).scalars().all()
+        found: Dict[str, str] = {}
+        for entry in entries:
+            entry.last_used_at = func.now()
+            found[keys[entry.key]] = entry.text
+        self.db.commit()
+        return found
+
+    def put_many(self, texts: Dict[str, str]) -> None:
+        # l'éviction se fait avec le texte du document (store_text)
+        store_texts(
+            self.db, {page_cache_key(h): t for h, t in texts.items()}, evict=False
+        )
+
+
+def extract_cached(
+    db: Session,
+    data: PdfSource,
+    pdf_sha256: Optional[str] = None,
+    on_page: Optional[PageCallback] = None,
+    should_stop: Optional[StopCheck] = None,
+) -> ExtractionResult:
+    """
+    extract_document, avec passage par le cache :
+    un PDF déjà analysé (mêmes octets, mêmes réglages) n'est pas ré-OCRisé,
+    et pour un PDF modifié seules les pages nouvelles passent par l'OCR.
+    Un résultat partiel (budget atteint, annulation) n'est pas mis en cache ;
+    OCR en erreur : pdf_utils.ExtractionFailed est propagée (rien en cache).
+    Le texte est gardé page par page (pdf_utils.pack_pages).
+    """
+    key = extraction_cache_key(pdf_sha256 or sha256_of_pdf(data))
+
+    cached = get_cached_text(db, key)
+    if cached is not None:
+        return ExtractionResult(unpack_pages(cached))
+
+    result = extract_document(
+        data,
+        on_page=on_page,
+        should_stop=should_stop,
+        page_cache=PageOcrCache(db),
+    )
+    if not result.partial:
+        store_text(db, key, pack_pages(result.pages))
+    return result
+
+
+def extract_text_cached(
+    db: Session,
+    data: PdfSource,
+    pdf_sha256: Optional[str] = None,
+    on_page: Optional[PageCallback] = None,
+) -> str:
+    """Texte intégral via extract_cached."""
+    return extract_cached(db, data, pdf_sha256=pdf_sha256, on_page=on_page).text
@@ -0,0 +1,243 @@
+# app/extraction_executor.py
+from typing import Callable, List, Optional, Any, Tuple, Dict, Deque
+from collections import deque
+from concurrent.futures import Future
+import asyncio
+import math
+import threading
+import time
+
+from .config import settings
+from .lanes import LANES, INTERACTIVE, LaneScheduler
+
+
+# ==================================================
+# Exécuteur dédié aux extractions lancées depuis l'API
+# ==================================================
+#
+# L'analyse d'un PDF (texte natif, OCR, détection) est du travail CPU et
+# bloquant : exécutée directement dans un endpoint `async def`, elle gèle
+# la boucle asyncio du worker uvicorn, et toutes les requêtes publiques
+# (/actes…) servies par ce worker attendent.
+# Les endpoints passent donc par cet exécuteur :
+# - EXTRACTION_THREADS threads dédiés (l'OCR des pages part ensuite dans
+#   le pool de processus d'ocr_engine)
+# - une file par priorité (voir lanes.py) : une analyse "interactive"
+#   n'attend pas derrière un lot de 50 PDF ("bulk")
+# - files bornées (EXTRACTION_QUEUE_MAX par file) : au-delà, la demande
+#   est refusée tout de suite (503 + Retry-After) au lieu de s'accumuler
+# - statistiques par file : profondeur, temps d'attente, latence, refus
+
+
+class ExtractionQueueFull(Exception):
+    """File d'extraction pleine : réessayer dans retry_after secondes."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"extraction queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+# poids des nouvelles mesures dans les moyennes glissantes
+EWMA_ALPHA = 0.2
+
+
+class _LaneStats:
+    def __init__(self):
+        self.queued = 0          # admis, pas encore commencés
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.avg_wait = 0.0      # secondes entre l'admission et le début
+        self.avg_run = 0.0       # durée d'une extraction
+        self.last_wait = 0.0
+
+    def record_start(self, wait: float):
+        self.queued -= 1
+        self.running += 1
+        self.last_wait = wait
+        self.avg_wait += EWMA_ALPHA * (wait - self.avg_wait)
+
+    def record_end(self, run: float):
+        self.running -= 1
+        self.completed += 1
+        if self.completed == 1:
+            self.avg_run = run
+        else:
+            self.avg_run += EWMA_ALPHA * (run - self.avg_run)
+
+    def as_dict(self) -> dict:
+        return {
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_seconds": round(self.avg_wait, 3),
+            "last_wait_seconds": round(self.last_wait, 3),
+            "avg_run_seconds": round(self.avg_run, 3),
+            "avg_latency_seconds": round(self.avg_wait + self.avg_run, 3),
+        }
+
+
+# une tâche en file : (admise à, future, fonction, arguments)
+_Task = Tuple[float, Future, Callable, Tuple]
+
+
+class ExtractionExecutor:
+    def __init__(self, workers: int, queue_max: int):
+        self.workers = max(1, workers)
+        self.queue_max = max(0, queue_max)
+        self._cond = threading.Condition()
+        self._queues: Dict[str, Deque[_Task]] = {lane: deque() for lane in LANES}
+        self._stats: Dict[str, _LaneStats] = {lane: _LaneStats() for lane in LANES}
+        self._scheduler = LaneScheduler()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+    def _ensure_threads(self):
+        if self._threads:
+            return
+        self._stopping = False
+        for i in range(self.workers):
+            t = threading.Thread(
+                target=self._worker, name=f"extraction-{i}", daemon=True
+            )
+            t.start()
+            self._threads.append(t)
+
+    def _running_total(self) -> int:
+        return sum(s.running for s in self._stats.values())
+
+    def retry_after(self, lane: str) -> int:
+        """Estimation (s) du temps pour que la file se vide d'une place."""
+        stats = self._stats[lane]
+        per_task = stats.avg_run or 5.0
+        backlog = stats.queued + stats.running
+        return max(1, math.ceil(per_task * backlog / self.workers))
+
+    # ---------- côté threads ----------
+
+    def _next_task(self) -> Optional[Tuple[str, _Task]]:
+        """Prochaine tâche à exécuter (appelé avec le verrou)."""
+        while True:
+            now = time.monotonic()
+            waiting = {
+                lane: now - q[0][0] for lane, q in self._queues.items() if q
+            }
+            lane = self._scheduler.pick(waiting)
+            if lane is None:
+                return None
+            task = self._queues[lane].popleft()
+            # annulée avant d'avoir commencé (client parti) : déjà décomptée
+            if task[1].set_running_or_notify_cancel():
+                return lane, task
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                picked = self._next_task()
+                while picked is None:
+                    if self._stopping:
+                        return
+                    self._cond.wait()
+                    picked = self._next_task()
+                lane, (admitted_at, fut, fn, args) = picked
+                started = time.monotonic()
+                self._stats[lane].record_start(started - admitted_at)
+
+            try:
+                fut.set_result(fn(*args))
+            except BaseException as e:
+                fut.set_exception(e)
+            finally:
+                with self._cond:
+                    self._stats[lane].record_end(time.monotonic() - started)
+
+    # ---------- côté endpoints ----------
+
+    def _forget_if_cancelled(self, lane: str, on_cancel: Optional[Callable[[], None]]):
+        def callback(fut: Future):
+            if fut.cancelled():
+                with self._cond:
+                    self._stats[lane].queued -= 1
+                if on_cancel is not None:
+                    on_cancel()
+        return callback
+
+    def submit_many(
+        self,
+        calls: List[Tuple[Callable, Tuple]],
+        lane: str = INTERACTIVE,
+        on_cancel: Optional[Callable[[int], None]] = None,
+    ) -> List["asyncio.Future"]:
+        """
+        Admet TOUTES les tâches dans la file `lane` ou aucune
+        (ExtractionQueueFull), puis les soumet.
+        Renvoie des futures asyncio (à attendre dans l'endpoint).
+        on_cancel(i) : appelé si la tâche n° i est annulée avant d'avoir
+        commencé (client parti, arrêt) ; elle ne s'exécutera jamais, c'est
+        donc à l'appelant de faire le ménage (fichier reçu…). Annuler la
+        future asyncio ne suffit pas à le savoir : une tâche déjà commencée
+        va jusqu'au bout.
+        """
+        loop = asyncio.get_running_loop()
+        futures = []
+        with self._cond:
+            stats = self._stats[lane]
+            idle = max(0, self.workers - self._running_total())
+            if stats.queued + len(calls) > self.queue_max + idle:
+                stats.rejected += len(calls)
+                raise ExtractionQueueFull(self.retry_after(lane))
+
+            self._ensure_threads()
+            now = time.monotonic()
+            for i, (fn, args) in enumerate(calls):
+                fut: Future = Future()
+                fut.add_done_callback(self._forget_if_cancelled(
+                    lane, on_cancel and (lambda i=i: on_cancel(i))
+                ))
+                self._queues[lane].append((now, fut, fn, args))
+                futures.append(asyncio.wrap_future(fut, loop=loop))
+            stats.queued += len(calls)
+            self._cond.notify(len(calls))
+        return futures
+
+    async def run(
+        self,
+        fn: Callable,
+        *args,
+        lane: str = INTERACTIVE,
+        on_cancel: Optional[Callable[[], None]] = None,
+    ) -> Any:
+        """Exécute fn(*args) dans l'exécuteur (ExtractionQueueFull si la file est pleine)."""
+        (fut,) = self.submit_many(
+            [(fn, args)], lane=lane, on_cancel=on_cancel and (lambda i: on_cancel())
+        )
+        return await fut
+
+    def stats(self) -> dict:
+        with self._cond:
+            lanes = {lane: s.as_dict() for lane, s in self._stats.items()}
+        return {
+            "workers": self.workers,
+            "queue_max": self.queue_max,
+            "queued": sum(s["queued"] for s in lanes.values()),
+            "running": sum(s["running"] for s in lanes.values()),
+            "completed": sum(s["completed"] for s in lanes.values()),
+            "rejected": sum(s["rejected"] for s in lanes.values()),
+            "lanes": lanes,
+        }
+
+    def shutdown(self):
+        with self._cond:
+            self._stopping = True
+            for q in self._queues.values():
+                while q:
+                    q.popleft()[1].cancel()
+            self._cond.notify_all()
+        self._threads = []
+
+
+extraction_executor = ExtractionExecutor(
+    workers=settings.EXTRACTION_THREADS,
+    queue_max=settings.EXTRACTION_QUEUE_MAX,
+)
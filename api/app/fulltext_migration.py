@@ -0,0 +1,100 @@
+# app/fulltext_migration.py
+# Fin de la migration "texte page par page" : suppression de l'ancienne
+# colonne actes.fulltext_content, après vérification.
+#
+# Lancement :  python -m app.fulltext_migration           (vérification seule)
+#              python -m app.fulltext_migration --drop    (puis suppression)
+#
+# Au démarrage, l'API copie le texte de chaque acte dans acte_pages (page 0)
+# et renomme la colonne en fulltext_content_old, sans rien supprimer
+# (main._move_fulltext_to_pages). Cette commande compare la copie à
+# l'ancienne colonne ; la colonne n'est supprimée (--drop) que si aucun
+# texte ne manque, ou avec --force.
+# Un acte dont le texte a été remplacé depuis (ré-extraction, nouveau PDF :
+# pages numérotées à partir de 1) compte comme repris.
+from typing import Optional
+import argparse
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from .database import engine
+
+OLD_COLUMN = "fulltext_content_old"
+
+# ids des actes sans texte affichés au plus
+SHOW_MISSING = 20
+
+
+def old_column_exists(conn: Connection) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM information_schema.columns "
+        "WHERE table_schema = current_schema() "
+        "AND table_name = 'actes' AND column_name = :col;"
+    ), {"col": OLD_COLUMN}).first() is not None
+
+
+def check_copy(conn: Connection) -> Optional[dict]:
+    """
+    État de la copie (None si l'ancienne colonne n'existe plus) :
+    {"actes": actes avec un ancien texte, "copied": repris en page 0,
+     "replaced": texte remplacé depuis, "missing": [ids des actes sans texte]}
+    """
+    if not old_column_exists(conn):
+        return None
+    rows = conn.execute(text(f"""
+        SELECT a.id,
+               EXISTS (SELECT 1 FROM acte_pages p
+                       WHERE p.acte_id = a.id AND p.page_no = 0
+                       AND p.text = a.{OLD_COLUMN}) AS copied,
+               EXISTS (SELECT 1 FROM acte_pages p
+                       WHERE p.acte_id = a.id AND p.page_no > 0) AS replaced
+        FROM actes a
+        WHERE coalesce(a.{OLD_COLUMN}, '') <> ''
+        ORDER BY a.id;
+    """)).all()
+    return {
+        "actes": len(rows),
+        "copied": sum(1 for r in rows if r.copied),
+        "replaced": sum(1 for r in rows if r.replaced and not r.copied),
+        "missing": [r.id for r in rows if not r.copied and not r.replaced],
+    }
+
+
+def drop_old_column(conn: Connection):
+    conn.execute(text(f"ALTER TABLE actes DROP COLUMN IF EXISTS {OLD_COLUMN};"))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Vérifie la copie du texte des actes dans acte_pages, puis supprime l'ancienne colonne"
+    )
+    parser.add_argument("--drop", action="store_true", help="supprime actes.fulltext_content_old")
+    parser.add_argument("--force", action="store_true", help="supprime même si des textes manquent")
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        status = check_copy(conn)
+        if status is None:
+            print(f"[migration] pas de colonne actes.{OLD_COLUMN} : rien à faire")
+            return
+        missing = status["missing"]
+        print(
+            f"[migration] {status['actes']} actes avec un ancien texte : "
+            f"{status['copied']} repris en page 0, {status['replaced']} remplacés depuis, "
+            f"{len(missing)} sans texte dans acte_pages"
+        )
+        if missing:
+            shown = ", ".join(str(i) for i in missing[:SHOW_MISSING])
+            more = " …" if len(missing) > SHOW_MISSING else ""
+            print(f"[migration][WARN] actes sans texte : {shown}{more}")
+        if not args.drop:
+            return
+        if missing and not args.force:
+            raise SystemExit("[migration] colonne gardée (--force pour la supprimer quand même)")
+        drop_old_column(conn)
+    print(f"[migration] colonne actes.{OLD_COLUMN} supprimée")
+
+
+if __name__ == "__main__":
+    main()
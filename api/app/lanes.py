@@ -0,0 +1,72 @@
+# app/lanes.py
+from typing import Dict, Optional
+
+from .config import settings
+
+
+# ==================================================
+# Files de priorité de l'extraction
+# ==================================================
+#
+# - "interactive" : un agent attend le résultat (analyse d'un PDF pour
+#   pré-remplir le formulaire, création / modification d'un acte)
+# - "bulk"        : dépôts multiples, reprises, ré-extractions
+#
+# Partage pondéré (LANE_INTERACTIVE_WEIGHT : LANE_BULK_WEIGHT) quand les
+# deux files ont du travail, et protection contre la famine : une tâche
+# qui attend depuis plus de LANE_STARVATION_SECONDS passe devant, sans
+# dépasser la part de sa file.
+# Utilisé par l'exécuteur de l'API (extraction_executor) et par les
+# workers (choix du prochain job dans ingest_jobs).
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+
+def lane_weights() -> Dict[str, int]:
+    return {
+        INTERACTIVE: max(1, settings.LANE_INTERACTIVE_WEIGHT),
+        BULK: max(1, settings.LANE_BULK_WEIGHT),
+    }
+
+
+class LaneScheduler:
+    """
+    Choix de la file à servir (round-robin pondéré "lissé", comme nginx) :
+    sur une période de (w_interactive + w_bulk) choix, chaque file est
+    servie selon son poids, en alternant au lieu de faire des rafales.
+    Pas thread-safe : à protéger par le verrou de l'appelant.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, int]] = None):
+        self.weights = weights or lane_weights()
+        self.current = {lane: 0 for lane in self.weights}
+
+    def pick(self, waiting: Dict[str, float]) -> Optional[str]:
+        """
+        waiting : {file: attente (s) de sa plus vieille tâche}, pour les
+        files non vides. Renvoie la file à servir, ou None si tout est vide.
+        """
+        if not waiting:
+            return None
+
+        total = 0
+        for lane in waiting:
+            self.current[lane] += self.weights[lane]
+            total += self.weights[lane]
+
+        # famine : une file dont la plus vieille tâche dépasse le seuil passe
+        # devant, mais dans la limite de sa part (crédit positif) : le
+        # choix est décompté comme un tour normal, un vieil arriéré "bulk"
+        # ne prend donc pas toutes les places aux tâches interactives
+        starving = [
+            lane for lane, age in waiting.items()
+            if age >= settings.LANE_STARVATION_SECONDS and self.current[lane] > 0
+        ]
+        if starving:
+            chosen = max(starving, key=lambda lane: waiting[lane] / self.weights[lane])
+        else:
+            chosen = max(waiting, key=lambda lane: self.current[lane])
+        self.current[chosen] -= total
+        return chosen
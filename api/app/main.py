@@ -8,9 +8,14 @@ from fastapi.openapi.utils import get_openapi
 from .database import Base, engine, SessionLocal
 from .config import settings
 from .routers_actes import router as actes_router
-from .routers_admin import router as admin_router
+from .routers_admin import router as admin_router, purge_expired_uploads
 from .routers_refs import router as refs_router
+from .routers_jobs import router as jobs_router
 from .models_refs import ActType, Service
+from .ocr_engine import shutdown_ocr_pool
+from .extraction_executor import extraction_executor
+from .staging import purge_expired_staging
+from .fulltext_migration import old_column_exists
 
 from swagger_ui_bundle import swagger_ui_3_path
 
@@ -78,20 +83,280 @@ def seed_reference_data():
             db.add_all([Service(name="Mairie"), Service(name="Culture"), Service(name="Voirie"), Service(name="Urbanisme")])
         db.commit()
 
-def _ensure_fulltext_column():
-    ddl = text("ALTER TABLE actes ADD COLUMN IF NOT EXISTS fulltext_content TEXT;")
+def _move_fulltext_to_pages():
+    """
+    Ancienne colonne actes.fulltext_content -> acte_pages (voir
+    acte_pages.py) : le texte de chaque acte devient sa page 0 (page
+    inconnue, découpé en vraies pages à la ré-extraction). Une seule fois :
+    la colonne est ensuite renommée fulltext_content_old et gardée telle
+    quelle ; elle n'est supprimée que par un administrateur, après
+    vérification de la copie (python -m app.fulltext_migration --drop).
+    actes.search_vector reste valable.
+    """
+    with engine.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_schema = current_schema() "
+            "AND table_name = 'actes' AND column_name = 'fulltext_content';"
+        )).first()
+        if not exists:
+            return 0
+        # l'ancien trigger dépend de la colonne (recréé par _ensure_search_vector)
+        conn.execute(text("DROP TRIGGER IF EXISTS actes_search_vector ON actes;"))
+        n = conn.execute(text("""
+            INSERT INTO acte_pages (acte_id, page_no, text)
+            SELECT id, 0, fulltext_content FROM actes
+            WHERE coalesce(fulltext_content, '') <> ''
+            ON CONFLICT DO NOTHING;
+        """)).rowcount
+        conn.execute(text("ALTER TABLE actes RENAME COLUMN fulltext_content TO fulltext_content_old;"))
+    return n
+
+def _ensure_extraction_status_column():
+    ddl = text("ALTER TABLE actes ADD COLUMN IF NOT EXISTS extraction_status VARCHAR(20);")
     with engine.begin() as conn:
         conn.execute(ddl)
 
+def _ensure_extraction_note_columns():
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE actes ADD COLUMN IF NOT EXISTS extraction_note TEXT;"))
+        conn.execute(text("ALTER TABLE ingest_jobs ADD COLUMN IF NOT EXISTS note TEXT;"))
+
+def _ensure_job_columns():
+    with engine.begin() as conn:
+        conn.execute(text(
+            "ALTER TABLE ingest_jobs ADD COLUMN IF NOT EXISTS lane VARCHAR(20) NOT NULL DEFAULT 'interactive';"
+        ))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_ingest_jobs_lane ON ingest_jobs (lane);"))
+        conn.execute(text("ALTER TABLE ingest_jobs ADD COLUMN IF NOT EXISTS pdf_sha256 VARCHAR(64);"))
+        conn.execute(text(
+            "ALTER TABLE ingest_jobs ADD COLUMN IF NOT EXISTS kind VARCHAR(20) NOT NULL DEFAULT 'extract';"
+        ))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_ingest_jobs_kind ON ingest_jobs (kind);"))
+        conn.execute(text("ALTER TABLE ingest_jobs ADD COLUMN IF NOT EXISTS extraction_version VARCHAR(40);"))
+
+def _ensure_extraction_version_column():
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE actes ADD COLUMN IF NOT EXISTS extraction_version VARCHAR(40);"))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_actes_extraction_version ON actes (extraction_version);"
+        ))
+
+def _ensure_search_vector():
+    """
+    Recherche plein texte (voir search.py) :
+    - configuration "french_unaccent" : français + unaccent
+    - acte_pages.search_vector : tsvector de chaque page (trigger par ligne)
+    - actes.search_vector : titre + résumé + toutes les pages, calculé par
+      un trigger à l'INSERT / UPDATE du titre ou du résumé, et par des
+      triggers par instruction sur acte_pages (tables de transition : une
+      seule mise à jour par acte quand toutes ses pages sont remplacées),
+      index GIN
+    - calcul pour les pages et actes existants (une seule fois)
+    Le texte est tronqué à 1 000 000 caractères (limite de taille d'un
+    tsvector).
+    """
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent;"))
+        conn.execute(text("""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'french_unaccent') THEN
+                    CREATE TEXT SEARCH CONFIGURATION french_unaccent (COPY = french);
+                    ALTER TEXT SEARCH CONFIGURATION french_unaccent
+                        ALTER MAPPING FOR hword, hword_part, word WITH unaccent, french_stem;
+                END IF;
+            END
+            $$;
+        """))
+        conn.execute(text("ALTER TABLE actes ADD COLUMN IF NOT EXISTS search_vector tsvector;"))
+        conn.execute(text("ALTER TABLE acte_pages ADD COLUMN IF NOT EXISTS search_vector tsvector;"))
+        conn.execute(text("""
+            CREATE OR REPLACE FUNCTION actes_search_document(titre text, resume text, fulltext text)
+            RETURNS tsvector LANGUAGE sql IMMUTABLE AS $$
+                SELECT setweight(to_tsvector('french_unaccent', coalesce(titre, '')), 'A')
+                    || setweight(to_tsvector('french_unaccent', coalesce(resume, '')), 'B')
+                    || setweight(to_tsvector('french_unaccent', left(coalesce(fulltext, ''), 1000000)), 'C')
+            $$;
+        """))
+        conn.execute(text("""
+            CREATE OR REPLACE FUNCTION actes_pages_text(p_acte_id integer)
+            RETURNS text LANGUAGE sql STABLE AS $$
+                SELECT string_agg(text, E'\\n' ORDER BY page_no)
+                FROM acte_pages WHERE acte_id = p_acte_id
+            $$;
+        """))
+        conn.execute(text("""
+            CREATE OR REPLACE FUNCTION actes_search_vector_update() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                NEW.search_vector := actes_search_document(NEW.titre, NEW.resume, actes_pages_text(NEW.id));
+                RETURN NEW;
+            END
+            $$;
+        """))
+        conn.execute(text("""
+            CREATE OR REPLACE TRIGGER actes_search_vector
+            BEFORE INSERT OR UPDATE OF titre, resume ON actes
+            FOR EACH ROW EXECUTE FUNCTION actes_search_vector_update();
+        """))
+
+        # pages : tsvector de la page (page trouvée par une recherche)
+        conn.execute(text("""
+            CREATE OR REPLACE FUNCTION acte_pages_search_vector_update() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                NEW.search_vector := to_tsvector('french_unaccent', left(NEW.text, 1000000));
+                RETURN NEW;
+            END
+            $$;
+        """))
+        conn.execute(text("""
+            CREATE OR REPLACE TRIGGER acte_pages_search_vector
+            BEFORE INSERT OR UPDATE OF text ON acte_pages
+            FOR EACH ROW EXECUTE FUNCTION acte_pages_search_vector_update();
+        """))
+        conn.execute(text(
+            "UPDATE acte_pages SET search_vector = to_tsvector('french_unaccent', left(text, 1000000)) "
+            "WHERE search_vector IS NULL;"
+        ))
+
+        # pages ajoutées / modifiées / supprimées : document de l'acte recalculé
+        conn.execute(text("""
+            CREATE OR REPLACE FUNCTION acte_pages_refresh_actes() RETURNS trigger
+            LANGUAGE plpgsql AS $$
+            BEGIN
+                -- pages d'un acte remplacées (acte_pages.save_pages : DELETE
+                -- puis INSERT) : le document est recalculé une seule fois, à la fin
+                IF current_setting('actes.defer_search_refresh', true) = 'on' THEN
+                    RETURN NULL;
+                END IF;
+                IF TG_OP = 'DELETE' THEN
+                    UPDATE actes SET search_vector = actes_search_document(titre, resume, actes_pages_text(id))
+                    WHERE id IN (SELECT acte_id FROM old_pages);
+                ELSE
+                    UPDATE actes SET search_vector = actes_search_document(titre, resume, actes_pages_text(id))
+                    WHERE id IN (SELECT acte_id FROM new_pages);
+                END IF;
+                RETURN NULL;
+            END
+            $$;
+        """))
+        # une table de transition n'est possible que pour un seul événement
+        for event, table in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            conn.execute(text(f"""
+                CREATE OR REPLACE TRIGGER acte_pages_refresh_actes_{event.lower()}
+                AFTER {event} ON acte_pages
+                REFERENCING {table} TABLE AS {table.lower()}_pages
+                FOR EACH STATEMENT EXECUTE FUNCTION acte_pages_refresh_actes();
+            """))
+
+        n = conn.execute(text(
+            "UPDATE actes SET search_vector = actes_search_document(titre, resume, actes_pages_text(id)) "
+            "WHERE search_vector IS NULL;"
+        )).rowcount
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_actes_search_vector ON actes USING GIN (search_vector);"
+        ))
+    return n
+
+def _ensure_trigram_indexes():
+    """
+    Index trigrammes (pg_trgm, voir search.py) pour les filtres "contient"
+    et la recherche approchée : titre et résumé des actes (sans accents),
+    e-mail des utilisateurs (filtre du journal d'audit), plus la date du
+    journal d'audit (tri).
+    """
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent;"))
+        # unaccent() n'est que STABLE : l'envelopper dans une fonction SQL
+        # IMMUTABLE suffit pour l'indexer, mais l'appel n'est alors pas
+        # "inliné" (~5x plus lent, sensible à la relecture des lignes en
+        # recherche approchée). Appel direct de la fonction C quand on en
+        # a le droit (superutilisateur), sinon enveloppe SQL.
+        unaccent_call = "public.immutable_unaccent('public.unaccent'::regdictionary, $1)"
+        try:
+            with conn.begin_nested():
+                conn.execute(text("""
+                    CREATE OR REPLACE FUNCTION immutable_unaccent(regdictionary, text) RETURNS text
+                    LANGUAGE c IMMUTABLE PARALLEL SAFE STRICT AS '$libdir/unaccent', 'unaccent_dict';
+                """))
+        except Exception:
+            unaccent_call = "public.unaccent('public.unaccent'::regdictionary, $1)"
+        conn.execute(text(f"""
+            CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+            LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS $$
+                SELECT {unaccent_call}
+            $$;
+        """))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_actes_titre_trgm ON actes USING GIN (f_unaccent(titre) gin_trgm_ops);"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_actes_resume_trgm ON actes USING GIN (f_unaccent(resume) gin_trgm_ops);"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING GIN (email gin_trgm_ops);"
+        ))
+        # journal filtré puis trié par date : selon le filtre, PostgreSQL
+        # part des utilisateurs trouvés ou parcourt le journal par date
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_audit_logs_created_at ON audit_logs (created_at);"
+        ))
+
 # --- Startup ---
 @app.on_event("startup")
 def on_startup():
     Base.metadata.create_all(bind=engine)
     try:
-        _ensure_fulltext_column()
-        print("[startup] Colonne fulltext_content OK")
+        n = _move_fulltext_to_pages()
+        print(f"[startup] Texte intégral page par page (acte_pages) OK, {n} textes repris")
+        with engine.connect() as conn:
+            if old_column_exists(conn):
+                print(
+                    "[startup] Ancienne colonne actes.fulltext_content_old gardée : "
+                    "la supprimer après vérification (python -m app.fulltext_migration --drop)"
+                )
     except Exception as e:
-        print(f"[startup][WARN] fulltext_content: {e}")
+        print(f"[startup][WARN] acte_pages: {e}")
+    try:
+        _ensure_extraction_status_column()
+        print("[startup] Colonne extraction_status OK")
+    except Exception as e:
+        print(f"[startup][WARN] extraction_status: {e}")
+    try:
+        _ensure_extraction_note_columns()
+        print("[startup] Colonnes extraction_note OK")
+    except Exception as e:
+        print(f"[startup][WARN] extraction_note: {e}")
+    try:
+        _ensure_job_columns()
+        print("[startup] Colonnes ingest_jobs (lane, pdf_sha256, kind) OK")
+    except Exception as e:
+        print(f"[startup][WARN] ingest_jobs: {e}")
+    try:
+        _ensure_extraction_version_column()
+        print("[startup] Colonne extraction_version OK")
+    except Exception as e:
+        print(f"[startup][WARN] extraction_version: {e}")
+    try:
+        n = _ensure_search_vector()
+        print(f"[startup] Recherche plein texte (tsvector + GIN) OK, {n} actes indexés")
+    except Exception as e:
+        print(f"[startup][WARN] search_vector: {e}")
+    try:
+        _ensure_trigram_indexes()
+        print("[startup] Index trigrammes (titre, résumé, e-mail) et date du journal OK")
+    except Exception as e:
+        print(f"[startup][WARN] pg_trgm: {e}")
+    try:
+        with SessionLocal() as db:
+            n = purge_expired_staging(db)
+            n_uploads = purge_expired_uploads(db)
+        print(f"[startup] Dépôts en attente / envois abandonnés supprimés : {n} / {n_uploads}")
+    except Exception as e:
+        print(f"[startup][WARN] staging: {e}")
     try:
         seed_reference_data()
         print("[startup] Référentiels OK")
@@ -107,10 +372,16 @@ def on_startup():
     except Exception as e:
         print(f"[startup][WARN] Création dossier upload: {e}")
 
+@app.on_event("shutdown")
+def on_shutdown():
+    extraction_executor.shutdown()
+    shutdown_ocr_pool()
+
 # --- Routes ---
 app.include_router(actes_router, prefix="")
 app.include_router(admin_router, prefix="")
 app.include_router(refs_router, prefix="")
+app.include_router(jobs_router, prefix="")
 
 def custom_openapi():
     if app.openapi_schema:
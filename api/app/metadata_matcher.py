@@ -0,0 +1,191 @@
+# app/metadata_matcher.py
+from typing import Optional, List, Dict, Set, Tuple
+from functools import lru_cache
+import re
+
+from .normalized_text import TextLike, as_normalized, fold
+
+
+# ==================================================
+# Détection service / type : matcher précompilé
+# ==================================================
+#
+# Avant : pour chaque document, chaque zone (en-tête, pied, texte entier)
+# et chaque service / type connu, on refaisait _strip_accents(x.lower())
+# puis une recherche de sous-chaîne, et les regex de règles métier étaient
+# recompilées à chaque appel.
+# Maintenant : un MetadataMatcher est construit UNE fois par liste de
+# référence (get_matcher, mis en cache) ; les noms y sont déjà normalisés
+# et compilés en une seule regex (trie), et le texte est lu via un
+# NormalizedText (normalized_text.py) partagé avec la détection de date.
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """
+    Regex équivalente à "mot1|mot2|...", factorisée en arbre de préfixes :
+    à chaque position du texte, un seul parcours au lieu d'un essai par mot.
+    À une position donnée, c'est le mot le plus long qui est capturé.
+    """
+    trie: Dict = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: Dict) -> str:
+        alts = [re.escape(ch) + build(node[ch]) for ch in sorted(k for k in node if k)]
+        if not alts:
+            return ""
+        pattern = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if "" in node:
+            # un mot se termine ici : la suite est optionnelle
+            pattern = "(?:" + pattern + ")?"
+        return pattern
+
+    return build(trie)
+
+
+class NameMatcher:
+    """
+    Recherche de plusieurs noms (services, types) dans un texte normalisé
+    (fold). Résultat identique à l'ancienne boucle :
+    le PREMIER nom de la liste dont la forme normalisée apparaît dans le texte.
+    """
+
+    def __init__(self, names: List[str]):
+        self.names = [n for n in names if n]
+        self._rank: Dict[str, int] = {}
+        for i, name in enumerate(self.names):
+            key = fold(name)
+            if key and key not in self._rank:
+                self._rank[key] = i
+
+        keys = list(self._rank)
+        # (?=(...)) : recherche à chaque position (occurrences qui se chevauchent)
+        self._regex = re.compile("(?=(" + _trie_pattern(keys) + "))") if keys else None
+        # un nom trouvé implique tous les noms qu'il contient
+        # (ex : "culture" dans "direction de la culture")
+        self._contained: Dict[str, List[str]] = {
+            k: [other for other in keys if other in k] for k in keys
+        }
+
+    def found_in(self, folded_text: str) -> Set[str]:
+        """Formes normalisées des noms présents dans le texte."""
+        found: Set[str] = set()
+        if self._regex is None:
+            return found
+        for m in self._regex.finditer(folded_text):
+            key = m.group(1)
+            if key and key not in found:
+                found.update(self._contained[key])
+        return found
+
+    def first_in(self, folded_text: str) -> Optional[str]:
+        found = self.found_in(folded_text)
+        if not found:
+            return None
+        return self.names[min(self._rank[k] for k in found)]
+
+
+# --------------------------------------------------
+# Règles métier pour le type d'acte (sur texte normalisé)
+# --------------------------------------------------
+
+# "DECISION DU MAIRE", "DECISION"
+_DECISION_RE = re.compile(r"\bdecision\b", re.IGNORECASE)
+# "ARRETE N°2025/..", "ARRETE DU ...", "PAR ARRETE"
+_ARRETE_RE = re.compile(
+    r"\barre?t[ée]?\s*(n|n°|num|du|de )|\bpar\s+arre?t[ée]?\b", re.IGNORECASE
+)
+# "DELIBERATION N° ...", "DELIBERATION DU CONSEIL MUNICIPAL", "DELIBERATION"
+_DELIBERATION_RE = re.compile(
+    r"\bdelib[ée]ration\s*(n|n°|num|du|de )|\bdelib[ée]ration\b", re.IGNORECASE
+)
+
+# (règle, variantes génériques à associer à un type officiel), par priorité
+_TYPE_RULES = [
+    (_DECISION_RE, ["décision", "decision"]),
+    (_ARRETE_RE, ["arrêté", "arrete", "arreté", "arrete municipal"]),
+    (_DELIBERATION_RE, ["délibération", "deliberation"]),
+]
+
+
+def _pick_known_type(variants: List[str], known_types: List[str]) -> Optional[str]:
+    """
+    Essaie d'associer nos variantes génériques ("arrete", "decision", "deliberation")
+    avec un type officiel exact présent dans known_types.
+    """
+    for variant in variants:
+        v = fold(variant)
+        for t in known_types:
+            if v in fold(t):
+                return t
+    return None
+
+
+class MetadataMatcher:
+    """
+    Détection du service et du type d'acte pour une liste de référence
+    donnée. À obtenir via get_matcher (construit une fois, réutilisé).
+    """
+
+    def __init__(self, known_services: List[str], known_types: List[str]):
+        self.services = NameMatcher(known_services)
+        self.types = NameMatcher(known_types)
+        # la correspondance règle -> type officiel ne dépend que de la liste
+        self.type_rules: List[Tuple[re.Pattern, str]] = []
+        for regex, variants in _TYPE_RULES:
+            known = _pick_known_type(variants, known_types)
+            if known:
+                self.type_rules.append((regex, known))
+
+    def guess_service(self, text: TextLike) -> Optional[str]:
+        """
+        - d'abord le haut (30 premières lignes) puis le bas (30 dernières) :
+          le service émetteur est souvent en-tête ou dans le bloc signature
+        - sinon, recherche dans tout le texte
+        """
+        if not self.services.names:
+            return None
+        nt = as_normalized(text)
+        for zone in (nt.folded_raw_zone(first=30), nt.folded_raw_zone(last=30)):
+            found = self.services.first_in(zone)
+            if found:
+                return found
+        return self.services.first_in(nt.folded_joined)
+
+    def _type_from_rules(self, folded_block: str) -> Optional[str]:
+        for regex, known in self.type_rules:
+            if regex.search(folded_block):
+                return known
+        return None
+
+    def guess_type(self, text: TextLike) -> Optional[str]:
+        """
+        - règles métier ("DELIBERATION", "ARRÊTÉ N°", "DECISION DU MAIRE"…)
+          d'abord sur les 15 premières lignes non vides (titre de l'acte),
+          puis sur tout le texte
+        - sinon, un type officiel cité littéralement quelque part
+        """
+        nt = as_normalized(text)
+
+        if self.type_rules:
+            guess = self._type_from_rules(nt.folded_zone(0, 15))
+            if guess:
+                return guess
+
+        return self._type_from_rules(nt.folded_joined) or self.types.first_in(nt.folded_joined)
+
+
+@lru_cache(maxsize=8)
+def _matcher_for(services: Tuple[str, ...], types: Tuple[str, ...]) -> MetadataMatcher:
+    return MetadataMatcher(list(services), list(types))
+
+
+def get_matcher(known_services: List[str], known_types: List[str]) -> MetadataMatcher:
+    """
+    Matcher pour ces listes de référence : construit au premier appel,
+    puis réutilisé tant que les listes ne changent pas.
+    """
+    return _matcher_for(tuple(known_services), tuple(known_types))
@@ -1,5 +1,7 @@
 # api/app/models.py
-from sqlalchemy import Column, Integer, String, Date, DateTime, Text
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, JSON, ForeignKey
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -19,12 +21,47 @@ class Acte(Base):
 
     pdf_path = Column(String(512), nullable=False)
 
-    # Texte intégral (OCR ou texte natif du PDF)
-    fulltext_content = Column(Text, nullable=True)
+    # Le texte intégral (OCR ou texte natif du PDF) est dans acte_pages
+    # (ActePage) : jamais chargé avec l'acte.
+
+    # Etat de l'extraction asynchrone : pending / done / partial / cancelled / failed
+    extraction_status = Column(String(20), nullable=True, index=True)
+
+    # Pourquoi le texte est incomplet (budget de pages / temps, annulation)
+    extraction_note = Column(Text, nullable=True)
+
+    # Version de l'extraction qui a produit le texte (heuristiques + réglages
+    # OCR, voir extraction_cache.extraction_version) ; NULL = avant versionnage
+    # ou extraction annulée ; suffixe "~p300s900" : texte tronqué par ce budget
+    extraction_version = Column(String(40), nullable=True, index=True)
+
+    # Document de recherche plein texte (titre + résumé + texte intégral),
+    # calculé par un trigger PostgreSQL, index GIN (voir search.py).
+    # Jamais chargé avec l'acte.
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
+class ActePage(Base):
+    """
+    Texte extrait d'un acte, page par page (voir acte_pages.py).
+    - page_no : numéro de la page dans le PDF (1 = première) ; 0 = texte
+      d'avant le découpage par page, page inconnue (remplacé à la
+      ré-extraction, python -m app.backfill)
+    - search_vector : document de recherche de la page, calculé par un
+      trigger PostgreSQL : page trouvée par une recherche (search.py)
+    """
+    __tablename__ = "acte_pages"
+
+    acte_id = Column(
+        Integer, ForeignKey("actes.id", ondelete="CASCADE"), primary_key=True
+    )
+    page_no = Column(Integer, primary_key=True)
+    text = Column(Text, nullable=False)
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -52,8 +89,138 @@ class AuditLog(Base):
     user_id = Column(Integer, nullable=True, index=True)
     action = Column(String(20), nullable=False)  # create / update / delete
     detail = Column(Text, nullable=True)
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        index=True,  # journal lu du plus récent au plus ancien
+    )
+
+
+class IngestJob(Base):
+    """
+    File d'attente des extractions (texte natif / OCR) d'actes.
+    - insérée par les endpoints d'upload (status = "pending")
+    - consommée par les workers (app/worker.py) avec
+      SELECT ... FOR UPDATE SKIP LOCKED
+    - page_timings : [{"page": 1, "seconds": 2.4}, ...]
+    """
+    __tablename__ = "ingest_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    acte_id = Column(Integer, nullable=True, index=True)
+    pdf_path = Column(String(512), nullable=False)
+    # SHA-256 du PDF calculé à la réception (clé du cache d'extraction)
+    pdf_sha256 = Column(String(64), nullable=True)
+
+    # pending / running / done / failed
+    # + cancel_requested (annulation demandée pendant l'OCR) / cancelled
+    status = Column(String(20), nullable=False, default="pending", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    worker = Column(String(255), nullable=True)
+    # file de priorité : "interactive" (un agent attend) / "bulk" (lots)
+    lane = Column(String(20), nullable=False, default="interactive", index=True)
+    # "extract" : nouveau PDF
+    # "reextract" : ré-extraction (backfill.py) : texte remplacé, type /
+    #   service seulement complétés s'ils sont vides
+    # "reextract_metadata" : idem, type / service détectés remplacent l'existant
+    kind = Column(String(20), nullable=False, default="extract", index=True)
+    # version visée par une ré-extraction, avec le budget d'extraction
+    # (un seul job par acte, par version et par budget, voir backfill._targets)
+    extraction_version = Column(String(40), nullable=True)
+
+    pages_total = Column(Integer, nullable=True)
+    pages_done = Column(Integer, nullable=False, default=0)
+    page_timings = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    # texte partiel : budget atteint ou annulation (copié sur l'acte)
+    note = Column(Text, nullable=True)
+
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class ExtractionCache(Base):
+    """
+    Cache des textes extraits (texte natif + OCR), partagé entre
+    /admin/analyse-pdf et la création d'actes (workers).
+    - key : SHA-256 du PDF + réglages d'extraction (voir extraction_cache.py),
+      ou empreinte de contenu d'une page (texte OCR d'une seule page)
+    - last_used_at : pour l'éviction LRU quand le cache dépasse
+      EXTRACTION_CACHE_MAX_MB
+    """
+    __tablename__ = "extraction_cache"
+
+    key = Column(String(64), primary_key=True)
+    text = Column(Text, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    last_used_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+        index=True,
+    )
+
+
+class StagedUpload(Base):
+    """
+    PDF déjà reçu et analysé par /admin/analyse-pdf, en attente de la
+    création de l'acte (voir staging.py) : la création envoie le jeton au
+    lieu de renvoyer le fichier.
+    - path : fichier dans UPLOAD_DIR/.staging, déplacé dans UPLOAD_DIR à la création
+    - fulltext : texte intégral si l'analyse a lu tout le document, page
+      par page (pdf_utils.pack_pages) ; l'acte est alors créé sans job
+      d'extraction
+    - expires_at : au-delà, le fichier et la ligne sont supprimés
+    """
+    __tablename__ = "staged_uploads"
+
+    token = Column(String(64), primary_key=True)
+    user_id = Column(Integer, nullable=True, index=True)
+    path = Column(String(512), nullable=False)
+    filename = Column(String(255), nullable=True)
+    size_bytes = Column(Integer, nullable=False)
+    pdf_sha256 = Column(String(64), nullable=False)
+    fulltext = Column(Text, nullable=True)
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class UploadSession(Base):
+    """
+    Envoi d'un PDF en plusieurs morceaux, reprenable (voir /admin/uploads, routers_admin.py).
+    - path : fichier partiel, écrit directement dans UPLOAD_DIR/.uploads
+    - received : octets déjà reçus = offset attendu pour le prochain morceau
+    - sha256 : empreinte annoncée à la création (vérifiée à la finalisation)
+    - expires_at : repoussé à chaque morceau ; session abandonnée -> supprimée
+    """
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(64), primary_key=True)
+    user_id = Column(Integer, nullable=True, index=True)
+    filename = Column(String(255), nullable=True)
+    path = Column(String(512), nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    received = Column(Integer, nullable=False, default=0)
+    sha256 = Column(String(64), nullable=True)
     created_at = Column(
         DateTime(timezone=True),
         server_default=func.now(),
         nullable=False,
     )
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -1,5 +1,7 @@
 # api/app/models_refs.py
-from sqlalchemy.orm import Mapped, mapped_column
+from typing import List, Tuple
+
+from sqlalchemy.orm import Mapped, mapped_column, Session
 from sqlalchemy import String, Integer
 from .database import Base
 
@@ -12,3 +14,10 @@ class Service(Base):
     __tablename__ = "service"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     name: Mapped[str] = mapped_column(String(160), unique=True, index=True, nullable=False)
+
+
+def load_known_refs(db: Session) -> Tuple[List[str], List[str]]:
+    """Listes officielles (known_types, known_services) pour la détection."""
+    known_types = [name for (name,) in db.query(ActType.name).order_by(ActType.id)]
+    known_services = [name for (name,) in db.query(Service.name).order_by(Service.id)]
+    return known_types, known_services
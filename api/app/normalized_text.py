@@ -0,0 +1,203 @@
+# app/normalized_text.py
+from typing import Optional, List, Tuple, Union
+from bisect import bisect_right
+import re
+import unicodedata
+
+
+# ==================================================
+# Texte normalisé, construit une fois par document
+# ==================================================
+#
+# Les détecteurs (date, service, type) travaillaient chacun sur le texte
+# brut : découpage en lignes, minuscules et suppression des accents
+# refaits à chaque fois (et, pour la date, ligne par ligne avec une
+# boucle Python par caractère). NormalizedText fait ce travail UNE fois :
+# - lignes non vides (strip) + leur position dans le texte d'origine
+# - les mêmes lignes en minuscules sans accents (fold)
+# - zones utiles (haut / bas du document) et texte normalisé complet
+# - candidats "date" de chaque ligne, trouvés en un seul parcours regex
+# Tout est linéaire en taille du texte.
+
+# marques diacritiques combinantes (après décomposition NFD)
+_COMBINING_RE = re.compile("[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]")
+
+
+def fold(s: str) -> str:
+    """
+    Minuscules + sans accents (Arrêté -> arrete), pour matcher même si
+    l'OCR casse les accents. Une passe C (regex) au lieu d'une boucle
+    Python par caractère.
+    """
+    return _COMBINING_RE.sub("", unicodedata.normalize("NFD", s.lower()))
+
+
+# --------------------------------------------------
+# Dates
+# --------------------------------------------------
+
+# 22/10/2025 ou 22-10-25
+_NUMERIC_DATE_RE = re.compile(r"\b(\d{1,2})[/-](\d{1,2})[/-](\d{2,4})\b")
+# "22 octobre 2025" (tolère accents ou pas)
+_TEXTUAL_DATE_RE = re.compile(
+    r"\b(\d{1,2})\s+([A-Za-zéûôîàùç\.]+)\s+(\d{4})\b", re.IGNORECASE
+)
+# même format, sans jamais déborder sur la ligne suivante
+# (pour un parcours unique du texte complet, ligne par ligne)
+_TEXTUAL_DATE_LINE_RE = re.compile(
+    r"\b(\d{1,2})[^\S\n]+([A-Za-zéûôîàùç\.]+)[^\S\n]+(\d{4})\b", re.IGNORECASE
+)
+
+_MOIS = {
+    "janvier": "01", "fevrier": "02", "mars": "03", "avril": "04",
+    "mai": "05", "juin": "06", "juillet": "07", "aout": "08",
+    "septembre": "09", "octobre": "10", "novembre": "11", "decembre": "12",
+}
+
+
+def normalize_numeric_date(d: str, mo: str, y: str) -> Optional[str]:
+    """
+    Normalise 22/10/25 ou 22-10-2025 -> '2025-10-22'
+    """
+    d = d.strip()
+    mo = mo.strip()
+    y = y.strip()
+
+    # année à 2 chiffres -> "20xx"
+    if len(y) == 2:
+        y = "20" + y
+
+    if len(y) != 4:
+        return None
+
+    return f"{y}-{mo.zfill(2)}-{d.zfill(2)}"
+
+
+def normalize_textual_date(d: str, month_txt: str, y: str) -> Optional[str]:
+    """
+    Normalise "22 octobre 2025" -> '2025-10-22'
+    """
+    y = y.strip()
+    if len(y) != 4:
+        return None
+
+    mo = _MOIS.get(fold(month_txt.strip().strip(".")))
+    if not mo:
+        return None
+
+    return f"{y}-{mo}-{d.strip().zfill(2)}"
+
+
+def extract_date(text: str) -> Optional[str]:
+    """
+    Première date du texte : format numérique d'abord, puis textuel.
+    Retourne 'YYYY-MM-DD' si possible, sinon None.
+    """
+    m = _NUMERIC_DATE_RE.search(text)
+    if m:
+        norm = normalize_numeric_date(*m.groups())
+        if norm:
+            return norm
+
+    m2 = _TEXTUAL_DATE_RE.search(text)
+    if m2:
+        norm = normalize_textual_date(*m2.groups())
+        if norm:
+            return norm
+
+    return None
+
+
+# --------------------------------------------------
+# Représentation normalisée
+# --------------------------------------------------
+
+class NormalizedText:
+    """
+    Vue normalisée d'un texte extrait, partagée par tous les détecteurs.
+    - lines[i] : i-ème ligne non vide (strip), folded[i] la même normalisée
+    - offsets[i] : position de lines[i] dans le texte d'origine
+    - raw_index[i] : numéro de la ligne d'origine (lignes vides comprises)
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lines: List[str] = []
+        self.offsets: List[int] = []
+        self.raw_index: List[int] = []
+
+        pos = 0
+        raw_lines = text.splitlines(keepends=True)
+        self.raw_line_count = len(raw_lines)
+        for i, raw in enumerate(raw_lines):
+            line = raw.strip()
+            if line:
+                self.lines.append(line)
+                self.offsets.append(pos + len(raw) - len(raw.lstrip()))
+                self.raw_index.append(i)
+            pos += len(raw)
+
+        # "\n".join(lines) : texte compact (sans lignes vides)
+        self.joined = "\n".join(self.lines)
+        # fold ne crée ni ne supprime de "\n" : une ligne normalisée par ligne
+        self.folded_joined = fold(self.joined)
+        self.folded: List[str] = self.folded_joined.split("\n") if self.lines else []
+
+        self._date_candidates: Optional[List[Tuple[int, str]]] = None
+
+    def folded_zone(self, start: int, end: int) -> str:
+        """Lignes non vides start..end-1, normalisées et jointes par "\\n"."""
+        return "\n".join(self.folded[start:end])
+
+    def folded_raw_zone(self, first: Optional[int] = None, last: Optional[int] = None) -> str:
+        """
+        Lignes normalisées dont le numéro de ligne d'origine (lignes vides
+        comprises) est dans les `first` premières ou les `last` dernières.
+        """
+        if first is not None:
+            end = bisect_right(self.raw_index, first - 1)
+            return self.folded_zone(0, end)
+        start = bisect_right(self.raw_index, self.raw_line_count - last - 1)
+        return self.folded_zone(start, len(self.folded))
+
+    @property
+    def date_candidates(self) -> List[Tuple[int, str]]:
+        """
+        [(index de ligne, date 'YYYY-MM-DD')] : pour chaque ligne, la date
+        qu'en tire extract_date(ligne), calculée avec UN parcours de chaque
+        regex sur le texte complet au lieu de deux recherches par ligne.
+        """
+        if self._date_candidates is None:
+            starts = [0]
+            for line in self.lines[:-1]:
+                starts.append(starts[-1] + len(line) + 1)
+
+            def first_match_per_line(regex: re.Pattern):
+                found = {}
+                for m in regex.finditer(self.joined):
+                    idx = bisect_right(starts, m.start()) - 1
+                    if idx not in found:
+                        found[idx] = m.groups()
+                return found
+
+            numeric = first_match_per_line(_NUMERIC_DATE_RE)
+            textual = first_match_per_line(_TEXTUAL_DATE_LINE_RE)
+
+            candidates = []
+            for idx in sorted(set(numeric) | set(textual)):
+                norm = None
+                if idx in numeric:
+                    norm = normalize_numeric_date(*numeric[idx])
+                if not norm and idx in textual:
+                    norm = normalize_textual_date(*textual[idx])
+                if norm:
+                    candidates.append((idx, norm))
+            self._date_candidates = candidates
+        return self._date_candidates
+
+
+TextLike = Union[str, NormalizedText]
+
+
+def as_normalized(text: TextLike) -> NormalizedText:
+    return text if isinstance(text, NormalizedText) else NormalizedText(text)
@@ -0,0 +1,119 @@
+# app/ocr_backends.py
+from typing import List, Optional, Tuple
+from functools import lru_cache
+
+import pytesseract
+from PIL import Image
+
+from .config import settings
+
+try:
+    # binding C++ de Tesseract : le modèle de langue est chargé une seule
+    # fois par processus, au lieu d'un fork de `tesseract` par page
+    import tesserocr
+except ImportError:  # dépend de l'image Docker (libtesseract)
+    tesserocr = None
+
+
+# ==================================================
+# Backends OCR (un par processus du pool)
+# ==================================================
+#
+# OCR_BACKEND = "tesserocr"   : API Tesseract gardée en mémoire (par défaut)
+#             = "pytesseract" : un process `tesseract` par page (ancien
+#                               fonctionnement, toujours disponible)
+# Si tesserocr n'est pas installé ou ne s'initialise pas, on retombe
+# automatiquement sur pytesseract. name et lang (None : langue OCR_LANG
+# absente) décrivent le backend réellement utilisé : ils entrent dans la
+# clé du cache d'extraction (voir ocr_backend_identity).
+
+_backend = None
+
+
+@lru_cache(maxsize=1)
+def _installed_languages() -> Optional[List[str]]:
+    """Langues Tesseract installées (None : impossible de les lister)."""
+    try:
+        if tesserocr is not None:
+            return tesserocr.get_languages()[1]   # lecture de tessdata seulement
+        return pytesseract.get_languages(config="")
+    except Exception:
+        return None
+
+
+def _resolve_lang() -> Optional[str]:
+    """
+    Vérifie UNE fois que la langue OCR_LANG est installée : avant, un
+    échec avec lang="fra" faisait OCRiser la page une deuxième fois.
+    """
+    available = _installed_languages()
+    if available is None:
+        return settings.OCR_LANG
+    wanted = settings.OCR_LANG.split("+")  # ex : "fra+eng"
+    return settings.OCR_LANG if all(l in available for l in wanted) else None
+
+
+class PytesseractBackend:
+    name = "pytesseract"
+
+    def __init__(self):
+        self.config = f"--psm {settings.OCR_PSM}"
+        self.lang = _resolve_lang()
+
+    def image_to_string(self, img: Image.Image) -> str:
+        if self.lang:
+            return pytesseract.image_to_string(img, lang=self.lang, config=self.config)
+        return pytesseract.image_to_string(img, config=self.config)
+
+
+class TesserocrBackend:
+    name = "tesserocr"
+
+    def __init__(self):
+        self.lang: Optional[str] = settings.OCR_LANG
+        try:
+            self.api = tesserocr.PyTessBaseAPI(
+                lang=settings.OCR_LANG, psm=settings.OCR_PSM
+            )
+        except RuntimeError:
+            # langue absente : Tesseract sans langue forcée
+            self.lang = None
+            self.api = tesserocr.PyTessBaseAPI(psm=settings.OCR_PSM)
+
+    def image_to_string(self, img: Image.Image) -> str:
+        self.api.SetImage(img)
+        return self.api.GetUTF8Text()
+
+
+def get_ocr_backend():
+    """Backend OCR du processus courant (créé au premier appel puis réutilisé)."""
+    global _backend
+    if _backend is None:
+        if settings.OCR_BACKEND == "tesserocr" and tesserocr is not None:
+            try:
+                _backend = TesserocrBackend()
+            except Exception as e:
+                print(f"[ocr][WARN] tesserocr indisponible, fallback pytesseract : {e}")
+                _backend = PytesseractBackend()
+        else:
+            _backend = PytesseractBackend()
+    return _backend
+
+
+def ocr_backend_identity() -> Tuple[str, Optional[str]]:
+    """
+    (nom, langue) du backend OCR de ce processus, sans le créer : l'API et
+    backfill calculent des clés de cache sans charger de modèle de langue.
+    Backend déjà créé : le sien ; sinon celui que get_ocr_backend choisirait
+    (tesserocr s'il est demandé et installé, langue si elle est installée).
+    """
+    if _backend is not None:
+        return _backend.name, _backend.lang
+    if settings.OCR_BACKEND == "tesserocr" and tesserocr is not None:
+        return TesserocrBackend.name, _resolve_lang()
+    return PytesseractBackend.name, _resolve_lang()
+
+
+def fallback_image_to_string(img: Image.Image) -> str:
+    """OCR via pytesseract, sans langue forcée (dernier recours)."""
+    return pytesseract.image_to_string(img, config=f"--psm {settings.OCR_PSM}")
@@ -0,0 +1,355 @@
+# app/ocr_engine.py
+from typing import Optional, List, Dict, Tuple, Callable, Iterator, Union
+import os
+import math
+import time
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz  # PyMuPDF
+from pdf2image import convert_from_path, pdfinfo_from_bytes, pdfinfo_from_path
+from PIL import Image
+
+from .config import settings
+from .ocr_preprocess import preprocess_for_ocr
+from .ocr_backends import get_ocr_backend, fallback_image_to_string
+
+
+# ==================================================
+# Moteur OCR : pages envoyées à un pool de processus
+# ==================================================
+#
+# Mémoire : les pages sont rendues une par une, dans le processus du pool
+# qui les OCRise, jamais la liste complète des images du document.
+# Une page A4 à 300 dpi en niveaux de gris fait 2480 x 3508 px ≈ 8,7 Mo
+# (+ ≈ 1,1 Mo pour l'image binarisée). Le pic mémoire de l'OCR est donc
+# borné par OCR_WORKERS x (≈ 25 Mo de rendu + process tesseract), quel
+# que soit le nombre de pages ; le process appelant ne garde que les textes.
+# (mesuré : pic de rendu ≈ 25 Mo par process, identique pour 10, 50 ou
+# 100 pages A4, contre ≈ 35 Mo par page avec convert_from_bytes)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _ocr_image(img: Image.Image) -> str:
+    """
+    OCR d'une image de page :
+    - pré-traitement (voir ocr_preprocess) ; page blanche -> "" sans OCR
+    - backend OCR du processus (voir ocr_backends), langue et psm
+      résolus une fois pour toutes
+    - fallback pytesseract sans langue forcée / sans pré-traitement
+      si ça plante
+    """
+    backend = get_ocr_backend()
+    try:
+        prep = preprocess_for_ocr(img)
+        if prep is None:
+            return ""
+        try:
+            return backend.image_to_string(prep)
+        except Exception:
+            return fallback_image_to_string(prep)
+    except Exception:
+        # si preprocessing plante, on tente brut
+        return fallback_image_to_string(img)
+
+
+def _capped_dpi(rect: "fitz.Rect", dpi: int) -> int:
+    """
+    DPI réduit pour que le rendu de la page ne dépasse pas
+    OCR_MAX_PIXELS_PER_PAGE (plans A0, pages géantes de PDF malformés…).
+    """
+    max_pixels = settings.OCR_MAX_PIXELS_PER_PAGE
+    pixels = (rect.width * dpi / 72) * (rect.height * dpi / 72)
+    if not max_pixels or pixels <= max_pixels:
+        return dpi
+    return max(1, int(dpi * math.sqrt(max_pixels / pixels)))
+
+
+def _render_page(pdf_path: str, page_no: int, dpi: int) -> Image.Image:
+    """
+    Rendu d'UNE page (numérotée à partir de 1) en niveaux de gris via
+    PyMuPDF : pas de fichier PPM intermédiaire, et 3x moins de mémoire
+    qu'une image RGB. Fallback pdf2image (poppler) si PyMuPDF ne sait
+    pas ouvrir le fichier.
+    """
+    try:
+        doc = fitz.open(pdf_path)
+    except Exception:
+        images = convert_from_path(
+            pdf_path, dpi=dpi, first_page=page_no, last_page=page_no,
+            grayscale=True,
+        )
+        return images[0]
+
+    try:
+        page = doc[page_no - 1]
+        pix = page.get_pixmap(
+            dpi=_capped_dpi(page.rect, dpi), colorspace=fitz.csGRAY, alpha=False
+        )
+        return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    finally:
+        doc.close()
+        # MuPDF garde en cache les images décodées (jusqu'à 256 Mo) :
+        # on vide ce cache pour que la mémoire reste celle d'une page
+        fitz.TOOLS.store_shrink(100)
+
+
+def _ocr_page_task(pdf_path: str, page_no: int, dpi: int) -> Tuple[str, float]:
+    """
+    Tâche exécutée dans un processus du pool :
+    rend UNE page puis l'OCRise, et libère l'image aussitôt.
+    Chaque processus lit le PDF depuis le disque, on évite ainsi
+    de faire transiter les images entre processus.
+    Renvoie (texte, durée en secondes).
+    """
+    t0 = time.monotonic()
+    img = _render_page(pdf_path, page_no, dpi)
+    try:
+        text = _ocr_image(img)
+    finally:
+        img.close()
+    return text, time.monotonic() - t0
+
+
+def _init_pool_process():
+    """
+    Initialisation de chaque processus du pool : on charge le backend OCR
+    (et donc le modèle de langue) dès le démarrage, une seule fois.
+    """
+    try:
+        get_ocr_backend()
+    except Exception as e:
+        print(f"[ocr][WARN] initialisation du backend OCR : {e}")
+
+
+def get_ocr_pool() -> ProcessPoolExecutor:
+    """
+    Pool de processus partagé (créé à la première utilisation).
+    OCR_WORKERS = 0 -> un processus par cœur.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = settings.OCR_WORKERS or os.cpu_count() or 1
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                # spawn : pas de fork d'un process uvicorn multi-threadé
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_pool_process,
+            )
+        return _pool
+
+
+def shutdown_ocr_pool() -> None:
+    """Arrête le pool (appelé à l'arrêt de l'API)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _reset_broken_pool(broken: ProcessPoolExecutor) -> None:
+    """
+    Si un processus du pool meurt (OOM killer…), le pool devient
+    inutilisable : on l'oublie pour qu'il soit recréé au prochain appel.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+
+
+# rappel de progression : (numéro de page, nb de pages à traiter, secondes)
+PageCallback = Callable[[int, int, float], None]
+
+# demande d'arrêt (annulation par un admin) : renvoie True pour arrêter
+StopCheck = Callable[[], bool]
+
+# fréquence (s) à laquelle on vérifie la demande d'annulation pendant l'attente
+STOP_POLL_SECONDS = 1.0
+
+
+class OcrInterrupted(Exception):
+    """
+    OCR arrêté avant la fin (temps maximal dépassé, annulation).
+    done : textes des pages déjà terminées {numéro de page: texte}.
+    """
+
+    def __init__(self, reason: str, done: Optional[Dict[int, str]] = None):
+        super().__init__(reason)
+        self.reason = reason
+        self.done: Dict[int, str] = done or {}
+
+
+def iter_ocr_pages(
+    pdf_path: str,
+    page_numbers: List[int],
+    dpi: Optional[int] = None,
+    on_page: Optional[PageCallback] = None,
+    deadline: Optional[float] = None,
+    should_stop: Optional[StopCheck] = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Générateur : OCR des pages demandées d'un PDF sur disque, en parallèle.
+    - au plus OCR_MAX_INFLIGHT_PAGES pages soumises en même temps
+      (borne la mémoire et la file du pool)
+    - produit (numéro de page, texte) dans l'ordre de page_numbers,
+      dès que la page et toutes celles qui la précèdent sont prêtes
+    - on_page est appelé à chaque page terminée (ordre d'arrivée)
+    - deadline (time.monotonic()) dépassée ou should_stop() vrai :
+      les pages pas encore commencées sont abandonnées et OcrInterrupted
+      est levée avec les pages terminées mais pas encore produites
+      (une page déjà en cours de rendu finit dans son processus)
+    - la première erreur d'une page est propagée à l'appelant
+    """
+    dpi = dpi or settings.OCR_DPI
+    max_inflight = max(1, settings.OCR_MAX_INFLIGHT_PAGES)
+    pool = get_ocr_pool()
+
+    ready: Dict[int, str] = {}   # pages terminées en avance, en attente de leur tour
+    pending: Dict[Future, int] = {}
+    todo = iter(enumerate(page_numbers))
+    next_idx = 0
+
+    try:
+        while True:
+            # on remplit la fenêtre de pages en vol
+            while len(pending) < max_inflight:
+                nxt = next(todo, None)
+                if nxt is None:
+                    break
+                idx, page_no = nxt
+                fut = pool.submit(_ocr_page_task, pdf_path, page_no, dpi)
+                pending[fut] = idx
+
+            if not pending:
+                break
+
+            if should_stop is not None and should_stop():
+                raise OcrInterrupted(
+                    "extraction annulée",
+                    {page_numbers[i]: t for i, t in ready.items()},
+                )
+
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    raise OcrInterrupted(
+                        f"temps maximal dépassé ({settings.EXTRACTION_MAX_SECONDS} s)",
+                        {page_numbers[i]: t for i, t in ready.items()},
+                    )
+            if should_stop is not None:
+                timeout = min(timeout, STOP_POLL_SECONDS) if timeout else STOP_POLL_SECONDS
+
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for fut in done:
+                idx = pending.pop(fut)
+                text, seconds = fut.result()
+                ready[idx] = text
+                if on_page is not None:
+                    on_page(page_numbers[idx], len(page_numbers), seconds)
+
+            while next_idx in ready:
+                yield page_numbers[next_idx], ready.pop(next_idx)
+                next_idx += 1
+    except BrokenProcessPool:
+        _reset_broken_pool(pool)
+        raise
+    finally:
+        for fut in pending:
+            fut.cancel()
+
+
+def ocr_pdf_pages(
+    pdf_path: str,
+    page_numbers: List[int],
+    dpi: Optional[int] = None,
+    on_page: Optional[PageCallback] = None,
+    deadline: Optional[float] = None,
+    should_stop: Optional[StopCheck] = None,
+) -> List[str]:
+    """
+    OCR des pages demandées d'un PDF sur disque (voir iter_ocr_pages).
+    Renvoie les textes dans l'ordre de page_numbers.
+    En cas d'arrêt, OcrInterrupted.done contient toutes les pages terminées.
+    """
+    done: Dict[int, str] = {}
+    try:
+        for page_no, text in iter_ocr_pages(
+            pdf_path, page_numbers, dpi=dpi, on_page=on_page,
+            deadline=deadline, should_stop=should_stop,
+        ):
+            done[page_no] = text
+    except OcrInterrupted as e:
+        e.done.update(done)
+        raise
+    return [done[p] for p in page_numbers]
+
+
+def poppler_page_count(data: Union[bytes, str]) -> int:
+    """
+    Nombre de pages lu par poppler (PDF que PyMuPDF ne sait pas ouvrir).
+    data : contenu du PDF ou chemin du fichier.
+    """
+    if isinstance(data, str):
+        return int(pdfinfo_from_path(data)["Pages"])
+    return int(pdfinfo_from_bytes(data)["Pages"])
+
+
+def ocr_pdf_file(
+    pdf_path: str,
+    dpi: Optional[int] = None,
+    on_page: Optional[PageCallback] = None,
+    page_numbers: Optional[List[int]] = None,
+    deadline: Optional[float] = None,
+    should_stop: Optional[StopCheck] = None,
+) -> List[str]:
+    """
+    OCR des pages d'un PDF sur disque (toutes par défaut, sinon
+    seulement page_numbers, numérotées à partir de 1).
+    Renvoie la liste des textes, une entrée par page demandée.
+    """
+    if page_numbers is None:
+        page_count = int(pdfinfo_from_path(pdf_path)["Pages"])
+        if settings.EXTRACTION_MAX_PAGES:
+            page_count = min(page_count, settings.EXTRACTION_MAX_PAGES)
+        page_numbers = list(range(1, page_count + 1))
+    return ocr_pdf_pages(
+        pdf_path, page_numbers, dpi=dpi, on_page=on_page,
+        deadline=deadline, should_stop=should_stop,
+    )
+
+
+def ocr_pdf_bytes(
+    data: bytes,
+    dpi: Optional[int] = None,
+    on_page: Optional[PageCallback] = None,
+    page_numbers: Optional[List[int]] = None,
+    deadline: Optional[float] = None,
+    should_stop: Optional[StopCheck] = None,
+) -> List[str]:
+    """
+    Comme ocr_pdf_file, pour un PDF reçu en mémoire : il est écrit une
+    fois dans un fichier temporaire, que les processus du pool relisent
+    page par page.
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(data)
+        return ocr_pdf_file(
+            tmp_path, dpi=dpi, on_page=on_page, page_numbers=page_numbers,
+            deadline=deadline, should_stop=should_stop,
+        )
+    finally:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
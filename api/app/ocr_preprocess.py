@@ -0,0 +1,168 @@
+# app/ocr_preprocess.py
+from typing import List, Optional
+from functools import lru_cache
+
+from PIL import Image
+
+from .config import settings
+
+
+# ==================================================
+# Pré-traitement des pages avant Tesseract
+# ==================================================
+#
+# Tout passe par des opérations Pillow en C (histogram, point avec une
+# table précalculée, resize, rotate) : aucune boucle Python par pixel.
+
+# niveau de gris en dessous duquel un pixel compte toujours comme "encre"
+INK_LEVEL = 128
+
+# un pixel plus sombre que le papier (niveau le plus fréquent de la page)
+# d'au moins INK_CONTRAST compte aussi : un texte pâle (photocopie claire,
+# gris ~150 sur blanc) n'est pas une page blanche, le grain du papier si
+INK_CONTRAST = 64
+
+# seuil utilisé si l'histogramme ne permet pas de calculer un seuil d'Otsu
+DEFAULT_THRESHOLD = 160
+
+# largeur de la miniature utilisée pour estimer l'inclinaison
+DESKEW_THUMB_WIDTH = 600
+
+# l'histogramme est calculé sur 1 pixel sur N (dans chaque direction) :
+# 16x moins de pixels, et l'échantillonnage "nearest" garde les valeurs
+# réelles (un trait fin reste noir, contrairement à une moyenne)
+HIST_SAMPLING = 4
+
+
+@lru_cache(maxsize=256)
+def _threshold_table(threshold: int) -> List[int]:
+    """Table de correspondance 256 entrées : < seuil -> noir, sinon blanc."""
+    return [0 if x < threshold else 255 for x in range(256)]
+
+
+def otsu_threshold(hist: List[int]) -> int:
+    """
+    Seuil d'Otsu sur un histogramme 256 niveaux : le seuil qui sépare
+    le mieux l'encre du papier (variance inter-classes maximale).
+    S'adapte aux scans trop clairs ou trop sombres, contrairement à un
+    seuil fixe.
+    """
+    total = sum(hist)
+    if total == 0:
+        return DEFAULT_THRESHOLD
+    sum_all = sum(i * h for i, h in enumerate(hist))
+
+    weight_bg = 0
+    sum_bg = 0
+    best_t = DEFAULT_THRESHOLD
+    best_var = 0.0
+    for t in range(256):
+        weight_bg += hist[t]
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += t * hist[t]
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        var = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if var > best_var:
+            best_var = var
+            best_t = t + 1  # pixels <= t -> noir
+
+    return best_t
+
+
+def is_blank_page(hist: List[int]) -> bool:
+    """
+    Page blanche (intercalaire, verso vide) : quasiment aucun pixel
+    d'encre. Vérification sur l'histogramme, sans OCR.
+    """
+    total = sum(hist)
+    if total == 0:
+        return True
+    paper = max(range(256), key=hist.__getitem__)
+    ink = sum(hist[:max(INK_LEVEL, paper - INK_CONTRAST)])
+    return ink / total < settings.OCR_BLANK_INK_RATIO
+
+
+def _sampled_histogram(gray: Image.Image) -> List[int]:
+    size = (
+        max(1, gray.width // HIST_SAMPLING),
+        max(1, gray.height // HIST_SAMPLING),
+    )
+    return gray.resize(size, Image.NEAREST).histogram()
+
+
+def _downscale(gray: Image.Image) -> Image.Image:
+    """Réduit l'image si son plus grand côté dépasse OCR_MAX_SIDE_PX (0 = jamais)."""
+    max_side = settings.OCR_MAX_SIDE_PX
+    if not max_side or max(gray.size) <= max_side:
+        return gray
+    ratio = max_side / max(gray.size)
+    size = (max(1, int(gray.width * ratio)), max(1, int(gray.height * ratio)))
+    return gray.resize(size, Image.LANCZOS)
+
+
+def _row_profile_score(img: Image.Image) -> float:
+    """
+    Variance du profil horizontal (moyenne de chaque ligne de pixels) :
+    maximale quand les lignes de texte sont bien horizontales.
+    """
+    rows = list(img.resize((1, img.height), Image.BOX).getdata())
+    mean = sum(rows) / len(rows)
+    return sum((r - mean) ** 2 for r in rows)
+
+
+def estimate_skew(gray: Image.Image, threshold: int) -> float:
+    """
+    Angle d'inclinaison (degrés) estimé sur une miniature binarisée :
+    on teste des rotations de -OCR_DESKEW_MAX_ANGLE à +OCR_DESKEW_MAX_ANGLE
+    par pas de 0,5° et on garde celle qui aligne le mieux les lignes.
+    """
+    ratio = DESKEW_THUMB_WIDTH / gray.width
+    thumb = gray.resize(
+        (DESKEW_THUMB_WIDTH, max(1, int(gray.height * ratio))), Image.BOX
+    ).point(_threshold_table(threshold))
+
+    max_angle = settings.OCR_DESKEW_MAX_ANGLE
+    steps = int(max_angle * 2)
+    best_angle = 0.0
+    best_score = _row_profile_score(thumb)
+    for i in range(-steps, steps + 1):
+        angle = i / 2
+        if angle == 0:
+            continue
+        rotated = thumb.rotate(angle, resample=Image.NEAREST, fillcolor=255)
+        score = _row_profile_score(rotated)
+        if score > best_score:
+            best_score = score
+            best_angle = angle
+    return best_angle
+
+
+def preprocess_for_ocr(img: Image.Image) -> Optional[Image.Image]:
+    """
+    Amélioration OCR :
+    - niveaux de gris (+ réduction optionnelle, OCR_MAX_SIDE_PX)
+    - page blanche -> None (inutile d'appeler Tesseract)
+    - redressement optionnel (OCR_DESKEW)
+    - binarisation avec un seuil d'Otsu propre à la page
+    """
+    gray = img if img.mode == "L" else img.convert("L")
+    gray = _downscale(gray)
+    hist = _sampled_histogram(gray)
+    if is_blank_page(hist):
+        return None
+
+    threshold = otsu_threshold(hist)
+
+    if settings.OCR_DESKEW:
+        angle = estimate_skew(gray, threshold)
+        if angle:
+            gray = gray.rotate(
+                angle, resample=Image.BILINEAR, expand=False, fillcolor=255
+            )
+
+    return gray.point(_threshold_table(threshold), "1")
@@ -1,202 +1,420 @@
 # app/pdf_utils.py
-from typing import Optional, List, Tuple
-import io
-import re
-import unicodedata
+from typing import Optional, List, Tuple, Union, Dict, NamedTuple, Protocol
+import hashlib
+import time
+
+import fitz  # PyMuPDF
+
+from .config import settings
+from .metadata_matcher import get_matcher
+from .normalized_text import TextLike, as_normalized, extract_date
+from .ocr_engine import (
+    ocr_pdf_bytes, ocr_pdf_file, poppler_page_count,
+    PageCallback, StopCheck, OcrInterrupted,
+)
+
+# un PDF à traiter : son contenu (bytes) ou le chemin du fichier sur disque
+# (préférable : rien n'est gardé en mémoire, le pool OCR relit le fichier)
+PdfSource = Union[bytes, str]
+
+# version des heuristiques d'extraction et de détection (ce fichier,
+# normalized_text.py, metadata_matcher.py) : à incrémenter quand une
+# modification change le texte ou les métadonnées produits. Avec les
+# réglages OCR, elle forme la version enregistrée sur chaque acte
+# (extraction_cache.extraction_version) : python -m app.backfill
+# ré-extrait ensuite les actes d'une version plus ancienne.
+# 2 : texte enregistré page par page (acte_pages)
+EXTRACTION_VERSION = 2
 
-from pypdf import PdfReader
-from pdf2image import convert_from_bytes
-import pytesseract
-from PIL import Image
 
+# ==================================================
+# 1. Extraction du texte (PDF natif + OCR fallback)
+# ==================================================
 
-# ------------------------------------------
-# Utils texte
-# ------------------------------------------
+# une page couverte d'images doit avoir N fois plus de texte natif
+# que le minimum pour être considérée comme "déjà lisible"
+IMAGE_PAGE_CHARS_FACTOR = 5
 
-def _strip_accents(s: str) -> str:
+
+def _image_coverage(page: "fitz.Page") -> float:
     """
-    enlève les accents (Arrêté -> Arrete) pour matcher même si l'OCR casse les accents.
+    Part de la surface de la page couverte par des images (0.0 -> 1.0).
+    Une page scannée est en général une seule image pleine page.
     """
-    return "".join(
-        c for c in unicodedata.normalize("NFD", s)
-        if unicodedata.category(c) != "Mn"
-    )
+    page_area = abs(page.rect)
+    if not page_area:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info():
+        bbox = fitz.Rect(info["bbox"]) & page.rect
+        covered += abs(bbox)
+    return min(1.0, covered / page_area)
 
 
-# ==================================================
-# 1. Extraction du texte (PDF natif + OCR fallback)
-# ==================================================
-
-def _preprocess_for_ocr(img: Image.Image) -> Image.Image:
+def _page_needs_ocr(native_text: str, coverage: float) -> bool:
     """
-    Amélioration OCR :
-    - on convertit en niveaux de gris
-    - on applique un seuillage binaire léger
-    - on renvoie une image bien contrastée pour Tesseract
+    Décision page par page :
+    - quasiment pas de texte natif -> OCR
+    - page surtout composée d'image(s) avec peu de texte natif
+      (ex : annexe scannée avec juste un en-tête tapé) -> OCR
     """
-    gray = img.convert("L")  # niveaux de gris
-    # seuillage : <160 -> noir, sinon blanc
-    bw = gray.point(lambda x: 0 if x < 160 else 255, "1")
-    return bw
+    chars = len(native_text.strip())
+    if chars < settings.OCR_MIN_PAGE_CHARS:
+        return True
+    if (
+        coverage >= settings.OCR_IMAGE_COVERAGE
+        and chars < IMAGE_PAGE_CHARS_FACTOR * settings.OCR_MIN_PAGE_CHARS
+    ):
+        return True
+    return False
+
+
+def _open_pdf(data: PdfSource) -> "fitz.Document":
+    if isinstance(data, str):
+        return fitz.open(data, filetype="pdf")
+    return fitz.open(stream=data, filetype="pdf")
+
+
+def _ocr_pages(
+    data: PdfSource,
+    page_numbers: Optional[List[int]],
+    on_page: Optional[PageCallback],
+    deadline: Optional[float] = None,
+    should_stop: Optional[StopCheck] = None,
+) -> List[str]:
+    ocr = ocr_pdf_file if isinstance(data, str) else ocr_pdf_bytes
+    return ocr(
+        data, dpi=settings.OCR_DPI, on_page=on_page, page_numbers=page_numbers,
+        deadline=deadline, should_stop=should_stop,
+    )
+
 
+def pdf_page_count(data: PdfSource) -> int:
+    """Nombre de pages (lecture de la structure seulement, pas de rendu)."""
+    with _open_pdf(data) as doc:
+        return doc.page_count
 
-def extract_text_from_pdf_bytes(data: bytes) -> str:
+
+def extract_native_pages(
+    data: PdfSource,
+    page_numbers: Optional[List[int]] = None,
+) -> List[Tuple[str, bool]]:
     """
-    Extraction du texte "normal" via pypdf (PDF natif, pas scanné).
+    Extraction du texte "normal" via PyMuPDF (PDF natif, pas scanné),
+    page par page (toutes, ou seulement page_numbers, numérotées à partir de 1).
+    Renvoie [(texte natif, besoin d'OCR), ...].
+    Lève une exception si le PDF ne peut pas être ouvert.
     """
-    try:
-        reader = PdfReader(io.BytesIO(data))
-        chunks = []
-        for page in reader.pages:
+    pages: List[Tuple[str, bool]] = []
+    with _open_pdf(data) as doc:
+        if page_numbers is None:
+            page_numbers = list(range(1, doc.page_count + 1))
+        for page_no in page_numbers:
+            page = doc[page_no - 1]
             try:
-                chunks.append(page.extract_text() or "")
+                native = page.get_text() or ""
             except Exception:
-                chunks.append("")
-        txt = "\n".join(chunks).strip()
-        return txt
-    except Exception:
-        return ""
+                native = ""
+            try:
+                coverage = _image_coverage(page)
+            except Exception:
+                coverage = 0.0
+            pages.append((native, _page_needs_ocr(native, coverage)))
+    return pages
 
 
-def extract_text_with_ocr_if_needed(data: bytes, min_len: int = 200) -> str:
+def _page_content_hash(doc: "fitz.Document", page: "fitz.Page") -> str:
     """
-    1. Essaye d'abord l'extraction texte directe (pypdf).
-    2. Si le texte trouvé est trop court (< min_len), on fait l'OCR :
-       - convert_from_bytes(... dpi=300) -> images PIL par page
-       - pré-traitement noir/blanc
-       - pytesseract avec langue fra + psm 6 (lecture en bloc)
+    Empreinte de ce qui s'affiche sur une page, sans la rendre :
+    flux de contenu + images et XObjects utilisés (flux bruts) + géométrie.
+    Deux pages identiques dans deux versions d'un même PDF (page re-signée,
+    annexe ajoutée en fin) ont la même empreinte, même si les octets du
+    fichier ont changé.
     """
-    text = extract_text_from_pdf_bytes(data)
-    if len(text) >= min_len:
-        return text
+    h = hashlib.sha256()
+    h.update(f"{tuple(page.rect)}|{page.rotation}".encode())
+    h.update(page.read_contents())
+    xrefs = sorted(
+        {img[0] for img in page.get_images(full=True)}
+        | {xo[0] for xo in page.get_xobjects()}
+    )
+    for xref in xrefs:
+        h.update(b"|")
+        h.update(doc.xref_stream_raw(xref) or b"")
+    return h.hexdigest()
 
-    ocr_parts: List[str] = []
-    try:
-        # dpi 300 pour améliorer la netteté du scan
-        images: List[Image.Image] = convert_from_bytes(data, dpi=300)
-        for img in images:
-            try:
-                prep = _preprocess_for_ocr(img)
-                try:
-                    ocr_txt = pytesseract.image_to_string(
-                        prep, lang="fra", config="--psm 6"
-                    )
-                except Exception:
-                    # fallback sans langue forcée
-                    ocr_txt = pytesseract.image_to_string(
-                        prep, config="--psm 6"
-                    )
-            except Exception:
-                # si preprocessing plante, on tente brut
-                try:
-                    ocr_txt = pytesseract.image_to_string(
-                        img, lang="fra", config="--psm 6"
-                    )
-                except Exception:
-                    ocr_txt = pytesseract.image_to_string(
-                        img, config="--psm 6"
-                    )
 
-            ocr_parts.append(ocr_txt)
+def page_content_hashes(data: PdfSource, page_numbers: List[int]) -> Dict[int, str]:
+    """Empreinte de contenu des pages demandées {numéro de page: sha256 hex}."""
+    with _open_pdf(data) as doc:
+        return {p: _page_content_hash(doc, doc[p - 1]) for p in page_numbers}
 
-        ocr_full = "\n".join(ocr_parts).strip()
 
-        # si l'OCR est meilleur (= plus long / plus riche) on le prend
-        if len(ocr_full) > len(text):
-            text = ocr_full
+def extract_text_from_pdf_bytes(data: PdfSource) -> str:
+    """
+    Extraction du texte "normal" (PDF natif, pas scanné), sans OCR.
+    """
+    try:
+        return "\n".join(t for t, _ in extract_native_pages(data)).strip()
     except Exception:
-        # si OCR plante, on renvoie au moins le texte de pypdf
-        pass
+        return ""
 
-    return text
 
+class ExtractionResult(NamedTuple):
+    """
+    Résultat d'une extraction :
+    - pages : texte de chaque page traitée
+    - partial : True si le budget (pages / temps) a été atteint ou si
+      l'extraction a été annulée : le texte ne couvre pas tout le document
+    - note : explication lisible (enregistrée sur l'acte)
+    - page_numbers : numéro dans le PDF de chaque page de pages
+      (None : 1, 2, 3...)
+    """
+    pages: List[str]
+    partial: bool = False
+    note: Optional[str] = None
+    page_numbers: Optional[List[int]] = None
 
-# ========================
-# 2. Détection de la date 
-# ========================
+    @property
+    def text(self) -> str:
+        return "\n".join(self.pages).strip()
 
-def _normalize_numeric_date(d: str, mo: str, y: str) -> Optional[str]:
+    def numbered_pages(self) -> List[Tuple[int, str]]:
+        """[(numéro de page dans le PDF, texte), ...]"""
+        numbers = self.page_numbers or range(1, len(self.pages) + 1)
+        return list(zip(numbers, self.pages))
+
+
+class ExtractionFailed(Exception):
     """
-    Normalise 22/10/25 ou 22-10-2025 -> '2025-10-22'
+    Extraction en échec (OCR en erreur) : le texte obtenu n'est pas celui
+    du document. Il n'est ni mis en cache ni enregistré sur l'acte, et le
+    job qui l'a demandé est retenté (worker._fail_job).
+    - result : ce qui a pu être lu (texte natif), marqué partiel
+    - failed_pages : numéros des pages dont l'OCR a échoué
     """
-    d = d.strip()
-    mo = mo.strip()
-    y = y.strip()
 
-    # année à 2 chiffres -> "20xx"
-    if len(y) == 2:
-        y = "20" + y
+    def __init__(self, result: ExtractionResult, failed_pages: List[int]):
+        super().__init__(result.note)
+        self.result = result
+        self.failed_pages = failed_pages
+
+
+# texte de plusieurs pages en une seule chaîne (cache d'extraction, dépôts
+# en attente) : pages séparées par un saut de page (ceux que Tesseract
+# met en fin de page deviennent des retours à la ligne)
+PAGE_BREAK = "\f"
 
-    if len(y) != 4:
-        return None
 
-    d = d.zfill(2)
-    mo = mo.zfill(2)
-    return f"{y}-{mo}-{d}"
+def pack_pages(pages: List[str]) -> str:
+    return PAGE_BREAK.join(p.replace(PAGE_BREAK, "\n") for p in pages)
 
 
-def _normalize_textual_date(d: str, month_txt: str, y: str) -> Optional[str]:
+def unpack_pages(packed: str) -> List[str]:
+    return packed.split(PAGE_BREAK)
+
+
+class PageTextCache(Protocol):
     """
-    Normalise "22 octobre 2025" -> '2025-10-22'
+    Cache du texte OCR par page, indexé par l'empreinte de contenu de la
+    page (voir extraction_cache.PageOcrCache) : quand un PDF est remplacé,
+    seules les pages modifiées sont ré-OCRisées.
     """
-    mois_map = {
-        "janvier": "01", "fevrier": "02", "février": "02",
-        "mars": "03", "avril": "04", "mai": "05", "juin": "06",
-        "juillet": "07", "aout": "08", "août": "08",
-        "septembre": "09", "octobre": "10",
-        "novembre": "11", "decembre": "12", "décembre": "12",
-    }
 
-    d = d.strip().zfill(2)
-    y = y.strip()
+    def get_many(self, page_hashes: List[str]) -> Dict[str, str]: ...
 
-    if len(y) != 4:
-        return None
+    def put_many(self, texts: Dict[str, str]) -> None: ...
 
-    key = (
-        month_txt.lower()
-        .strip()
-        .strip(".")
-    )
-    key = _strip_accents(key)
-    mo = mois_map.get(key)
-    if not mo:
-        return None
 
-    return f"{y}-{mo}-{d}"
+def _deadline() -> Optional[float]:
+    if not settings.EXTRACTION_MAX_SECONDS:
+        return None
+    return time.monotonic() + settings.EXTRACTION_MAX_SECONDS
+
+
+def _first_pages(page_count: int, notes: List[str]) -> List[int]:
+    """Pages à extraire : les EXTRACTION_MAX_PAGES premières (note si tronqué)."""
+    max_pages = settings.EXTRACTION_MAX_PAGES
+    if max_pages and page_count > max_pages:
+        notes.append(
+            f"{page_count} pages : seules les {max_pages} premières ont été extraites"
+        )
+        page_count = max_pages
+    return list(range(1, page_count + 1))
+
+
+def _ocr_only(
+    data: PdfSource,
+    page_numbers: Optional[List[int]],
+    notes: List[str],
+    on_page: Optional[PageCallback],
+    deadline: Optional[float],
+    should_stop: Optional[StopCheck],
+) -> ExtractionResult:
+    """PDF illisible par PyMuPDF : toutes les pages passent par l'OCR (poppler)."""
+    try:
+        if page_numbers is None:
+            page_numbers = _first_pages(poppler_page_count(data), notes)
+        texts = _ocr_pages(data, page_numbers, on_page, deadline, should_stop)
+    except OcrInterrupted as e:
+        numbers = sorted(e.done)
+        notes.append(e.reason)
+        return ExtractionResult([e.done[p] for p in numbers], True, " ; ".join(notes), numbers)
+    except Exception as e:
+        notes.append(f"OCR en erreur : {e}")
+        raise ExtractionFailed(
+            ExtractionResult([], True, " ; ".join(notes), []), page_numbers or []
+        ) from e
+
+    if notes:
+        return ExtractionResult(texts, True, " ; ".join(notes), page_numbers)
+    return ExtractionResult(texts, page_numbers=page_numbers)
+
+
+def extract_document(
+    data: PdfSource,
+    on_page: Optional[PageCallback] = None,
+    page_numbers: Optional[List[int]] = None,
+    should_stop: Optional[StopCheck] = None,
+    page_cache: Optional[PageTextCache] = None,
+) -> ExtractionResult:
+    """
+    Extraction hybride, page par page, dans le budget du document :
+    1. nombre de pages lu d'abord (structure seulement) : au-delà de
+       EXTRACTION_MAX_PAGES, seules les premières pages sont traitées
+    2. texte natif de chaque page via PyMuPDF
+    3. seules les pages sans couche texte exploitable (peu de caractères,
+       ou surtout de l'image) sont rendues (dpi=OCR_DPI) et OCRisées
+       dans le pool de processus (ocr_engine), en parallèle, dans la
+       limite de EXTRACTION_MAX_SECONDS
+    4. pour une page OCRisée, on garde le plus long des deux textes
+    page_cache : le texte OCR des pages déjà vues (même empreinte de
+    contenu) est repris du cache, les nouvelles pages y sont ajoutées.
+    Temps dépassé ou annulation (should_stop) : on garde le texte natif
+    et les pages déjà OCRisées, et le résultat est marqué partiel.
+    OCR en erreur : ExtractionFailed (le texte natif seul n'est pas le
+    texte du document, il ne doit être ni mis en cache ni enregistré).
+    on_page(page, total, secondes) : suivi de progression de l'OCR (workers).
+    """
+    notes: List[str] = []
+    deadline = _deadline()
 
+    try:
+        if page_numbers is None:
+            page_numbers = _first_pages(pdf_page_count(data), notes)
+        native_pages = extract_native_pages(data, page_numbers)
+    except Exception:
+        # PDF illisible par PyMuPDF : on tente quand même l'OCR (poppler)
+        return _ocr_only(data, page_numbers, notes, on_page, deadline, should_stop)
+
+    texts = [t for t, _ in native_pages]
+    missing: List[int] = []
+    ocr_error: Optional[Exception] = None
+    to_ocr = [i for i, (_, needs) in enumerate(native_pages) if needs]
+    if to_ocr:
+        ocr_numbers = [page_numbers[i] for i in to_ocr]
+        ocr_texts: Dict[int, str] = {}
+
+        hashes: Dict[int, str] = {}
+        if page_cache is not None:
+            try:
+                hashes = page_content_hashes(data, ocr_numbers)
+                cached = page_cache.get_many(list(set(hashes.values())))
+                ocr_texts = {p: cached[h] for p, h in hashes.items() if h in cached}
+            except Exception:
+                hashes = {}
+        missing = [p for p in ocr_numbers if p not in ocr_texts]
 
-def _extract_date_from_line(line: str) -> Optional[str]:
+        if missing:
+            try:
+                new_texts = dict(zip(
+                    missing,
+                    _ocr_pages(data, missing, on_page, deadline, should_stop),
+                ))
+            except OcrInterrupted as e:
+                new_texts = e.done
+                notes.append(
+                    f"{e.reason} : {len(ocr_texts) + len(e.done)}/{len(ocr_numbers)} pages OCRisées"
+                )
+            except Exception as e:
+                # OCR en panne : le texte natif est renvoyé avec l'erreur
+                new_texts = {}
+                ocr_error = e
+                notes.append(f"OCR en erreur : {e}")
+            ocr_texts.update(new_texts)
+
+            # même en cas d'arrêt, les pages terminées sont gardées pour la suite
+            if hashes and new_texts:
+                try:
+                    page_cache.put_many({hashes[p]: t for p, t in new_texts.items()})
+                except Exception as e:
+                    print(f"[ocr][WARN] cache des pages : {e}")
+
+        for i, page_no in zip(to_ocr, ocr_numbers):
+            ocr_txt = ocr_texts.get(page_no)
+            # si l'OCR est meilleur (= plus long / plus riche) on le prend
+            if ocr_txt and len(ocr_txt.strip()) > len(texts[i].strip()):
+                texts[i] = ocr_txt
+
+    if notes:
+        result = ExtractionResult(texts, True, " ; ".join(notes), page_numbers)
+        if ocr_error is not None:
+            raise ExtractionFailed(result, missing) from ocr_error
+        return result
+    return ExtractionResult(texts, page_numbers=page_numbers)
+
+
+def extract_pages_with_ocr_if_needed(
+    data: PdfSource,
+    on_page: Optional[PageCallback] = None,
+    page_numbers: Optional[List[int]] = None,
+    page_cache: Optional[PageTextCache] = None,
+) -> List[str]:
     """
-    Essaie d'extraire une date de cette ligne uniquement.
-    Retourne 'YYYY-MM-DD' si possible, sinon None.
+    Texte de chaque page (toutes, ou seulement page_numbers, dans cet
+    ordre), voir extract_document.
     """
+    return extract_document(
+        data, on_page=on_page, page_numbers=page_numbers, page_cache=page_cache
+    ).pages
 
-    # Formats style 22/10/2025 ou 22-10-25
-    m = re.search(r'\b(\d{1,2})[/-](\d{1,2})[/-](\d{2,4})\b', line)
-    if m:
-        d, mo, y = m.groups()
-        norm = _normalize_numeric_date(d, mo, y)
-        if norm:
-            return norm
 
-    # Formats style "22 octobre 2025" (tolère accents ou pas)
-    m2 = re.search(
-        r'\b(\d{1,2})\s+([A-Za-zéûôîàùç\.]+)\s+(\d{4})\b',
-        line,
-        flags=re.IGNORECASE
-    )
-    if m2:
-        d, month_txt, y = m2.groups()
-        norm = _normalize_textual_date(d, month_txt, y)
-        if norm:
-            return norm
+def extract_text_with_ocr_if_needed(
+    data: PdfSource,
+    on_page: Optional[PageCallback] = None,
+) -> str:
+    """
+    Texte intégral du PDF : texte natif, complété par l'OCR des seules
+    pages qui en ont besoin (voir extract_document).
+    """
+    return extract_document(data, on_page=on_page).text
 
-    return None
 
+# ========================
+# 2. Détection de la date 
+# ========================
 
-def guess_date_from_text(text: str) -> Optional[str]:
+# mots-clés (comparés à la ligne en minuscules sans accents)
+_DATE_PRIORITY_KEYWORDS = [
+    "fait à", "fait le", "fait a",
+    "pour le maire", "pour la maire",
+    "le maire", "madame la maire", "monsieur le maire",
+    "le directeur", "la directrice", "directeur", "directrice",
+    "par délégation", "par delegation",
+    "signé le", "signee le", "signée le", "signature",
+    "décision du", "decision du",
+    "arrêté du", "arrete du", "arrêté n", "arrete n", "arrêté n°", "arrete n°",
+    "délibération du", "deliberation du",
+    "fait a l", "fait a l'", "fait a la",
+]
+
+_DATE_PUBLISH_KEYWORDS = [
+    "publié le", "publie le", "publiée le", "publiee le",
+    "publié le :", "diffusé le", "date de publication",
+]
+
+
+def guess_date_from_text(text: TextLike) -> Optional[str]:
     """
     Objectif : récupérer la vraie date de signature/décision.
     On évite de prendre une date aléatoire dans le corps du texte.
@@ -213,43 +431,23 @@ def guess_date_from_text(text: str) -> Optional[str]:
     Si aucune ligne candidate -> fallback "première date trouvée quelque part".
     """
 
-    raw_lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
-    n = len(raw_lines)
+    nt = as_normalized(text)
+    n = len(nt.lines)
     candidates: List[Tuple[float, int, str]] = []  # (score, idx, date)
 
-    priority_keywords = [
-        "fait à", "fait le", "fait a",
-        "pour le maire", "pour la maire",
-        "le maire", "madame la maire", "monsieur le maire",
-        "le directeur", "la directrice", "directeur", "directrice",
-        "par délégation", "par delegation",
-        "signé le", "signee le", "signée le", "signature",
-        "décision du", "decision du",
-        "arrêté du", "arrete du", "arrêté n", "arrete n", "arrêté n°", "arrete n°",
-        "délibération du", "deliberation du",
-        "fait a l", "fait a l'", "fait a la",
-    ]
-
-    publish_keywords = [
-        "publié le", "publie le", "publiée le", "publiee le",
-        "publié le :", "diffusé le", "date de publication",
-    ]
-
-    for idx, line in enumerate(raw_lines):
-        line_low = _strip_accents(line.lower())
-
-        extracted = _extract_date_from_line(line)
-        if not extracted:
-            continue
+    # dates de chaque ligne : précalculées par NormalizedText (un seul
+    # parcours du texte), seules les lignes qui en contiennent sont scorées
+    for idx, extracted in nt.date_candidates:
+        line_low = nt.folded[idx]
 
         score = 0.0
 
         # bonus mots-clés signature / validation
-        if any(k in line_low for k in priority_keywords):
+        if any(k in line_low for k in _DATE_PRIORITY_KEYWORDS):
             score += 5.0
 
         # pénalité si ça ressemble à "Publié le : 22/10/2025"
-        if any(k in line_low for k in publish_keywords):
+        if any(k in line_low for k in _DATE_PUBLISH_KEYWORDS):
             score -= 2.5
 
         # bonus si la ligne est très bas dans le doc
@@ -273,23 +471,15 @@ def guess_date_from_text(text: str) -> Optional[str]:
         return candidates[0][2]
 
     # Fallback global : première date rencontrée dans tout le texte
-    global_first = _extract_date_from_line("\n".join(raw_lines))
-    if global_first:
-        return global_first
-
-    for ln in raw_lines:
-        any_date = _extract_date_from_line(ln)
-        if any_date:
-            return any_date
-
-    return None
+    # (ex : "22\noctobre\n2025", date coupée sur plusieurs lignes par l'OCR)
+    return extract_date(nt.joined)
 
 
 # ==================================================
 # 3. Détection du service
 # ==================================================
 
-def guess_service_smart(text: str, known_services: List[str]) -> Optional[str]:
+def guess_service_smart(text: TextLike, known_services: List[str]) -> Optional[str]:
     """
     Stratégie :
     - Chercher d'abord dans le haut (30 premières lignes)
@@ -297,54 +487,16 @@ def guess_service_smart(text: str, known_services: List[str]) -> Optional[str]:
       est souvent en-tête ou dans le bloc signature.
     - On fait une comparaison sans accents pour être tolerant à l'OCR.
     - Si rien trouvé : fallback recherche globale.
+    (voir metadata_matcher : noms pré-normalisés et compilés une fois)
     """
-    services_clean = [s for s in known_services if s]
-    if not services_clean:
-        return None
-
-    lines = text.splitlines()
-    head_zone = "\n".join(lines[:30]).lower()
-    tail_zone = "\n".join(lines[-30:]).lower()
-
-    head_zone_na = _strip_accents(head_zone)
-    tail_zone_na = _strip_accents(tail_zone)
-
-    # cherche en tête et pied
-    for zone_na in (head_zone_na, tail_zone_na):
-        for s in services_clean:
-            s_na = _strip_accents(s.lower())
-            if s_na and s_na in zone_na:
-                return s
-
-    # fallback global
-    low_full_na = _strip_accents(text.lower())
-    for s in services_clean:
-        s_na = _strip_accents(s.lower())
-        if s_na and s_na in low_full_na:
-            return s
-
-    return None
+    return get_matcher(known_services, []).guess_service(text)
 
 
 # ==================================================
 # 4. Détection du type d'acte
 # ==================================================
 
-def _pick_known_type(variants: List[str], known_types: List[str]) -> Optional[str]:
-    """
-    Essaie d'associer nos variantes génériques ("arrete", "decision", "deliberation")
-    avec un type officiel exact présent dans known_types.
-    """
-    for variant in variants:
-        v = _strip_accents(variant.lower())
-        for t in known_types:
-            t_na = _strip_accents(t.lower())
-            if v in t_na:
-                return t
-    return None
-
-
-def guess_type_smart(text: str, known_types: List[str]) -> Optional[str]:
+def guess_type_smart(text: TextLike, known_types: List[str]) -> Optional[str]:
     """
     Règles métier renforcées :
     - On regarde l'en-tête (début du doc) pour des mots comme
@@ -352,66 +504,9 @@ def guess_type_smart(text: str, known_types: List[str]) -> Optional[str]:
     - On tolère les OCR de mauvaise qualité (accents partis).
     - On donne plus d'importance aux premières 15 lignes, car
       les actes officiels ont souvent le titre ultra clair tout en haut.
+    (voir metadata_matcher : regex et types officiels résolus une fois)
     """
-    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
-    top15 = "\n".join(lines[:15])
-    full  = "\n".join(lines)
-
-    def _score_block(block: str) -> Optional[str]:
-        block_low_na = _strip_accents(block.lower())
-
-        # 1. Décision
-        # Exemples ciblés :
-        #  - "DECISION DU MAIRE"
-        #  - "DECISION"
-        if re.search(r"\bdecision\s+du\s+maire\b", block_low_na, flags=re.IGNORECASE) \
-           or re.search(r"\bdecision\b", block_low_na, flags=re.IGNORECASE):
-            m = _pick_known_type(["décision", "decision"], known_types)
-            if m:
-                return m
-
-        # 2. Arrêté
-        # On vise :
-        #  - "ARRETE N°2025/.."
-        #  - "ARRETE DU ..."
-        #  - "PAR ARRETE"
-        if re.search(r"\barre?t[ée]?\s*(n|n°|num|du|de )", block_low_na, flags=re.IGNORECASE) \
-           or re.search(r"\bpar\s+arre?t[ée]?\b", block_low_na, flags=re.IGNORECASE):
-            m = _pick_known_type(["arrêté", "arrete", "arreté", "arrete municipal"], known_types)
-            if m:
-                return m
-
-        # 3. Délibération
-        # Exemples :
-        #  - "DELIBERATION N° ..."
-        #  - "DELIBERATION DU CONSEIL MUNICIPAL"
-        #  - "DELIBERATION"
-        if re.search(r"\bdelib[ée]ration\s*(n|n°|num|du|de )", block_low_na, flags=re.IGNORECASE) \
-           or re.search(r"\bdelib[ée]ration\b", block_low_na, flags=re.IGNORECASE):
-            m = _pick_known_type(["délibération", "deliberation"], known_types)
-            if m:
-                return m
-
-        return None
-
-    # d'abord, on essaie de deviner depuis le haut du document
-    guess_top = _score_block(top15)
-    if guess_top:
-        return guess_top
-
-    # si pas trouvé dans les 15 premières lignes, on essaie globalement
-    guess_full = _score_block(full)
-    if guess_full:
-        return guess_full
-
-    # fallback ultra-basique : si un type officiel apparaît littéralement quelque part
-    full_low_na = _strip_accents(full.lower())
-    for t in known_types:
-        t_na = _strip_accents(t.lower())
-        if t_na and t_na in full_low_na:
-            return t
-
-    return None
+    return get_matcher([], known_types).guess_type(text)
 
 
 # ==================================================
@@ -419,7 +514,7 @@ def guess_type_smart(text: str, known_types: List[str]) -> Optional[str]:
 # ==================================================
 
 def guess_metadata_from_text(
-    text: str,
+    text: TextLike,
     known_services: List[str],
     known_types: List[str],
 ) -> Tuple[Optional[str], Optional[str], Optional[str]]:
@@ -431,8 +526,98 @@ def guess_metadata_from_text(
     - service_auto: cherche en-tête + signature d'abord
     - type_auto: détecté surtout dans les 15 premières lignes avec règles métier
     """
-    date_auto = guess_date_from_text(text)
-    service_auto = guess_service_smart(text, known_services)
-    type_auto = guess_type_smart(text, known_types)
+    # texte découpé / normalisé une seule fois pour les trois détecteurs
+    nt = as_normalized(text)
+    matcher = get_matcher(known_services, known_types)
+    date_auto = guess_date_from_text(nt)
+    service_auto = matcher.guess_service(nt)
+    type_auto = matcher.guess_type(nt)
 
     return date_auto, service_auto, type_auto
+
+
+def _metadata_page_batches(page_count: int) -> List[List[int]]:
+    """
+    Ordre de lecture du mode "métadonnées" :
+    - 1er lot : les METADATA_HEAD_PAGES premières + METADATA_TAIL_PAGES dernières
+      (titre / type en tête, service et date dans le bloc signature en fin)
+    - lots suivants : on élargit de METADATA_WIDEN_PAGES pages de chaque côté,
+      jusqu'à METADATA_MAX_PAGES pages lues au total
+    """
+    head = max(1, settings.METADATA_HEAD_PAGES)
+    tail = max(0, settings.METADATA_TAIL_PAGES)
+    widen = max(1, settings.METADATA_WIDEN_PAGES)
+    max_pages = min(page_count, max(head + tail, settings.METADATA_MAX_PAGES))
+
+    # pages par ordre de priorité, sans doublon
+    order: List[int] = []
+
+    def _add(pages):
+        for p in pages:
+            if 1 <= p <= page_count and p not in order:
+                order.append(p)
+
+    _add(range(1, head + 1))
+    _add(range(page_count - tail + 1, page_count + 1))
+    first_size = len(order)
+
+    # puis on se rapproche du milieu, par les deux bouts
+    front, back = head + 1, page_count - tail
+    while front <= back:
+        _add(range(front, min(front + widen, back + 1)))
+        front += widen
+        _add(range(back, max(back - widen, front - 1), -1))
+        back -= widen
+
+    order = order[:max_pages]
+    batches = [order[:first_size]] if first_size else []
+    step = 2 * widen
+    for i in range(first_size, len(order), step):
+        batches.append(order[i:i + step])
+    return batches
+
+
+def guess_metadata_from_pdf(
+    data: PdfSource,
+    known_services: List[str],
+    known_types: List[str],
+    page_cache: Optional[PageTextCache] = None,
+) -> Tuple[str, Tuple[Optional[str], Optional[str], Optional[str]], Dict[int, str], int, bool]:
+    """
+    Mode "métadonnées" (pré-remplissage du formulaire) : au lieu d'OCRiser
+    tout le document, on n'extrait que les premières et dernières pages,
+    et on n'élargit que si un champ (date, service, type) reste introuvable.
+
+    Retourne (texte lu, (date_auto, service_auto, type_auto),
+              {numéro de page: texte} des pages lues, nb de pages du document,
+              partiel).
+    Une page dont l'OCR a échoué sert à la détection (texte natif) mais
+    ne compte pas parmi les pages lues. partiel : budget de temps atteint
+    sur une des pages lues, leur texte n'est pas complet.
+    """
+    page_count = pdf_page_count(data)
+
+    texts: Dict[int, str] = {}
+    failed: List[int] = []
+    partial = False
+    guess: Tuple[Optional[str], Optional[str], Optional[str]] = (None, None, None)
+    text = ""
+
+    for batch in _metadata_page_batches(page_count):
+        try:
+            result = extract_document(data, page_numbers=batch, page_cache=page_cache)
+        except ExtractionFailed as e:
+            result = e.result
+            failed.extend(e.failed_pages)
+        partial = partial or result.partial
+        for page_no, page_txt in zip(batch, result.pages):
+            texts[page_no] = page_txt
+
+        # texte dans l'ordre du document (en-tête en haut, signature en bas)
+        text = "\n".join(texts[p] for p in sorted(texts)).strip()
+        guess = guess_metadata_from_text(text, known_services, known_types)
+        if all(guess):
+            break
+
+    pages_read = {p: t for p, t in texts.items() if p not in failed}
+    return text, guess, pages_read, page_count, partial
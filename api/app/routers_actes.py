@@ -2,11 +2,10 @@
 from typing import Optional, List
 from datetime import date
 import os
-import re
 
 from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
-from sqlalchemy.orm import Session
-from sqlalchemy import select, and_, or_
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import select, and_, true
 from starlette.responses import FileResponse
 
 from .database import get_db
@@ -14,9 +13,37 @@ from .models import Acte
 from .schemas import ActeOut, ActeEmailRequest, MessageOut
 from .config import settings
 from .email_utils import send_acte_email
+from .search import (
+    search_query,
+    search_match,
+    search_rank,
+    search_headline,
+    query_lexemes,
+    best_page,
+    contains,
+    set_fuzzy_threshold,
+    fuzzy_match,
+    fuzzy_rank,
+)
 
 router = APIRouter(prefix="/actes", tags=["actes"])
 
+# colonnes lues pour un ActeOut (listes, détail) : rien d'autre n'est chargé
+ACTE_OUT_COLUMNS = load_only(
+    Acte.id,
+    Acte.titre,
+    Acte.type,
+    Acte.service,
+    Acte.date_signature,
+    Acte.date_publication,
+    Acte.statut,
+    Acte.resume,
+    Acte.pdf_path,
+    Acte.created_at,
+    Acte.extraction_status,
+    Acte.extraction_note,
+)
+
 
 def _build_front_link(acte_id: int) -> str:
     """
@@ -39,55 +66,65 @@ def search_fulltext(
     db: Session = Depends(get_db),
 ):
     """
-    Recherche plein texte dans Acte.fulltext_content (indexé depuis les PDF).
+    Recherche plein texte dans les actes (titre, résumé, texte des PDF),
+    via l'index tsvector (voir search.py) : français, sans accents,
+    syntaxe websearch ("expression exacte", -exclu, or).
     - q : mots-clés cherchés
     - pagination page/size
-
-    Retourne une liste de {id, titre, service, date_publication, excerpt}
-    Pas le PDF entier, juste un extrait autour du match.
+    Résultats classés par pertinence (ts_rank), puis par date.
+
+    Retourne une liste de {id, titre, service, date_publication, page, excerpt}
+    - page : page du PDF où les mots ont été trouvés (la plus pertinente),
+      null si l'acte a été trouvé par son titre ou son résumé (ou texte
+      d'avant le découpage par page)
+    - excerpt : pas le PDF entier, juste un extrait de cette page (sinon
+      de la première), fait par PostgreSQL (search_headline) : HTML
+      échappé, mots trouvés entre <mark>.
     """
-
-    like = f"%{q}%"
-    stmt = (
-        select(Acte)
-        .where(Acte.fulltext_content.ilike(like))
+    query = search_query(q)
+    lexemes = query_lexemes(db, q)
+    rank = search_rank(query).label("rank")
+    # page de résultats d'abord (index GIN + rang), l'extrait n'est
+    # calculé que pour ces actes
+    hits = (
+        select(Acte.id, rank, Acte.date_publication, Acte.created_at)
+        .where(search_match(query))
         .order_by(
+            rank.desc(),
             Acte.date_publication.desc().nullslast(),
             Acte.created_at.desc(),
         )
         .offset((page - 1) * size)
         .limit(size)
+        .subquery()
+    )
+    # page à montrer pour chaque acte de la page de résultats
+    page_hit = best_page(hits.c.id, lexemes)
+    stmt = (
+        select(
+            Acte.id,
+            Acte.titre,
+            Acte.service,
+            Acte.date_publication,
+            page_hit.c.page,
+            search_headline(page_hit.c.text, query, lexemes).label("excerpt"),
+        )
+        .join(hits, hits.c.id == Acte.id)
+        .outerjoin(page_hit, true())
+        .order_by(
+            hits.c.rank.desc(),
+            hits.c.date_publication.desc().nullslast(),
+            hits.c.created_at.desc(),
+        )
     )
 
-    actes = db.execute(stmt).scalars().all()
-
-    results = []
-    for acte in actes:
-        excerpt = None
-        if acte.fulltext_content:
-            m = re.search(re.escape(q), acte.fulltext_content, flags=re.IGNORECASE)
-            if m:
-                start = max(0, m.start() - 120)
-                end = min(len(acte.fulltext_content), m.end() + 120)
-                snippet = acte.fulltext_content[start:end].strip()
-                snippet = re.sub(r"\s+", " ", snippet)
-                excerpt = snippet
-
-        results.append({
-            "id": acte.id,
-            "titre": acte.titre,
-            "service": acte.service,
-            "date_publication": acte.date_publication,
-            "excerpt": excerpt,
-        })
-
-    return results
+    return [dict(row) for row in db.execute(stmt).mappings()]
 
 
 # =====================================================
 # 2) LISTE PUBLIQUE CLASSIQUE
 #    GET /actes?q=...&type=... etc.
-#    -> renvoie ActeOut (pas fulltext_content)
+#    -> renvoie ActeOut (pas le texte intégral)
 # =====================================================
 @router.get("", response_model=List[ActeOut])
 def list_actes(
@@ -98,14 +135,24 @@ def list_actes(
     date_max: Optional[date] = None,
     page: int = 1,
     size: int = 10,
+    fuzzy: bool = False,
     db: Session = Depends(get_db),
 ):
-    stmt = select(Acte)
+    """
+    q : titre ou résumé contenant q (accents ignorés, index trigrammes).
+    fuzzy=1 : recherche approchée (fautes de frappe, mots mal reconnus
+    par l'OCR), actes classés par ressemblance.
+    """
+    stmt = select(Acte).options(ACTE_OUT_COLUMNS)
     conds = []
+    order = []
 
-    if q:
-        like = f"%{q}%"
-        conds.append(or_(Acte.titre.ilike(like), Acte.resume.ilike(like)))
+    if q and fuzzy:
+        set_fuzzy_threshold(db)
+        conds.append(fuzzy_match(q, Acte.titre, Acte.resume))
+        order.append(fuzzy_rank(q, Acte.titre, Acte.resume).desc())
+    elif q:
+        conds.append(contains(q, Acte.titre, Acte.resume))
 
     if type:
         conds.append(Acte.type == type)
@@ -124,6 +171,7 @@ def list_actes(
 
     stmt = (
         stmt.order_by(
+            *order,
             Acte.date_publication.desc().nullslast(),
             Acte.created_at.desc(),
         )
@@ -141,7 +189,7 @@ def list_actes(
 # =====================================================
 @router.get("/{acte_id}", response_model=ActeOut)
 def get_acte(acte_id: int, db: Session = Depends(get_db)):
-    acte = db.get(Acte, acte_id)
+    acte = db.get(Acte, acte_id, options=[ACTE_OUT_COLUMNS])
     if not acte:
         raise HTTPException(status_code=404, detail="Not found")
     return acte
@@ -1,11 +1,20 @@
 # api/app/routers_admin.py
-from datetime import datetime, timedelta
-from typing import Optional, List
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Tuple
 
 from pathlib import Path
 import json
 import io
 import csv
+import time
+import os
+import re
+import hashlib
+import secrets
+import shutil
+import asyncio
+
+import aiofiles
 
 from fastapi import (
     APIRouter,
@@ -17,18 +26,22 @@ from fastapi import (
     Response,
     status,
     Query,
+    Request,
+    Header,
 )
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 # OAuth2PasswordRequestForm.username = email
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, ValidationError
 
 from .config import settings
-from .database import get_db
-from .models import Acte, User, AuditLog
-from .models_refs import ActType, Service
+from .database import get_db, SessionLocal
+from .models import Acte, User, AuditLog, IngestJob, UploadSession
+from .models_refs import load_known_refs
 from .schemas import (
     TokenOut,
     ActeOut,
@@ -38,6 +51,8 @@ from .schemas import (
     UserRoleUpdate,
     UserUpdate,
     AuditEntryOut,
+    UploadSessionCreate,
+    UploadSessionOut,
 )
 from .auth import (
     get_password_hash,
@@ -46,10 +61,49 @@ from .auth import (
     get_current_user,
     require_admin,
 )
-from .utils import save_pdf_validated
+from .utils import (
+    PDF_MAGIC,
+    StoredPdf,
+    ensure_dir,
+    store_pdf_validated,
+    spool_pdf_validated,
+    remove_quietly,
+    parse_date,
+)
 from .pdf_utils import (
-    extract_text_with_ocr_if_needed,
+    ExtractionFailed,
     guess_metadata_from_text,
+    guess_metadata_from_pdf,
+    pack_pages,
+    unpack_pages,
+)
+from .acte_pages import save_pages
+from .routers_actes import ACTE_OUT_COLUMNS
+from .search import (
+    search_query,
+    search_match,
+    search_rank,
+    like_pattern,
+    set_fuzzy_threshold,
+    fuzzy_match,
+    fuzzy_rank,
+)
+from .extraction_executor import extraction_executor, ExtractionQueueFull
+from .lanes import INTERACTIVE, BULK
+from .staging import (
+    staging_dir,
+    stage_upload,
+    purge_expired_staging,
+    claim_staged,
+    move_staged_into,
+)
+from .extraction_cache import (
+    PageOcrCache,
+    extract_cached,
+    extraction_cache_key,
+    extraction_version,
+    get_cached_text,
+    sha256_of_pdf,
 )
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -71,39 +125,6 @@ def ensure_admin(db: Session):
         db.commit()
 
 
-def _parse_date(s: Optional[str]):
-    """
-    Accepte :
-      - JJ/MM/AAAA
-      - JJ/MM/AA (devient JJ/MM/20AA)
-      - AAAA-MM-JJ (format HTML <input type="date">)
-    """
-    if not s:
-        return None
-    s = s.strip()
-    try:
-        if "/" in s:
-            parts = s.split("/")
-            if len(parts) != 3:
-                raise ValueError("format inattendu")
-            d_str, m_str, y_str = [p.strip() for p in parts]
-            d = int(d_str)
-            m = int(m_str)
-            if len(y_str) == 2:
-                # JJ/MM/AA -> JJ/MM/20AA
-                y = 2000 + int(y_str)
-            else:
-                y = int(y_str)
-            return datetime(year=y, month=m, day=d).date()
-
-        # Sinon on suppose un format ISO AAAA-MM-JJ
-        return datetime.fromisoformat(s).date()
-    except ValueError as e:
-        raise ValueError(
-            f"Format de date invalide: {s}. Attendu JJ/MM/AAAA, JJ/MM/AA ou AAAA-MM-JJ."
-        ) from e
-
-
 def _delete_file_if_exists(path_str: Optional[str]):
     if not path_str:
         return
@@ -116,14 +137,31 @@ def _delete_file_if_exists(path_str: Optional[str]):
         pass
 
 
+# listes officielles gardées en mémoire : (expire_à, known_types, known_services)
+_refs_cache = None
+
+
+def _known_refs(db: Session):
+    """
+    Listes officielles (known_types, known_services) pour la détection.
+    Relues au plus toutes les REFS_CACHE_SECONDS ; le matcher compilé
+    (metadata_matcher.get_matcher) n'est reconstruit que si elles changent.
+    """
+    global _refs_cache
+    now = time.monotonic()
+    if _refs_cache is None or _refs_cache[0] <= now:
+        known_types, known_services = load_known_refs(db)
+        _refs_cache = (now + settings.REFS_CACHE_SECONDS, known_types, known_services)
+    return _refs_cache[1], _refs_cache[2]
+
+
 def _auto_metadata_from_text(text: str, db: Session):
     """
     Utilise les listes officielles (ActType / Service) pour essayer
     de retrouver ce qui matche dans le PDF.
     Renvoie (date_auto, service_auto, type_auto).
     """
-    known_types = [row.name for row in db.query(ActType).all()]
-    known_services = [row.name for row in db.query(Service).all()]
+    known_types, known_services = _known_refs(db)
 
     date_auto, service_auto, type_auto = guess_metadata_from_text(
         text,
@@ -133,6 +171,55 @@ def _auto_metadata_from_text(text: str, db: Session):
     return date_auto, service_auto, type_auto
 
 
+def _enqueue_extraction(
+    db: Session,
+    acte: Acte,
+    lane: str = INTERACTIVE,
+    pdf_sha256: Optional[str] = None,
+) -> IngestJob:
+    """
+    Met l'acte en attente d'extraction et crée le job correspondant.
+    L'OCR est fait ensuite par un worker (app/worker.py), pas dans la requête HTTP.
+    lane : "interactive" (un acte saisi à la main) ou "bulk" (upload multiple).
+    pdf_sha256 : empreinte calculée à la réception (évite de relire le PDF
+    pour la clé du cache d'extraction).
+    """
+    save_pages(db, acte.id, [])
+    acte.extraction_status = "pending"
+    acte.extraction_version = None
+    job = IngestJob(
+        acte_id=acte.id,
+        pdf_path=acte.pdf_path,
+        pdf_sha256=pdf_sha256,
+        status="pending",
+        lane=lane,
+    )
+    db.add(job)
+    db.flush()
+    return job
+
+
+def _start_extraction(
+    db: Session,
+    acte: Acte,
+    lane: str,
+    pdf_sha256: Optional[str],
+    fulltext: Optional[str],
+) -> Optional[IngestJob]:
+    """
+    Texte intégral déjà connu (PDF analysé en entier avant la création,
+    pages réunies par pdf_utils.pack_pages) : on le reprend directement.
+    Sinon : job d'extraction (_enqueue_extraction).
+    """
+    if fulltext is not None:
+        save_pages(db, acte.id, enumerate(unpack_pages(fulltext), 1))
+        acte.extraction_status = "done"
+        acte.extraction_note = None
+        acte.extraction_version = extraction_version()
+        return None
+    return _enqueue_extraction(db, acte, lane=lane, pdf_sha256=pdf_sha256)
+
+
 def _log_acte_action(
     db: Session,
     *,
@@ -163,6 +250,8 @@ class BulkActeCreate(BaseModel):
     service: Optional[str] = None
     date_signature: Optional[str] = None   # "JJ/MM/AAAA", "JJ/MM/AA" ou "AAAA-MM-JJ"
     date_publication: Optional[str] = None
+    # PDF déjà reçu par /admin/analyse-pdf(/batch) : pas de fichier à renvoyer
+    staging_token: Optional[str] = None
 
 
 # ---------- Auth ----------
@@ -225,7 +314,6 @@ def me(user=Depends(get_current_user)):
 @router.post("/analyse-pdf", response_model=AnalysePDFOut)
 async def analyse_pdf(
     pdf: UploadFile = File(...),
-    db: Session = Depends(get_db),
     user=Depends(get_current_user),
 ):
     """
@@ -235,30 +323,511 @@ async def analyse_pdf(
       - service_auto
       - type_auto
 
+    Mode "métadonnées" : seules les premières / dernières pages sont
+    extraites (élargies seulement si un champ reste introuvable), sauf si
+    le texte complet de ce PDF est déjà dans le cache d'extraction.
+
     Renvoie aussi un extrait du texte (fulltext_excerpt) juste pour debug.
+
+    Le PDF reçu est gardé (STAGING_TTL_SECONDS) sous un jeton
+    (staging_token) : la création de l'acte envoie ce jeton au lieu du
+    fichier, sans second envoi ni seconde extraction (voir staging.py).
     """
 
-    # 1. lire le binaire pour OCR
-    raw_bytes = await pdf.read()
-    pdf.file.seek(0)
+    # 1. réception en une passe dans la zone d'attente
+    #    (mêmes contrôles type / taille que l'upload, SHA-256 au passage)
+    spooled = await spool_pdf_validated(pdf, dir=staging_dir())
 
-    # 2. extraire le texte (OCR fallback)
-    txt = extract_text_with_ocr_if_needed(raw_bytes)
+    # 2. analyse dans l'exécuteur dédié : la boucle asyncio reste libre
+    #    (client parti avant le début de l'analyse : fichier supprimé ;
+    #    une fois commencée, _analyse_pdf_isolated s'en charge)
+    try:
+        return await extraction_executor.run(
+            _analyse_pdf_isolated, spooled, pdf.filename, user.id, lane=INTERACTIVE,
+            on_cancel=lambda: remove_quietly(spooled.path),
+        )
+    except ExtractionQueueFull as e:
+        remove_quietly(spooled.path)
+        raise _queue_full(e)
+
+
+def _queue_full(e: ExtractionQueueFull) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="File d'analyse pleine, réessayez plus tard",
+        headers={"Retry-After": str(e.retry_after)},
+    )
 
-    # 3. deviner quelques métadonnées
-    date_auto, service_auto, type_auto = _auto_metadata_from_text(txt, db)
+
+def _analyse_pdf_file(db: Session, pdf: StoredPdf) -> Tuple[AnalysePDFOut, Optional[str]]:
+    """
+    Analyse d'un PDF reçu sur disque (voir analyse_pdf).
+    Renvoie aussi le texte intégral quand il est connu (cache, ou document
+    lu en entier), page par page (pdf_utils.pack_pages), pour la création
+    de l'acte.
+    """
+
+    # texte complet déjà connu (même fichier déjà déposé) ?
+    packed = get_cached_text(db, extraction_cache_key(pdf.sha256))
+    if packed is not None:
+        txt = "\n".join(unpack_pages(packed)).strip()
+        date_auto, service_auto, type_auto = _auto_metadata_from_text(txt, db)
+        return AnalysePDFOut(
+            fulltext_excerpt=txt[:2000],
+            date_auto=date_auto,
+            service_auto=service_auto,
+            type_auto=type_auto,
+        ), packed
+
+    # sinon : extraction des pages utiles seulement + détection
+    known_types, known_services = _known_refs(db)
+    try:
+        txt, guess, pages, page_count, partial = guess_metadata_from_pdf(
+            pdf.path,
+            known_services=known_services,
+            known_types=known_types,
+            page_cache=PageOcrCache(db),
+        )
+    except Exception:
+        # PDF que PyMuPDF ne sait pas ouvrir : extraction complète classique
+        try:
+            result = extract_cached(db, pdf.path, pdf_sha256=pdf.sha256)
+        except ExtractionFailed as e:
+            # OCR en erreur : rien à pré-remplir, le worker retentera l'extraction
+            result = e.result
+        txt = result.text
+        guess = guess_metadata_from_text(txt, known_services, known_types)
+        pages_read = page_count = None
+        fulltext = None if result.partial else pack_pages(result.pages)
+    else:
+        # toutes les pages lues en entier : c'est déjà le texte intégral
+        # (budget de temps atteint : le worker refera l'extraction)
+        pages_read = len(pages)
+        fulltext = (
+            pack_pages([pages[p] for p in sorted(pages)])
+            if pages_read == page_count and not partial else None
+        )
+
+    date_auto, service_auto, type_auto = guess
 
     return AnalysePDFOut(
         fulltext_excerpt=txt[:2000],
         date_auto=date_auto,
         service_auto=service_auto,
         type_auto=type_auto,
+        pages_analysed=pages_read,
+        pages_total=page_count,
+    ), fulltext
+
+
+def _analyse_pdf_isolated(
+    pdf: StoredPdf,
+    filename: Optional[str],
+    user_id: Optional[int],
+) -> AnalysePDFOut:
+    """
+    _analyse_pdf_file avec sa propre session (exécuté dans un thread),
+    puis mise en attente du PDF sous un jeton (staging_token).
+    En cas d'erreur, le fichier reçu est supprimé.
+    """
+    try:
+        with SessionLocal() as db:
+            out, fulltext = _analyse_pdf_file(db, pdf)
+            purge_expired_staging(db)
+            staged = stage_upload(db, pdf, filename, user_id, fulltext=fulltext)
+            out.staging_token = staged.token
+            out.staging_expires_at = staged.expires_at
+            return out
+    except BaseException:
+        remove_quietly(pdf.path)
+        raise
+
+
+@router.post("/analyse-pdf/batch")
+async def analyse_pdf_batch(
+    pdfs: List[UploadFile] = File(...),
+    user=Depends(get_current_user),
+):
+    """
+    Analyse de plusieurs PDF en une seule requête (formulaire de dépôt multiple).
+    Les fichiers sont analysés en parallèle dans l'exécuteur d'extraction
+    (chacun avec sa session ; l'OCR des pages passe par le pool de
+    processus commun) et la réponse est diffusée en NDJSON : une ligne par
+    fichier, dans l'ordre où les analyses se terminent.
+    File d'analyse trop pleine pour tout le lot : 503 + Retry-After.
+
+      {"index": 0, "filename": "a.pdf", "ok": true, "date_auto": ..., ...}
+      {"index": 1, "filename": "b.pdf", "ok": false, "status": 415, "error": "..."}
+    """
+    if len(pdfs) > settings.ANALYSE_BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many files (>{settings.ANALYSE_BATCH_MAX_FILES})",
+        )
+
+    # réception + contrôles (type, signature, taille) avant de commencer à
+    # répondre : chaque fichier part en une passe dans un fichier temporaire
+    files = []
+    try:
+        for index, pdf in enumerate(pdfs):
+            try:
+                spooled = await spool_pdf_validated(pdf, dir=staging_dir())
+                files.append((index, pdf.filename, spooled, None))
+            except HTTPException as e:
+                files.append((index, pdf.filename, None, e))
+
+        # tout le lot est admis dans la file, ou rien (avant de commencer à répondre)
+        valid = [f for f in files if f[3] is None]
+        futures = extraction_executor.submit_many(
+            [
+                (_analyse_pdf_isolated, (spooled, filename, user.id))
+                for _, filename, spooled, _ in valid
+            ],
+            lane=BULK,
+            on_cancel=lambda i: remove_quietly(valid[i][2].path),
+        )
+    except BaseException as e:
+        for _, _, spooled, _ in files:
+            remove_quietly(spooled and spooled.path)
+        if isinstance(e, ExtractionQueueFull):
+            raise _queue_full(e)
+        raise
+    future_of = {f[0]: fut for f, fut in zip(valid, futures)}
+
+    async def analyse_one(index: int, filename: Optional[str], error):
+        line = {"index": index, "filename": filename}
+        if error is not None:
+            return {**line, "ok": False, "status": error.status_code, "error": error.detail}
+        try:
+            out = await future_of[index]
+        except Exception as e:
+            return {**line, "ok": False, "status": 500, "error": str(e)}
+        return {**line, "ok": True, **out.model_dump()}
+
+    async def stream():
+        tasks = [
+            asyncio.create_task(analyse_one(index, filename, error))
+            for index, filename, _, error in files
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done, ensure_ascii=False) + "\n"
+        finally:
+            # client parti en cours de route : les analyses pas encore
+            # commencées sont retirées de la file (et leur fichier supprimé,
+            # voir on_cancel ; les PDF déjà analysés restent en attente
+            # jusqu'à expiration)
+            for t in tasks:
+                t.cancel()
+            for fut in futures:
+                fut.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# ---------- Envoi reprenable par morceaux (gros scans, connexion lente) ----------
+#
+# 1. POST   /admin/uploads                 {filename, size, sha256?} -> upload_id
+# 2. PUT    /admin/uploads/{id}            corps = un morceau, en-têtes
+#                                           Upload-Offset (octets déjà reçus)
+#                                           Upload-Checksum (SHA-256 hex du morceau)
+#    GET    /admin/uploads/{id}            où en est l'envoi (reprise après coupure)
+# 3. POST   /admin/uploads/{id}/finalise   -> même réponse que /admin/analyse-pdf
+#                                           (dont staging_token pour la création)
+#    DELETE /admin/uploads/{id}            abandon
+# Les morceaux sont écrits directement dans UPLOAD_DIR/.uploads, lus en
+# flux (mémoire indépendante de la taille du fichier). Une session sans
+# nouveau morceau pendant UPLOAD_SESSION_TTL_SECONDS est supprimée.
+
+
+def _uploads_dir() -> str:
+    path = os.path.join(settings.UPLOAD_DIR, ".uploads")
+    ensure_dir(path)
+    return path
+
+
+def _upload_expiry() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=settings.UPLOAD_SESSION_TTL_SECONDS)
+
+
+def _upload_out(session: UploadSession) -> UploadSessionOut:
+    return UploadSessionOut(
+        upload_id=session.id,
+        offset=session.received,
+        size=session.size_bytes,
+        chunk_max_bytes=int(settings.UPLOAD_CHUNK_MAX_MB) * 1024 * 1024,
+        expires_at=session.expires_at,
+    )
+
+
+def purge_expired_uploads(db: Session) -> int:
+    """Supprime les envois abandonnés (fichier partiel + session)."""
+    expired = db.execute(
+        select(UploadSession)
+        .where(UploadSession.expires_at <= datetime.now(timezone.utc))
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    for session in expired:
+        remove_quietly(session.path)
+        db.delete(session)
+    db.commit()
+    return len(expired)
+
+
+def _get_upload_session(db: Session, upload_id: str, user, lock: bool = False) -> UploadSession:
+    """
+    Session d'envoi de cet utilisateur (404 sinon, ou si elle a expiré).
+    lock : verrouillée pour ce morceau ; un autre envoi en parallèle sur la
+    même session reçoit 409 au lieu d'attendre.
+    """
+    stmt = select(UploadSession).where(UploadSession.id == upload_id)
+    if lock:
+        stmt = stmt.with_for_update(nowait=True)
+    try:
+        session = db.execute(stmt).scalar_one_or_none()
+    except OperationalError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Un morceau est déjà en cours d'envoi")
+
+    if (
+        session is None
+        or (session.user_id is not None and session.user_id != user.id)
+        or session.expires_at <= datetime.now(timezone.utc)
+    ):
+        raise HTTPException(status_code=404, detail="Envoi introuvable ou expiré")
+    return session
+
+
+def _offset_conflict(session: UploadSession, detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail=detail,
+        headers={"Upload-Offset": str(session.received)},
+    )
+
+
+@router.post("/uploads", response_model=UploadSessionOut, status_code=201)
+def create_upload_session(
+    body: UploadSessionCreate,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Ouvre un envoi reprenable (taille et type vérifiés dès maintenant)."""
+    if not body.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=415, detail="Only PDF files are allowed")
+    if body.size <= 0:
+        raise HTTPException(status_code=400, detail="Taille invalide")
+    if body.size > int(settings.MAX_UPLOAD_MB) * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"File too large (>{settings.MAX_UPLOAD_MB} MB)")
+    sha256 = (body.sha256 or "").lower() or None
+    if sha256 is not None and not re.fullmatch(r"[0-9a-f]{64}", sha256):
+        raise HTTPException(status_code=400, detail="sha256 invalide (64 caractères hexadécimaux)")
+
+    purge_expired_uploads(db)
+
+    upload_id = secrets.token_urlsafe(24)
+    path = os.path.join(_uploads_dir(), f"{upload_id}.part")
+    open(path, "wb").close()
+
+    session = UploadSession(
+        id=upload_id,
+        user_id=user.id,
+        filename=os.path.basename(body.filename),
+        path=path,
+        size_bytes=body.size,
+        received=0,
+        sha256=sha256,
+        expires_at=_upload_expiry(),
     )
+    db.add(session)
+    db.commit()
+    return _upload_out(session)
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionOut)
+def get_upload_session(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Etat d'un envoi : offset = octets reçus, à reprendre à partir de là."""
+    return _upload_out(_get_upload_session(db, upload_id, user))
+
+
+@router.put("/uploads/{upload_id}", response_model=UploadSessionOut)
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    upload_checksum: str = Header(..., alias="Upload-Checksum"),
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Ajoute un morceau à partir de Upload-Offset (qui doit valoir l'offset
+    de la session, sinon 409 avec le bon offset dans l'en-tête
+    Upload-Offset). Le morceau est lu en flux, écrit à sa place dans le
+    fichier partiel et haché au passage : si son SHA-256 ne correspond pas
+    à Upload-Checksum, il est retiré du fichier (400) et peut être renvoyé.
+    """
+    session = _get_upload_session(db, upload_id, user, lock=True)
+    if upload_offset != session.received:
+        raise _offset_conflict(session, "Offset inattendu")
+
+    start = session.received
+    max_chunk = int(settings.UPLOAD_CHUNK_MAX_MB) * 1024 * 1024
+    h = hashlib.sha256()
+    n = 0
+
+    # un envoi précédent coupé en cours de morceau a pu laisser des octets en trop
+    os.truncate(session.path, start)
+    try:
+        async with aiofiles.open(session.path, "r+b") as out:
+            await out.seek(start)
+            async for block in request.stream():
+                if not block:
+                    continue
+                n += len(block)
+                if n > max_chunk:
+                    raise HTTPException(status_code=413, detail=f"Morceau trop gros (>{settings.UPLOAD_CHUNK_MAX_MB} MB)")
+                if start + n > session.size_bytes:
+                    raise HTTPException(status_code=413, detail="Plus d'octets que la taille annoncée")
+                h.update(block)
+                await out.write(block)
+
+            if start == 0 and n:
+                await out.seek(0)
+                if not (await out.read(len(PDF_MAGIC))).startswith(PDF_MAGIC):
+                    raise HTTPException(status_code=415, detail="Invalid PDF signature")
+
+        if n == 0:
+            raise HTTPException(status_code=400, detail="Morceau vide")
+        if h.hexdigest() != upload_checksum.strip().lower():
+            raise HTTPException(status_code=400, detail="Checksum du morceau incorrect : le renvoyer")
+    except BaseException:
+        # morceau refusé ou interrompu : le fichier revient à l'offset de départ
+        os.truncate(session.path, start)
+        db.rollback()
+        raise
+
+    session.received = start + n
+    session.expires_at = _upload_expiry()
+    db.commit()
+    return _upload_out(session)
+
+
+@router.post("/uploads/{upload_id}/finalise", response_model=AnalysePDFOut)
+async def finalise_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Fin d'un envoi reprenable : vérifie que tout est reçu et l'empreinte
+    du fichier complet, puis suit le même chemin que /admin/analyse-pdf
+    (analyse + mise en attente sous un staging_token pour la création).
+    File d'analyse pleine : 503 + Retry-After, la session est gardée et la
+    finalisation peut être relancée.
+    """
+    session = _get_upload_session(db, upload_id, user, lock=True)
+    if session.received != session.size_bytes:
+        raise _offset_conflict(session, "Envoi incomplet")
+
+    # empreinte du fichier complet, lue par blocs hors de la boucle asyncio
+    sha256 = await run_in_threadpool(sha256_of_pdf, session.path)
+    if session.sha256 and sha256 != session.sha256:
+        remove_quietly(session.path)
+        db.delete(session)
+        db.commit()
+        raise HTTPException(status_code=400, detail="Empreinte du fichier incorrecte : recommencer l'envoi")
+
+    # même disque : simple renommage vers la zone d'attente
+    staged_path = os.path.join(staging_dir(), f"upload_{session.id}.pdf")
+    os.replace(session.path, staged_path)
+    stored = StoredPdf(staged_path, session.size_bytes, sha256)
+    try:
+        # client parti avant le début de l'analyse : le fichier (qui n'est
+        # plus sous la session) est supprimé, sinon il resterait orphelin
+        # dans .staging ; une fois commencée, _analyse_pdf_isolated s'en charge
+        (future,) = extraction_executor.submit_many(
+            [(_analyse_pdf_isolated, (stored, session.filename, user.id))],
+            lane=INTERACTIVE,
+            on_cancel=lambda i: remove_quietly(staged_path),
+        )
+    except ExtractionQueueFull as e:
+        os.replace(staged_path, session.path)
+        db.rollback()
+        raise _queue_full(e)
+
+    db.delete(session)
+    db.commit()
+    return await future
+
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def abort_upload(
+    upload_id: str,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Abandon d'un envoi : fichier partiel et session supprimés."""
+    session = _get_upload_session(db, upload_id, user, lock=True)
+    remove_quietly(session.path)
+    db.delete(session)
+    db.commit()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 # ---------- Ajout multiple (formulaire multi-PDF) ----------
 
 
+class _BulkItem:
+    """Un acte de la création multiple et ce qu'il est devenu."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.data: Optional[BulkActeCreate] = None
+        self.dates = (None, None)
+        self.pdf: Optional[UploadFile] = None
+        self.staging_token: Optional[str] = None
+        self.stored: Optional[StoredPdf] = None        # PDF envoyé, déjà écrit sur disque
+        self.moved: Optional[Tuple[str, str]] = None   # (chemin final, chemin en attente)
+        self.acte_id: Optional[int] = None
+        self.job_id: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def fail(self, error: str):
+        """Echec : le PDF déjà écrit est supprimé, un PDF en attente reprend sa place."""
+        self.error = error
+        self.acte_id = self.job_id = None
+        if self.moved is not None:
+            path, staged_path = self.moved
+            try:
+                shutil.move(path, staged_path)
+            except OSError:
+                remove_quietly(path)
+            self.moved = None
+        if self.stored is not None:
+            remove_quietly(self.stored.path)
+            self.stored = None
+
+    def result(self) -> dict:
+        if self.error is not None:
+            return {"index": self.index, "status": "failed", "error": self.error}
+        return {
+            "index": self.index,
+            "status": "created",
+            "acte_id": self.acte_id,
+            "job_id": self.job_id,
+        }
+
+
+def _error_detail(e: Exception) -> str:
+    if isinstance(e, HTTPException):
+        return str(e.detail)
+    return f"{type(e).__name__}: {e}"
+
+
 @router.post("/actes/bulk", response_model=dict)
 async def admin_create_actes_bulk(
     items: str = Form(...),                      # JSON string [{...}, {...}]
@@ -269,7 +838,21 @@ async def admin_create_actes_bulk(
     """
     Création en masse d'actes à partir du formulaire multi-upload.
     - items : JSON d'une liste de BulkActeCreate
-    - files : liste de PDF alignés avec les items (index 0 -> acte #1, etc.)
+    - files : liste de PDF, pris dans l'ordre pour les items sans
+      staging_token (sans jeton nulle part : index 0 -> acte #1, etc.)
+    Un item avec staging_token (PDF déjà analysé par /admin/analyse-pdf/batch)
+    ne renvoie pas son PDF : le fichier en attente est réutilisé.
+
+    Chaque acte réussit ou échoue seul (date invalide, PDF manquant ou
+    refusé, jeton expiré…) : les PDF sont écrits en parallèle
+    (BULK_INGEST_CONCURRENCY), les actes enregistrés par lots de
+    BULK_COMMIT_BATCH, et le PDF d'un acte en échec est supprimé (ou remis
+    en attente s'il venait d'une analyse).
+    Réponse : count (actes créés), created / jobs (ids, jobs à suivre via
+    GET /admin/jobs/{id}, null si le texte intégral était déjà connu),
+    failed, et results : un résultat par item, dans l'ordre
+      {"index": 0, "status": "created", "acte_id": 12, "job_id": 40}
+      {"index": 1, "status": "failed", "error": "Date invalide ..."}
     """
     try:
         raw_items = json.loads(items)
@@ -279,76 +862,121 @@ async def admin_create_actes_bulk(
     if not isinstance(raw_items, list) or len(raw_items) == 0:
         raise HTTPException(status_code=400, detail="'items' doit être une liste non vide.")
 
-    actes_data: List[BulkActeCreate] = []
-    for idx, obj in enumerate(raw_items):
+    # 1. contrôles sans toucher au disque : données, dates, PDF associé.
+    #    Les fichiers envoyés sont pris dans l'ordre, pour les items sans
+    #    jeton (même invalides, pour garder l'alignement).
+    bulk = [_BulkItem(i) for i in range(len(raw_items))]
+    remaining_files = iter(files)
+    for item, obj in zip(bulk, raw_items):
+        token = obj.get("staging_token") if isinstance(obj, dict) else None
+        if token:
+            item.staging_token = token
+        else:
+            item.pdf = next(remaining_files, None)
         try:
-            actes_data.append(BulkActeCreate(**obj))
-        except ValidationError as e:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Ligne {idx + 1} invalide dans 'items': {e.errors()}",
-            )
-
-    created_ids: List[int] = []
-
-    # pour chaque entrée, on crée un Acte comme dans create_acte_one_shot
-    for i, data in enumerate(actes_data):
-        if i >= len(files) or files[i] is None:
-            raise HTTPException(status_code=400, detail=f"PDF manquant pour l'acte #{i + 1}.")
-        pdf = files[i]
-
-        # lire les bytes pour OCR
-        raw_bytes = await pdf.read()
-        pdf.file.seek(0)
-
-        # sauvegarder le PDF sur disque
-        path = await save_pdf_validated(settings.UPLOAD_DIR, pdf)
-
-        # génère le texte intégral : texte natif ou OCR
-        fulltxt = extract_text_with_ocr_if_needed(raw_bytes)
-
+            item.data = BulkActeCreate(**obj)
+        except (ValidationError, TypeError) as e:
+            errors = e.errors() if isinstance(e, ValidationError) else str(e)
+            item.fail(f"Ligne {item.index + 1} invalide dans 'items': {errors}")
+            continue
         try:
-            ds = _parse_date(data.date_signature)
-            dp = _parse_date(data.date_publication)
+            item.dates = (
+                parse_date(item.data.date_signature),
+                parse_date(item.data.date_publication),
+            )
         except ValueError:
-            raise HTTPException(
-                status_code=400,
-                detail=(
-                    f"Date invalide pour l'acte #{i + 1} "
-                    "(format attendu JJ/MM/AAAA, JJ/MM/AA ou AAAA-MM-JJ)."
-                ),
+            item.fail(
+                f"Date invalide pour l'acte #{item.index + 1} "
+                "(format attendu JJ/MM/AAAA, JJ/MM/AA ou AAAA-MM-JJ)."
             )
+            continue
+        if not token and item.pdf is None:
+            item.fail(f"PDF manquant pour l'acte #{item.index + 1}.")
+
+    # 2. écriture des PDF envoyés, en parallèle (l'OCR se fera dans un worker)
+    limit = asyncio.Semaphore(max(1, settings.BULK_INGEST_CONCURRENCY))
+
+    async def store(item: _BulkItem):
+        async with limit:
+            try:
+                item.stored = await store_pdf_validated(settings.UPLOAD_DIR, item.pdf)
+            except Exception as e:
+                item.fail(f"Acte #{item.index + 1} : {_error_detail(e)}")
+
+    await asyncio.gather(*(
+        store(item) for item in bulk if item.error is None and item.pdf is not None
+    ))
+
+    # 3. enregistrement par lots : un point de sauvegarde par acte (un
+    #    échec n'annule que lui), un commit par lot
+    pending = [item for item in bulk if item.error is None]
+    batch_size = max(1, settings.BULK_COMMIT_BATCH)
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        for item in batch:
+            try:
+                with db.begin_nested():
+                    _create_bulk_acte(db, item, user)
+            except Exception as e:
+                item.fail(f"Acte #{item.index + 1} : {_error_detail(e)}")
+        try:
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            for item in batch:
+                if item.error is None:
+                    item.fail(f"Acte #{item.index + 1} : {_error_detail(e)}")
+
+    created = [item for item in bulk if item.error is None]
+    failed = len(bulk) - len(created)
+    return {
+        "detail": "created" if not failed else ("partial" if created else "failed"),
+        "count": len(created),
+        "created": [item.acte_id for item in created],
+        "jobs": [item.job_id for item in created],
+        "failed": failed,
+        "results": [item.result() for item in bulk],
+    }
 
-        acte = Acte(
-            titre=data.titre,
-            type=data.type,
-            service=data.service,
-            date_signature=ds,
-            date_publication=dp,
-            pdf_path=path,
-            fulltext_content=fulltxt,
-        )
-        db.add(acte)
-        db.flush()   # pour récupérer l'id sans commit à chaque fois
-
-        # journal d'audit : création via upload multiple
-        _log_acte_action(
-            db,
-            acte=acte,
-            user=user,
-            action="create",
-            detail="Création via upload multiple",
-        )
 
-        created_ids.append(acte.id)
+def _create_bulk_acte(db: Session, item: _BulkItem, user):
+    """Crée l'acte d'un item (dans le point de sauvegarde de l'appelant)."""
+    if item.staging_token:
+        # PDF déjà reçu par /admin/analyse-pdf : simple déplacement
+        staged = claim_staged(db, item.staging_token, user.id)
+        staged_path, sha256, fulltext = staged.path, staged.pdf_sha256, staged.fulltext
+        path = move_staged_into(db, staged, settings.UPLOAD_DIR)
+        item.moved = (path, staged_path)
+    else:
+        path, sha256, fulltext = item.stored.path, item.stored.sha256, None
 
-    db.commit()
+    data = item.data
+    ds, dp = item.dates
+    acte = Acte(
+        titre=data.titre,
+        type=data.type,
+        service=data.service,
+        date_signature=ds,
+        date_publication=dp,
+        pdf_path=path,
+    )
+    db.add(acte)
+    db.flush()   # pour récupérer l'id sans commit à chaque fois
 
-    return {
-        "detail": "created",
-        "count": len(created_ids),
-        "created": created_ids,
-    }
+    job = _start_extraction(db, acte, BULK, sha256, fulltext)
+
+    # journal d'audit : création via upload multiple
+    _log_acte_action(
+        db,
+        acte=acte,
+        user=user,
+        action="create",
+        detail="Création via upload multiple",
+    )
+    db.flush()
+
+    item.acte_id = acte.id
+    item.job_id = job.id if job else None
 
 
 # ---------- Admin : CRUD Actes (classique) ----------
@@ -363,39 +991,44 @@ def admin_list_actes(
     date_max: Optional[str] = Query(default=None),
     page: int = Query(default=1, ge=1),
     size: int = Query(default=10, ge=1, le=100),
+    fuzzy: bool = Query(default=False),
     db: Session = Depends(get_db),
     user=Depends(get_current_user),
 ):
     """
     Liste paginée des actes côté admin.
-    Filtres classiques + recherche sur fulltext_content (OCR).
+    Filtres classiques + recherche plein texte (titre, résumé, texte OCR,
+    voir search.py) : avec q, les actes sont classés par pertinence.
+    fuzzy=1 : recherche approchée sur le titre et le résumé (fautes de
+    frappe, OCR abîmé), classée par ressemblance.
     """
-    stmt = select(Acte)
+    stmt = select(Acte).options(ACTE_OUT_COLUMNS)
 
     conds = []
-    if q:
-        like = f"%{q}%"
-        conds.append(
-            or_(
-                Acte.titre.ilike(like),
-                Acte.resume.ilike(like),
-                Acte.fulltext_content.ilike(like),
-            )
-        )
+    order = []
+    if q and fuzzy:
+        set_fuzzy_threshold(db)
+        conds.append(fuzzy_match(q, Acte.titre, Acte.resume))
+        order.append(fuzzy_rank(q, Acte.titre, Acte.resume).desc())
+    elif q:
+        query = search_query(q)
+        conds.append(search_match(query))
+        order.append(search_rank(query).desc())
     if type:
         conds.append(Acte.type == type)
     if service:
         conds.append(Acte.service == service)
     if date_min:
-        conds.append(Acte.date_publication >= _parse_date(date_min))
+        conds.append(Acte.date_publication >= parse_date(date_min))
     if date_max:
-        conds.append(Acte.date_publication <= _parse_date(date_max))
+        conds.append(Acte.date_publication <= parse_date(date_max))
 
     if conds:
         stmt = stmt.where(and_(*conds))
 
     stmt = (
         stmt.order_by(
+            *order,
             Acte.date_publication.desc().nullslast(),
             Acte.created_at.desc(),
         )
@@ -413,40 +1046,53 @@ async def create_acte_one_shot(
     service: Optional[str] = Form(None),
     date_signature: Optional[str] = Form(None),
     date_publication: Optional[str] = Form(None),
-    pdf: UploadFile = File(...),
+    pdf: Optional[UploadFile] = File(None),
+    staging_token: Optional[str] = Form(None),
     db: Session = Depends(get_db),
     user=Depends(get_current_user),
 ):
     """
     Création d’un acte :
-    - sauvegarde le PDF sur disque
-    - OCR/parse le PDF pour avoir fulltext_content
-    - stocke tout en base
+    - sauvegarde le PDF sur disque, ou reprend le PDF déjà reçu par
+      /admin/analyse-pdf (staging_token, à la place du fichier)
+    - stocke l'acte en base (extraction_status = "pending")
+    - met l'OCR/parse du PDF en file (texte rempli par un worker),
+      sauf si l'analyse a déjà lu le texte intégral
+    Renvoie tout de suite l'id de l'acte et l'id du job d'extraction.
     """
+    if (pdf is None) == (not staging_token):
+        raise HTTPException(
+            status_code=400,
+            detail="Envoyer soit le PDF, soit le staging_token de son analyse.",
+        )
 
-    # lire les bytes pour OCR
-    raw_bytes = await pdf.read()
-    pdf.file.seek(0)
-
-    # sauvegarder le PDF sur disque
-    path = await save_pdf_validated(settings.UPLOAD_DIR, pdf)
+    date_sig = parse_date(date_signature)
+    date_pub = parse_date(date_publication)
 
-    # génère le texte intégral : texte natif ou OCR
-    fulltxt = extract_text_with_ocr_if_needed(raw_bytes)
+    if staging_token:
+        # PDF déjà reçu et analysé : simple déplacement, texte réutilisé
+        staged = claim_staged(db, staging_token, user.id)
+        sha256, fulltext = staged.pdf_sha256, staged.fulltext
+        path = move_staged_into(db, staged, settings.UPLOAD_DIR)
+    else:
+        # sauvegarder le PDF sur disque
+        stored = await store_pdf_validated(settings.UPLOAD_DIR, pdf)
+        path, sha256, fulltext = stored.path, stored.sha256, None
 
     acte = Acte(
         titre=titre,
         type=type,
         service=service,
-        date_signature=_parse_date(date_signature),
-        date_publication=_parse_date(date_publication),
+        date_signature=date_sig,
+        date_publication=date_pub,
         pdf_path=path,
-        fulltext_content=fulltxt,
     )
 
     db.add(acte)
     db.flush()  # pour avoir acte.id avant le commit
 
+    job = _start_extraction(db, acte, INTERACTIVE, sha256, fulltext)
+
     # journal d'audit : création depuis le formulaire simple
     _log_acte_action(
         db,
@@ -458,7 +1104,7 @@ async def create_acte_one_shot(
 
     db.commit()
     db.refresh(acte)
-    return {"id": acte.id, "detail": "created"}
+    return {"id": acte.id, "detail": "created", "job_id": job.id if job else None}
 
 
 @router.put("/actes/{acte_id}", response_model=ActeOut)
@@ -477,7 +1123,7 @@ async def admin_update_acte(
     Mise à jour d’un acte existant.
     Si un nouveau PDF est fourni :
     - remplace le fichier PDF sur disque
-    - refait l’OCR pour mettre à jour fulltext_content
+    - remet l’OCR en file pour mettre à jour le texte intégral
     """
     acte = db.get(Acte, acte_id)
     if not acte:
@@ -490,26 +1136,21 @@ async def admin_update_acte(
     if service is not None:
         acte.service = service
     if date_signature is not None:
-        acte.date_signature = _parse_date(date_signature)
+        acte.date_signature = parse_date(date_signature)
     if date_publication is not None:
-        acte.date_publication = _parse_date(date_publication)
+        acte.date_publication = parse_date(date_publication)
 
     if pdf is not None:
-        # lire les bytes pour OCR
-        raw_bytes = await pdf.read()
-        pdf.file.seek(0)
-
         # sauvegarder le nouveau fichier
-        new_path = await save_pdf_validated(settings.UPLOAD_DIR, pdf)
+        stored = await store_pdf_validated(settings.UPLOAD_DIR, pdf)
 
         # supprimer l'ancien fichier du disque
         _delete_file_if_exists(acte.pdf_path)
 
-        acte.pdf_path = new_path
+        acte.pdf_path = stored.path
 
-        # regénérer fulltext_content
-        fulltxt = extract_text_with_ocr_if_needed(raw_bytes)
-        acte.fulltext_content = fulltxt
+        # regénérer le texte intégral (worker)
+        _enqueue_extraction(db, acte, pdf_sha256=stored.sha256)
 
     # journal d'audit : mise à jour
     _log_acte_action(
@@ -558,6 +1199,16 @@ def admin_delete_acte(
 # ---------- Journal d'audit (Admin only) ----------
 
 
+def _audit_user_filter(user_email: str):
+    """
+    Entrées des utilisateurs dont l'e-mail contient user_email : les
+    utilisateurs sont trouvés par l'index trigrammes, puis leurs entrées
+    par l'index audit_logs.user_id (pas de parcours complet du journal).
+    """
+    users = select(User.id).where(User.email.ilike(like_pattern(user_email), escape="\\"))
+    return AuditLog.user_id.in_(users)
+
+
 @router.get("/audit", response_model=List[AuditEntryOut])
 @router.get("/audit-logs", response_model=List[AuditEntryOut])
 def list_audit_logs_admin(
@@ -586,8 +1237,7 @@ def list_audit_logs_admin(
 
     conds = []
     if user_email:
-        like = f"%{user_email}%"
-        conds.append(User.email.ilike(like))
+        conds.append(_audit_user_filter(user_email))
     if action:
         conds.append(AuditLog.action == action)
     if acte_id is not None:
@@ -644,8 +1294,7 @@ def export_audit_logs_admin(
 
     conds = []
     if user_email:
-        like = f"%{user_email}%"
-        conds.append(User.email.ilike(like))
+        conds.append(_audit_user_filter(user_email))
     if action:
         conds.append(AuditLog.action == action)
     if acte_id is not None:
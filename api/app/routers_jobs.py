@@ -0,0 +1,212 @@
+# api/app/routers_jobs.py
+from datetime import timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from .config import settings
+from .database import get_db
+from .models import Acte, IngestJob
+from .schemas import JobOut, ExtractionQueueOut, LaneQueueOut, ReextractIn, ReextractOut
+from .extraction_executor import extraction_executor
+from .lanes import LANES, INTERACTIVE
+from .backfill import REEXTRACT_KINDS, backfill_status, enqueue_reextraction
+from .auth import get_current_user, require_admin
+
+router = APIRouter(prefix="/admin", tags=["jobs"])
+
+
+@router.get("/extraction-queue", response_model=ExtractionQueueOut)
+def get_extraction_queue(
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Profondeur, temps d'attente et latence des files d'extraction, par
+    file de priorité (interactive / bulk) :
+    exécuteur de ce process API + jobs en attente pour les workers.
+    """
+    counts = {
+        (lane, st): n
+        for lane, st, n in db.query(IngestJob.lane, IngestJob.status, func.count(IngestJob.id))
+        .filter(IngestJob.status.in_(("pending", "running")))
+        .group_by(IngestJob.lane, IngestJob.status)
+        .all()
+    }
+    oldest = dict(
+        db.query(
+            IngestJob.lane,
+            func.extract("epoch", func.now() - func.min(IngestJob.created_at)),
+        )
+        .filter(IngestJob.status == "pending")
+        .group_by(IngestJob.lane)
+        .all()
+    )
+    # jobs terminés depuis une heure : attente avant un worker, latence totale
+    recent = {
+        lane: (wait, latency)
+        for lane, wait, latency in db.query(
+            IngestJob.lane,
+            func.avg(func.extract("epoch", IngestJob.started_at - IngestJob.created_at)),
+            func.avg(func.extract("epoch", IngestJob.finished_at - IngestJob.created_at)),
+        )
+        .filter(
+            IngestJob.finished_at.isnot(None),
+            IngestJob.finished_at > func.now() - timedelta(hours=1),
+        )
+        .group_by(IngestJob.lane)
+        .all()
+    }
+
+    def _seconds(value) -> Optional[float]:
+        return round(float(value), 3) if value is not None else None
+
+    executor = extraction_executor.stats()
+    lanes = []
+    for lane in LANES:
+        wait, latency = recent.get(lane, (None, None))
+        lanes.append(LaneQueueOut(
+            lane=lane,
+            **executor["lanes"][lane],
+            jobs_pending=counts.get((lane, "pending"), 0),
+            jobs_running=counts.get((lane, "running"), 0),
+            oldest_pending_seconds=_seconds(oldest.get(lane)),
+            jobs_avg_wait_seconds=_seconds(wait),
+            jobs_avg_latency_seconds=_seconds(latency),
+        ))
+
+    pending_ages = [a for a in oldest.values() if a is not None]
+    return ExtractionQueueOut(
+        workers=executor["workers"],
+        queue_max=executor["queue_max"],
+        queued=executor["queued"],
+        running=executor["running"],
+        completed=executor["completed"],
+        rejected=executor["rejected"],
+        jobs_pending=sum(l.jobs_pending for l in lanes),
+        jobs_running=sum(l.jobs_running for l in lanes),
+        oldest_pending_seconds=_seconds(max(pending_ages)) if pending_ages else None,
+        lanes=lanes,
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=JobOut)
+def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Suivi d'un job d'extraction (OCR) :
+    statut, progression (pages_done / pages_total), temps par page, erreur.
+    """
+    job = db.get(IngestJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    return _job_out(job)
+
+
+def _job_out(job: IngestJob) -> JobOut:
+    return JobOut(
+        id=job.id,
+        acte_id=job.acte_id,
+        status=job.status,
+        lane=job.lane or INTERACTIVE,
+        kind=job.kind or "extract",
+        attempts=job.attempts or 0,
+        pages_total=job.pages_total,
+        pages_done=job.pages_done or 0,
+        page_timings=job.page_timings or [],
+        error=job.error,
+        note=job.note,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobOut)
+def cancel_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Annulation d'une extraction :
+    - job en attente -> annulé tout de suite
+    - job en cours -> "cancel_requested" : le worker arrête l'OCR des pages
+      restantes et garde le texte déjà extrait (acte en "cancelled")
+    - job terminé -> 409
+    """
+    job = db.query(IngestJob).filter(IngestJob.id == job_id).with_for_update().first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    if job.status in ("done", "failed", "cancelled"):
+        raise HTTPException(status_code=409, detail=f"Job déjà terminé ({job.status})")
+
+    stale_before = func.now() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    stale = (
+        db.query(IngestJob.id)
+        .filter(IngestJob.id == job.id, IngestJob.heartbeat_at < stale_before)
+        .first()
+        is not None
+    )
+
+    if job.status == "pending" or stale:
+        # personne ne travaille dessus : annulation immédiate
+        job.status = "cancelled"
+        job.finished_at = func.now()
+        acte = db.get(Acte, job.acte_id) if job.acte_id is not None else None
+        # ré-extraction annulée : l'acte garde son texte actuel
+        if (
+            acte is not None
+            and acte.pdf_path == job.pdf_path
+            and job.kind not in REEXTRACT_KINDS
+        ):
+            acte.extraction_status = "cancelled"
+    else:
+        job.status = "cancel_requested"
+
+    db.commit()
+    db.refresh(job)
+    return _job_out(job)
+
+
+# ---------- Ré-extraction (nouvelle version de l'extraction) ----------
+
+
+@router.get("/reextract", response_model=ReextractOut)
+def get_reextract_status(
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """
+    Avancement de la ré-extraction vers la version courante
+    (actes à jour / à refaire, jobs de ré-extraction par statut).
+    """
+    return ReextractOut(**backfill_status(db))
+
+
+@router.post("/reextract", response_model=ReextractOut)
+def start_reextract(
+    payload: ReextractIn,
+    db: Session = Depends(get_db),
+    user=Depends(require_admin),
+):
+    """
+    Complète la file des ré-extractions (file "bulk", faites par les
+    workers) jusqu'à BACKFILL_MAX_PENDING jobs en cours, plus anciens
+    actes d'abord. Peut être rappelé sans risque : un acte n'a qu'un job
+    par version. `python -m app.backfill` fait la même chose en boucle
+    jusqu'à la fin.
+    """
+    enqueued = enqueue_reextraction(
+        db,
+        overwrite_metadata=payload.overwrite_metadata,
+        limit=payload.limit,
+    )
+    return ReextractOut(**backfill_status(db), enqueued=enqueued)
@@ -1,8 +1,8 @@
 # api/app/schemas.py
 from datetime import date, datetime
-from typing import Optional, Literal
+from typing import Optional, Literal, List
 
-from pydantic import BaseModel, EmailStr, constr
+from pydantic import BaseModel, EmailStr, Field, constr
 
 
 class ActeBase(BaseModel):
@@ -23,6 +23,8 @@ class ActeOut(ActeBase):
     id: int
     pdf_path: str
     created_at: datetime
+    extraction_status: Optional[str] = None
+    extraction_note: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -109,6 +111,129 @@ class AnalysePDFOut(BaseModel):
     date_auto: Optional[str] = None
     service_auto: Optional[str] = None
     type_auto: Optional[str] = None
+    # mode "métadonnées" : nb de pages lues / nb de pages du PDF
+    pages_analysed: Optional[int] = None
+    pages_total: Optional[int] = None
+    # jeton à renvoyer à la création de l'acte (au lieu du PDF)
+    staging_token: Optional[str] = None
+    staging_expires_at: Optional[datetime] = None
+
+
+# ====== Envoi reprenable par morceaux (/admin/uploads) ======
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: int                        # taille totale annoncée (octets)
+    sha256: Optional[str] = None     # empreinte du fichier complet (hex), vérifiée à la fin
+
+
+class UploadSessionOut(BaseModel):
+    upload_id: str
+    offset: int                      # octets déjà reçus : prochain morceau à partir d'ici
+    size: int
+    chunk_max_bytes: int
+    expires_at: datetime
+
+
+# ====== Jobs d'extraction (OCR en tâche de fond) ======
+
+class PageTimingOut(BaseModel):
+    page: int
+    seconds: float
+
+
+class LaneQueueOut(BaseModel):
+    """
+    Une file de priorité ("interactive" / "bulk") :
+    - exécuteur de l'API : file, attente et latence (attente + analyse)
+    - jobs des workers : en attente, âge du plus ancien, et sur la
+      dernière heure attente moyenne / latence moyenne (création -> fin)
+    """
+    lane: str
+    queued: int
+    running: int
+    completed: int
+    rejected: int
+    avg_wait_seconds: float
+    last_wait_seconds: float
+    avg_run_seconds: float
+    avg_latency_seconds: float
+    jobs_pending: int = 0
+    jobs_running: int = 0
+    oldest_pending_seconds: Optional[float] = None
+    jobs_avg_wait_seconds: Optional[float] = None
+    jobs_avg_latency_seconds: Optional[float] = None
+
+
+class ExtractionQueueOut(BaseModel):
+    """
+    Charge de l'extraction (GET /admin/extraction-queue) :
+    - exécuteur de l'API (analyses de PDF) : totaux toutes files
+    - file des workers (ingest_jobs) : jobs en attente, âge du plus ancien
+    - détail par file de priorité dans `lanes`
+    """
+    workers: int
+    queue_max: int
+    queued: int
+    running: int
+    completed: int
+    rejected: int
+    jobs_pending: int
+    jobs_running: int
+    oldest_pending_seconds: Optional[float] = None
+    lanes: List[LaneQueueOut] = []
+
+
+class JobOut(BaseModel):
+    """
+    Etat d'un job d'extraction.
+    Utilisé par GET /admin/jobs/{job_id}.
+    """
+    id: int
+    acte_id: Optional[int] = None
+    status: str
+    lane: str = "interactive"
+    kind: str = "extract"
+    attempts: int
+    pages_total: Optional[int] = None
+    pages_done: int = 0
+    page_timings: List[PageTimingOut] = []
+    error: Optional[str] = None
+    note: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ReextractIn(BaseModel):
+    """
+    Payload pour POST /admin/reextract.
+    - overwrite_metadata : type / service détectés remplacent l'existant
+      (sinon ils ne complètent que les champs vides)
+    - limit : nombre max de jobs créés par cet appel
+    """
+    overwrite_metadata: bool = False
+    limit: Optional[int] = Field(default=None, ge=1)
+
+
+class ReextractOut(BaseModel):
+    """
+    Avancement de la ré-extraction vers la version courante.
+    Utilisé par GET / POST /admin/reextract.
+    """
+    version: str
+    actes: int
+    up_to_date: int
+    stale: int
+    jobs_pending: int
+    jobs_running: int
+    jobs_done: int
+    jobs_failed: int
+    jobs_cancelled: int
+    enqueued: int = 0
 
 
 # ====== Envoi public par e-mail d'un acte ======
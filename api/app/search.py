@@ -0,0 +1,212 @@
+# app/search.py
+from typing import List
+import re
+
+from sqlalchemy import and_, case, func, literal_column, null, or_, select, text
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import Acte, ActePage
+
+
+# ==================================================
+# Recherche plein texte (PostgreSQL)
+# ==================================================
+#
+# actes.search_vector (tsvector) : titre (poids A), résumé (B) et texte
+# intégral (C, toutes les pages de acte_pages), configuration
+# "french_unaccent" (racinisation française, accents et majuscules
+# ignorés : "deliberations" trouve "Délibération").
+# Tenu à jour par des triggers (acte modifié, pages remplacées), index GIN
+# (voir main._ensure_search_vector). Chaque page a aussi son tsvector
+# (acte_pages.search_vector, sans index : lu par clé primaire) pour
+# retrouver la page d'un acte trouvé.
+# Les requêtes passent par websearch_to_tsquery : syntaxe "à la Google"
+# ("expression exacte", -exclu, or), jamais d'erreur de syntaxe.
+
+TS_CONFIG = "french_unaccent"
+
+_ts_config = literal_column(f"'{TS_CONFIG}'::regconfig")
+
+
+def search_query(q: str):
+    """tsquery d'une recherche saisie par un utilisateur."""
+    return func.websearch_to_tsquery(_ts_config, q)
+
+
+def search_match(query):
+    """Condition : l'acte correspond à la requête (utilise l'index GIN)."""
+    return Acte.search_vector.op("@@")(query)
+
+
+def search_rank(query):
+    """
+    Pertinence (ts_rank) : un mot du titre pèse plus qu'un mot du texte
+    OCR ; normalisation 1 (divisé par 1 + log(longueur)) pour que les
+    longs documents ne passent pas devant juste parce qu'ils sont longs.
+    """
+    return func.ts_rank(Acte.search_vector, query, 1)
+
+
+def _any_lexeme_query(lexemes: List[str]):
+    """tsquery "un des radicaux" ('deliber' | 'piscin'), radicaux déjà normalisés."""
+    quoted = (
+        "'" + lex.replace("\\", "\\\\").replace("'", "''") + "'" for lex in lexemes
+    )
+    return func.to_tsquery(literal_column("'simple'::regconfig"), " | ".join(quoted))
+
+
+def best_page(acte_id, lexemes: List[str]):
+    """
+    Sous-requête LATERAL (page, text) : page de l'acte acte_id qui contient
+    le plus de radicaux cherchés (ts_rank), sinon sa première page avec
+    page = NULL. Une page seule ne contient pas forcément tous les mots
+    d'un acte trouvé : on cherche donc n'importe lequel d'entre eux.
+    page = NULL aussi pour un texte d'avant le découpage par page (page_no 0).
+    """
+    order = []
+    page = null()
+    if lexemes:
+        any_term = _any_lexeme_query(lexemes)
+        matched = ActePage.search_vector.op("@@")(any_term)
+        page = case((and_(matched, ActePage.page_no > 0), ActePage.page_no))
+        order = [
+            matched.desc().nullslast(),
+            func.ts_rank(ActePage.search_vector, any_term).desc().nullslast(),
+        ]
+    return (
+        select(page.label("page"), ActePage.text)
+        .where(ActePage.acte_id == acte_id)
+        .order_by(*order, ActePage.page_no)
+        .limit(1)
+        .lateral("page_hit")
+    )
+
+
+# ==================================================
+# Extraits surlignés (ts_headline)
+# ==================================================
+#
+# L'extrait est fait par PostgreSQL : le texte OCR (souvent des centaines
+# de Ko) ne quitte jamais la base. ts_headline analyse tout le texte
+# qu'on lui donne : il ne reçoit qu'une fenêtre autour du premier radical
+# trouvé. Ce radical est cherché dans le texte brut par une expression
+# régulière qui accepte accents et majuscules ("deliber" trouve
+# "DÉLIBÉRATION") : pas de f_unaccent() ni de lower() sur tout le texte.
+
+HEADLINE_WINDOW = 300  # caractères de part et d'autre du premier mot trouvé
+
+# deux fragments d'environ 18 mots (~240 caractères en tout)
+_HEADLINE_OPTIONS = (
+    'MaxFragments=2, MaxWords=18, MinWords=6, '
+    'StartSel=<mark>, StopSel=</mark>, FragmentDelimiter=" … "'
+)
+
+_ACCENTS = {
+    "a": "aàâäáã",
+    "c": "cç",
+    "e": "eéèêë",
+    "i": "iîïíì",
+    "n": "nñ",
+    "o": "oôöóò",
+    "u": "uùûüú",
+    "y": "yÿ",
+}
+
+
+def query_lexemes(db: Session, q: str) -> List[str]:
+    """
+    Radicaux cherchés par la requête, tels qu'indexés
+    ("Délibérations piscines" -> deliber, piscin), sans les mots exclus.
+    """
+    tree = db.execute(select(func.querytree(search_query(q)))).scalar() or ""
+    lexemes = [m.replace("''", "'") for m in re.findall(r"'((?:[^']|'')+)'", tree)]
+    return list(dict.fromkeys(lexemes))
+
+
+def _lexeme_pattern(lexeme: str) -> str:
+    """Expression régulière (PostgreSQL) d'un radical, accents et majuscules compris."""
+    parts = []
+    i = 0
+    while i < len(lexeme):
+        if lexeme[i:i + 2] in ("oe", "ae"):
+            # unaccent : œ -> oe, æ -> ae
+            ligature = "œŒ" if lexeme[i] == "o" else "æÆ"
+            pair = _lexeme_pattern(lexeme[i]) + _lexeme_pattern("e")
+            parts.append(f"(?:{pair}|[{ligature}])")
+            i += 2
+            continue
+        variants = _ACCENTS.get(lexeme[i], lexeme[i])
+        variants += variants.upper()
+        parts.append(f"[{variants}]" if len(set(variants)) > 1 else re.escape(lexeme[i]))
+        i += 1
+    return "".join(parts)
+
+
+def search_headline(document, query, lexemes: List[str]):
+    """
+    Extrait de document autour des mots trouvés, en HTML : texte échappé,
+    mots trouvés entre <mark>. Début du document si aucun mot n'y figure
+    (acte trouvé par son titre ou son résumé).
+    """
+    start = 1
+    if lexemes:
+        pattern = "|".join(_lexeme_pattern(lex) for lex in lexemes)
+        found = func.regexp_instr(document, pattern)
+        start = func.greatest(found - HEADLINE_WINDOW, 1)
+    window = func.substr(document, start, 2 * HEADLINE_WINDOW)
+    escaped = func.replace(
+        func.replace(func.replace(window, "&", "&amp;"), "<", "&lt;"), ">", "&gt;"
+    )
+    return func.ts_headline(_ts_config, escaped, query, _HEADLINE_OPTIONS)
+
+
+# ==================================================
+# Filtres "contient" et recherche approchée (pg_trgm)
+# ==================================================
+#
+# Index GIN trigrammes (gin_trgm_ops) sur f_unaccent(titre),
+# f_unaccent(resume) et users.email (voir main._ensure_trigram_indexes) :
+# - "contient" : ILIKE '%...%' sans tenir compte des accents, servi par
+#   l'index (à partir de 3 caractères)
+# - recherche approchée : opérateur <% (word_similarity), qui tolère les
+#   fautes de frappe et les mots abîmés par l'OCR ("deliberatlon"),
+#   résultats classés par similarité
+# f_unaccent : unaccent() déclarée IMMUTABLE, seule façon de l'indexer.
+# Seuil de ressemblance : SEARCH_FUZZY_THRESHOLD (0,5 : "dlibration",
+# "stati0nnement", "subvenlion" trouvent le bon mot sans trop de bruit).
+
+
+def like_pattern(q: str) -> str:
+    """Motif ILIKE "contient q" (%, _ et \\ saisis par l'utilisateur échappés)."""
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def contains(q: str, *columns):
+    """Au moins une des colonnes contient q (sans tenir compte de la casse ni des accents)."""
+    pattern = func.f_unaccent(like_pattern(q))
+    return or_(*(func.f_unaccent(col).ilike(pattern, escape="\\") for col in columns))
+
+
+def set_fuzzy_threshold(db: Session):
+    """
+    Seuil de l'opérateur <% pour la transaction en cours
+    (SEARCH_FUZZY_THRESHOLD, un peu plus tolérant que le 0,6 par défaut de pg_trgm).
+    """
+    db.execute(
+        text("SELECT set_config('pg_trgm.word_similarity_threshold', :t, true)"),
+        {"t": str(settings.SEARCH_FUZZY_THRESHOLD)},
+    )
+
+
+def fuzzy_match(q: str, *columns):
+    """q ressemble à un mot (ou une suite de mots) d'une des colonnes."""
+    folded = func.f_unaccent(q)
+    return or_(*(folded.op("<%")(func.f_unaccent(col)) for col in columns))
+
+
+def fuzzy_rank(q: str, *columns):
+    """Meilleure similarité (0..1) entre q et les colonnes."""
+    folded = func.f_unaccent(q)
+    return func.greatest(*(func.word_similarity(folded, func.f_unaccent(col)) for col in columns))
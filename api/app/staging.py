@@ -0,0 +1,113 @@
+# app/staging.py
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import os
+import secrets
+import shutil
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import StagedUpload
+from .utils import StoredPdf, ensure_dir, remove_quietly, unique_upload_path
+
+
+# ==================================================
+# Dépôt en deux temps : analyse, puis création par jeton
+# ==================================================
+#
+# Avant : le même PDF était envoyé deux fois, à /admin/analyse-pdf
+# (pré-remplissage) puis à /admin/actes (création), et extrait deux fois.
+# Maintenant l'analyse garde le fichier reçu (et le texte intégral s'il a
+# été lu en entier) sous un jeton valable STAGING_TTL_SECONDS ; la
+# création envoie ce jeton : le fichier est simplement déplacé dans
+# UPLOAD_DIR et le texte réutilisé.
+
+
+def staging_dir() -> str:
+    """Dossier des PDF en attente (sous UPLOAD_DIR : déplacement sans copie)."""
+    path = os.path.join(settings.UPLOAD_DIR, ".staging")
+    ensure_dir(path)
+    return path
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def stage_upload(
+    db: Session,
+    pdf: StoredPdf,
+    filename: Optional[str],
+    user_id: Optional[int],
+    fulltext: Optional[str] = None,
+) -> StagedUpload:
+    """Enregistre un PDF analysé sous un nouveau jeton."""
+    staged = StagedUpload(
+        token=secrets.token_urlsafe(32),
+        user_id=user_id,
+        path=pdf.path,
+        filename=filename,
+        size_bytes=pdf.size,
+        pdf_sha256=pdf.sha256,
+        fulltext=fulltext,
+        expires_at=_now() + timedelta(seconds=settings.STAGING_TTL_SECONDS),
+    )
+    db.add(staged)
+    db.commit()
+    return staged
+
+
+def purge_expired_staging(db: Session) -> int:
+    """Supprime les dépôts expirés (fichiers + lignes). Renvoie leur nombre."""
+    expired = db.execute(
+        select(StagedUpload)
+        .where(StagedUpload.expires_at <= _now())
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    for staged in expired:
+        remove_quietly(staged.path)
+        db.delete(staged)
+    db.commit()
+    return len(expired)
+
+
+def claim_staged(db: Session, token: str, user_id: Optional[int]) -> StagedUpload:
+    """
+    Dépôt correspondant au jeton, verrouillé jusqu'au commit de l'appelant
+    (deux créations avec le même jeton : la seconde reçoit 404).
+    - 404 : jeton inconnu, déjà utilisé, ou d'un autre utilisateur
+    - 410 : expiré (le PDF doit être renvoyé)
+    """
+    staged = db.execute(
+        select(StagedUpload)
+        .where(StagedUpload.token == token)
+        .with_for_update()
+    ).scalar_one_or_none()
+    if staged is None or (staged.user_id is not None and staged.user_id != user_id):
+        raise HTTPException(status_code=404, detail="Analyse introuvable : renvoyez le PDF")
+
+    # (le ménage est fait par purge_expired_staging, pas dans la
+    # transaction de l'appelant)
+    if staged.expires_at <= _now() or not os.path.exists(staged.path):
+        raise HTTPException(status_code=410, detail="Analyse expirée : renvoyez le PDF")
+    return staged
+
+
+def move_staged_into(db: Session, staged: StagedUpload, upload_dir: str) -> str:
+    """
+    Déplace le PDF du dépôt dans upload_dir (nom unique, comme un upload)
+    et supprime le dépôt (dans la transaction de l'appelant).
+    """
+    ensure_dir(upload_dir)
+    dest = unique_upload_path(upload_dir, staged.filename)
+    try:
+        # simple rename sur le même disque, qui remplace le fichier réservé
+        shutil.move(staged.path, dest)
+    except BaseException:
+        remove_quietly(dest)
+        raise
+    db.delete(staged)
+    return dest
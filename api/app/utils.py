@@ -1,5 +1,11 @@
 import os
+import hashlib
+import tempfile
+from datetime import datetime
 from pathlib import Path
+from typing import NamedTuple, Optional
+
+import aiofiles
 from fastapi import UploadFile, HTTPException
 from .config import settings
 
@@ -8,46 +14,134 @@ PDF_MAGIC = b"%PDF-"
 def ensure_dir(path: str):
     Path(path).mkdir(parents=True, exist_ok=True)
 
-async def save_pdf_validated(upload_dir: str, file: UploadFile) -> str:
+def _check_pdf_type(file: UploadFile):
     # Vérif rapide MIME/extension
     if file.content_type not in ("application/pdf", "application/x-pdf") and not (file.filename or "").lower().endswith(".pdf"):
         raise HTTPException(status_code=415, detail="Only PDF files are allowed")
 
-    ensure_dir(upload_dir)
+class StoredPdf(NamedTuple):
+    """PDF reçu et écrit sur disque : chemin, taille (octets), SHA-256 (hex)."""
+    path: str
+    size: int
+    sha256: str
+
+CHUNK_SIZE = 1024 * 1024
+
+async def _stream_pdf_to(file: UploadFile, dest_path: str) -> StoredPdf:
+    """
+    Une seule passe sur le fichier envoyé, par blocs de CHUNK_SIZE :
+    signature %PDF-, taille <= MAX_UPLOAD_MB, SHA-256 et écriture
+    asynchrone (aiofiles) dans dest_path. Rien n'est gardé en mémoire.
+    En cas de refus (415 / 413), le fichier partiel est supprimé.
+    """
+    max_bytes = int(settings.MAX_UPLOAD_MB) * 1024 * 1024
+    h = hashlib.sha256()
+    total = 0
+
+    try:
+        async with aiofiles.open(dest_path, "wb") as out:
+            while True:
+                chunk = await file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if total == 0 and not chunk.startswith(PDF_MAGIC):
+                    raise HTTPException(status_code=415, detail="Invalid PDF signature")
+                total += len(chunk)
+                if total > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"File too large (>{settings.MAX_UPLOAD_MB} MB)")
+                h.update(chunk)
+                await out.write(chunk)
+        if total == 0:
+            raise HTTPException(status_code=415, detail="Invalid PDF signature")
+    except BaseException:
+        remove_quietly(dest_path)
+        raise
+
+    return StoredPdf(dest_path, total, h.hexdigest())
 
-    # Nom unique
-    filename = file.filename or "document.pdf"
+async def spool_pdf_validated(file: UploadFile, dir: Optional[str] = None) -> StoredPdf:
+    """
+    Reçoit un PDF à analyser sans l'enregistrer comme acte : mêmes contrôles
+    que save_pdf_validated, écrit dans un fichier temporaire (dans `dir`
+    si donné). L'extraction travaille ensuite sur ce fichier ; à supprimer
+    par l'appelant (remove_quietly).
+    """
+    _check_pdf_type(file)
+    if dir:
+        ensure_dir(dir)
+    fd, tmp_path = tempfile.mkstemp(prefix="upload_", suffix=".pdf", dir=dir)
+    os.close(fd)
+    return await _stream_pdf_to(file, tmp_path)
+
+def remove_quietly(path: Optional[str]):
+    """Supprime un fichier temporaire s'il existe encore."""
+    if path:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def unique_upload_path(upload_dir: str, filename: Optional[str]) -> str:
+    """
+    Nom unique dans upload_dir, réservé tout de suite : le fichier (vide)
+    est créé avec O_CREAT | O_EXCL. Deux envois simultanés du même nom
+    (dépôt en masse) ne peuvent pas obtenir le même chemin, même si
+    l'écriture du PDF ne commence que plus tard. Le fichier est à remplir,
+    ou à supprimer en cas d'échec, par l'appelant.
+    """
+    filename = filename or "document.pdf"
     base, ext = os.path.splitext(filename)
     if ext.lower() != ".pdf":
         ext = ".pdf"
     final = base + ext
     i = 1
-    while os.path.exists(os.path.join(upload_dir, final)):
-        final = f"{base}_{i}{ext}"
-        i += 1
-    dest_path = os.path.join(upload_dir, final)
+    while True:
+        path = os.path.join(upload_dir, final)
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+        except FileExistsError:
+            final = f"{base}_{i}{ext}"
+            i += 1
+            continue
+        os.close(fd)
+        return path
 
-    max_bytes = int(settings.MAX_UPLOAD_MB) * 1024 * 1024
-    total = 0
+async def store_pdf_validated(upload_dir: str, file: UploadFile) -> StoredPdf:
+    """Enregistre un PDF dans upload_dir (nom unique) ; renvoie aussi taille et SHA-256."""
+    _check_pdf_type(file)
 
-    with open(dest_path, "wb") as out:
-        first = await file.read(1024)
-        total += len(first)
-        if not first.startswith(PDF_MAGIC):
-            out.close()
-            os.remove(dest_path)
-            raise HTTPException(status_code=415, detail="Invalid PDF signature")
-        out.write(first)
-
-        while True:
-            chunk = await file.read(1024 * 1024)
-            if not chunk:
-                break
-            total += len(chunk)
-            if total > max_bytes:
-                out.close()
-                os.remove(dest_path)
-                raise HTTPException(status_code=413, detail=f"File too large (>{settings.MAX_UPLOAD_MB} MB)")
-            out.write(chunk)
-
-    return dest_path
+    ensure_dir(upload_dir)
+    return await _stream_pdf_to(file, unique_upload_path(upload_dir, file.filename))
+
+async def save_pdf_validated(upload_dir: str, file: UploadFile) -> str:
+    return (await store_pdf_validated(upload_dir, file)).path
+
+def parse_date(s: Optional[str]):
+    """
+    Accepte :
+      - JJ/MM/AAAA
+      - JJ/MM/AA (devient JJ/MM/20AA)
+      - AAAA-MM-JJ (format HTML <input type="date">)
+    """
+    if not s:
+        return None
+    s = s.strip()
+    try:
+        if "/" in s:
+            parts = s.split("/")
+            if len(parts) != 3:
+                raise ValueError("format inattendu")
+            d_str, m_str, y_str = [p.strip() for p in parts]
+            d = int(d_str)
+            m = int(m_str)
+            if len(y_str) == 2:
+                # JJ/MM/AA -> JJ/MM/20AA
+                y = 2000 + int(y_str)
+            else:
+                y = int(y_str)
+            return datetime(year=y, month=m, day=d).date()
+
+        # Sinon on suppose un format ISO AAAA-MM-JJ
+        return datetime.fromisoformat(s).date()
+    except ValueError as e:
+        raise ValueError(f"Format de date invalide: {s}. Attendu JJ/MM/AAAA, JJ/MM/AA ou AAAA-MM-JJ.") from e
@@ -0,0 +1,358 @@
+# app/worker.py
+# Worker d'extraction (OCR) des actes.
+#
+# Lancement :  python -m app.worker [--once]
+#
+# Consomme la table ingest_jobs avec SELECT ... FOR UPDATE SKIP LOCKED :
+# plusieurs workers (sur plusieurs machines) peuvent tourner en parallèle
+# sans jamais prendre le même job.
+from datetime import timedelta
+from typing import Optional, Dict
+import argparse
+import os
+import socket
+import time
+
+from sqlalchemy import select, or_, and_, case
+from sqlalchemy.sql import func
+
+from .config import settings
+from .database import Base, engine, SessionLocal
+from .models import Acte, IngestJob, AuditLog
+from .models_refs import load_known_refs
+from .acte_pages import acte_text, save_pages
+from .extraction_cache import extract_cached, extraction_version
+from .pdf_utils import ExtractionResult, guess_metadata_from_text
+from .ocr_engine import shutdown_ocr_pool
+from .lanes import LANES, LaneScheduler
+from .backfill import REEXTRACT_KINDS, REEXTRACT_METADATA
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# intervalle minimal (s) entre deux lectures du statut du job pendant l'OCR
+CANCEL_CHECK_SECONDS = 2.0
+
+
+# choix de la file servie (partage pondéré interactive / bulk, voir lanes.py)
+_lane_scheduler = LaneScheduler()
+
+
+def _stale():
+    """Condition SQL d'un job "running" dont le worker ne donne plus signe de vie."""
+    stale_before = func.now() - timedelta(seconds=settings.JOB_STALE_SECONDS)
+    return and_(IngestJob.status == "running", IngestJob.heartbeat_at < stale_before)
+
+
+def _claimable():
+    """Condition SQL d'un job réservable."""
+    return or_(
+        IngestJob.status == "pending",
+        and_(_stale(), IngestJob.attempts < settings.JOB_MAX_ATTEMPTS),
+    )
+
+
+def _fail_exhausted_jobs(db) -> int:
+    """
+    Jobs abandonnés (worker arrêté en pleine extraction) qui ont déjà
+    épuisé leurs JOB_MAX_ATTEMPTS : plus réservables, ils resteraient
+    "running" pour toujours. Passés en "failed", l'acte aussi (sauf
+    ré-extraction : l'ancien texte reste valable, comme dans _fail_job).
+    """
+    jobs = db.execute(
+        select(IngestJob)
+        .where(_stale(), IngestJob.attempts >= settings.JOB_MAX_ATTEMPTS)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    for job in jobs:
+        job.status = "failed"
+        job.error = (
+            f"Worker sans nouvelles depuis plus de {settings.JOB_STALE_SECONDS} s, "
+            f"{job.attempts} tentatives épuisées"
+        )
+        job.finished_at = func.now()
+        acte = db.get(Acte, job.acte_id) if job.acte_id is not None else None
+        if acte is not None and acte.pdf_path == job.pdf_path and job.kind not in REEXTRACT_KINDS:
+            acte.extraction_status = "failed"
+    if jobs:
+        db.commit()
+    return len(jobs)
+
+
+def _waiting_lanes(db) -> Dict[str, float]:
+    """{file: attente (s) de son plus vieux job réservable}, files non vides."""
+    rows = db.execute(
+        select(
+            IngestJob.lane,
+            func.extract("epoch", func.now() - func.min(IngestJob.created_at)),
+        )
+        .where(_claimable())
+        .group_by(IngestJob.lane)
+    ).all()
+    return {lane: float(age or 0) for lane, age in rows if lane in LANES}
+
+
+def claim_next_job() -> Optional[int]:
+    """
+    Réserve le prochain job à traiter :
+    - un job "pending"
+    - ou un job "running" dont le worker ne donne plus signe de vie
+      (heartbeat plus vieux que JOB_STALE_SECONDS)
+    La file (interactive / bulk) est choisie par _lane_scheduler ; si le job
+    visé vient d'être pris par un autre worker, on se rabat sur n'importe
+    quelle file. Dans une file, les nouveaux PDF passent avant les
+    ré-extractions (backfill.py). Au passage, les jobs abandonnés sans
+    tentative restante passent en "failed" (_fail_exhausted_jobs).
+    Renvoie l'id du job réservé, ou None si la file est vide.
+    """
+    with SessionLocal() as db:
+        _fail_exhausted_jobs(db)
+        lane = _lane_scheduler.pick(_waiting_lanes(db))
+
+        def first_claimable(*criteria):
+            stmt = (
+                select(IngestJob)
+                .where(_claimable(), *criteria)
+                .order_by(case((IngestJob.kind.in_(REEXTRACT_KINDS), 1), else_=0), IngestJob.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            return db.execute(stmt).scalars().first()
+
+        job = first_claimable(IngestJob.lane == lane) if lane else None
+        if job is None:
+            job = first_claimable()
+        if job is None:
+            return None
+
+        job.status = "running"
+        job.attempts = (job.attempts or 0) + 1
+        job.worker = WORKER_ID
+        job.started_at = func.now()
+        job.heartbeat_at = func.now()
+        job.finished_at = None
+        job.pages_total = None
+        job.pages_done = 0
+        job.page_timings = []
+        job.error = None
+        job.note = None
+        db.commit()
+        return job.id
+
+
+def _record_page(job_id: int, page_no: int, total: int, seconds: float):
+    """Met à jour la progression du job après chaque page OCRisée."""
+    with SessionLocal() as db:
+        job = db.get(IngestJob, job_id)
+        if job is None:
+            return
+        timings = list(job.page_timings or [])
+        timings.append({"page": page_no, "seconds": round(seconds, 3)})
+        job.page_timings = timings
+        job.pages_total = total
+        job.pages_done = len(timings)
+        job.heartbeat_at = func.now()
+        db.commit()
+
+
+class _CancelCheck:
+    """
+    should_stop() passé à l'OCR : relit le statut du job (au plus toutes
+    les CANCEL_CHECK_SECONDS) pour voir si un admin a demandé l'annulation.
+    """
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.cancelled = False
+        self._last_check = 0.0
+
+    def __call__(self) -> bool:
+        now = time.monotonic()
+        if self.cancelled or now - self._last_check < CANCEL_CHECK_SECONDS:
+            return self.cancelled
+        self._last_check = now
+        with SessionLocal() as db:
+            status = db.execute(
+                select(IngestJob.status).where(IngestJob.id == self.job_id)
+            ).scalar()
+        self.cancelled = status in ("cancel_requested", "cancelled")
+        return self.cancelled
+
+
+def run_job(job_id: int):
+    """
+    Traite un job réservé :
+    - lit le PDF déjà stocké sur disque
+    - extrait le texte (natif ou OCR, ou cache d'extraction), dans le
+      budget du document (EXTRACTION_MAX_PAGES / EXTRACTION_MAX_SECONDS)
+    - met à jour l'acte (texte page par page dans acte_pages + extraction_status)
+    Budget atteint : le texte partiel est gardé (statut "partial" + note).
+    Annulation par un admin : le texte déjà extrait est gardé, statut "cancelled".
+    Ré-extraction (backfill) : voir _apply_reextraction.
+    En cas d'erreur, le job repasse en "pending" tant qu'il reste des
+    tentatives (JOB_MAX_ATTEMPTS), sinon il passe en "failed".
+    """
+    with SessionLocal() as db:
+        job = db.get(IngestJob, job_id)
+        pdf_path = job.pdf_path
+        pdf_sha256 = job.pdf_sha256
+
+    cancel_check = _CancelCheck(job_id)
+    try:
+        # extraction directement depuis le fichier : le PDF n'est pas chargé en mémoire.
+        # Si le même PDF est déjà passé par /admin/analyse-pdf, le texte vient du cache.
+        with SessionLocal() as db:
+            result = extract_cached(
+                db,
+                pdf_path,
+                pdf_sha256=pdf_sha256,
+                on_page=lambda page_no, total, seconds: _record_page(
+                    job_id, page_no, total, seconds
+                ),
+                should_stop=cancel_check,
+            )
+    except Exception as e:
+        _fail_job(job_id, f"{type(e).__name__}: {e}")
+        return
+
+    with SessionLocal() as db:
+        job = db.get(IngestJob, job_id)
+        acte = db.get(Acte, job.acte_id) if job.acte_id is not None else None
+
+        if cancel_check.cancelled and result.partial:
+            status = "cancelled"
+        elif result.partial:
+            status = "partial"
+        else:
+            status = "done"
+
+        # l'acte a pu être supprimé ou son PDF remplacé entre-temps
+        if acte is None or acte.pdf_path != job.pdf_path:
+            job.status = "failed"
+            job.error = "Acte supprimé ou PDF remplacé pendant l'extraction"
+        elif job.kind in REEXTRACT_KINDS:
+            _apply_reextraction(db, job, acte, result, status)
+        else:
+            save_pages(db, acte.id, result.numbered_pages())
+            acte.extraction_status = status
+            acte.extraction_note = result.note
+            acte.extraction_version = (
+                extraction_version(partial=status == "partial")
+                if status != "cancelled" else None
+            )
+            job.status = "cancelled" if status == "cancelled" else "done"
+            job.note = result.note
+
+        job.finished_at = func.now()
+        db.commit()
+
+
+def _apply_reextraction(db, job: IngestJob, acte: Acte, result: ExtractionResult, status: str):
+    """
+    Résultat d'une ré-extraction (backfill.py) :
+    - annulée : l'acte n'est pas modifié
+    - texte incomplet alors que l'ancien était complet : l'ancien est gardé
+    - type / service détectés : complètent les champs vides, ou remplacent
+      l'existant pour un job "reextract_metadata" (journal d'audit)
+    """
+    if status == "cancelled":
+        job.status = "cancelled"
+        job.note = result.note
+        return
+
+    if status == "partial" and acte.extraction_status == "done":
+        job.note = f"{result.note} ; ancien texte complet conservé"
+        text = acte_text(db, acte.id)
+    else:
+        save_pages(db, acte.id, result.numbered_pages())
+        acte.extraction_status = status
+        acte.extraction_note = result.note
+        job.note = result.note
+        text = result.text
+    acte.extraction_version = extraction_version(partial=status == "partial")
+
+    known_types, known_services = load_known_refs(db)
+    _, service_auto, type_auto = guess_metadata_from_text(
+        text,
+        known_services=known_services,
+        known_types=known_types,
+    )
+    overwrite = job.kind == REEXTRACT_METADATA
+    changed = []
+    for field, detected in (("type", type_auto), ("service", service_auto)):
+        current = getattr(acte, field)
+        if detected and detected != current and (overwrite or not current):
+            changed.append(f"{field} : {current or '-'} -> {detected}")
+            setattr(acte, field, detected)
+    if changed:
+        db.add(AuditLog(
+            acte_id=acte.id,
+            user_id=None,
+            action="update",
+            detail=f"Ré-extraction ({acte.extraction_version}) : " + ", ".join(changed),
+        ))
+    job.status = "done"
+
+
+def _fail_job(job_id: int, error: str):
+    with SessionLocal() as db:
+        job = db.get(IngestJob, job_id)
+        job.error = error
+        acte = db.get(Acte, job.acte_id) if job.acte_id is not None else None
+        if acte is not None and acte.pdf_path != job.pdf_path:
+            acte = None
+        if job.kind in REEXTRACT_KINDS:
+            # ré-extraction : l'ancien texte de l'acte reste valable
+            acte = None
+        if job.status == "cancel_requested":
+            # annulé pendant une extraction qui a de toute façon échoué
+            job.status = "cancelled"
+            job.finished_at = func.now()
+            if acte is not None:
+                acte.extraction_status = "cancelled"
+        elif job.attempts < settings.JOB_MAX_ATTEMPTS:
+            job.status = "pending"
+        else:
+            job.status = "failed"
+            job.finished_at = func.now()
+            if acte is not None:
+                acte.extraction_status = "failed"
+        db.commit()
+    print(f"[worker] job {job_id} en erreur : {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker d'extraction des actes")
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="traite les jobs en attente puis s'arrête",
+    )
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    print(f"[worker] {WORKER_ID} démarré")
+
+    try:
+        while True:
+            try:
+                job_id = claim_next_job()
+            except Exception as e:
+                # base indisponible : on réessaie plus tard
+                print(f"[worker][WARN] {e}")
+                job_id = None
+
+            if job_id is None:
+                if args.once:
+                    break
+                time.sleep(settings.WORKER_POLL_SECONDS)
+                continue
+
+            t0 = time.monotonic()
+            run_job(job_id)
+            print(f"[worker] job {job_id} traité en {time.monotonic() - t0:.1f}s")
+    finally:
+        shutdown_ocr_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# api/tests/conftest.py
+import os
+import sys
+import tempfile
+
+import pytest
+
+# l'application lit sa configuration à l'import : base SQLite en mémoire
+# (les tests ne créent que les tables dont ils ont besoin) et dossier
+# d'upload temporaire. Les tests qui ont besoin de PostgreSQL (triggers,
+# tsvector, verrous) utilisent la base TEST_DATABASE_URL, sinon ils sont
+# ignorés ; elle est vidée avant chaque test.
+os.environ.setdefault("DATABASE_URL", os.environ.get("TEST_DATABASE_URL", "sqlite://"))
+os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="actes-uploads-"))
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: test long (pytest -m 'not slow' pour l'exclure)")
+
+
+@pytest.fixture(scope="session")
+def pg_engine():
+    from app.database import engine
+
+    if engine.dialect.name != "postgresql":
+        pytest.skip("TEST_DATABASE_URL (PostgreSQL) non défini")
+    from app.main import on_startup
+
+    on_startup()   # tables, colonnes, triggers et index, comme au démarrage de l'API
+    return engine
+
+
+@pytest.fixture
+def pg_db(pg_engine):
+    from sqlalchemy import text
+
+    from app.database import Base, SessionLocal
+    from app.main import seed_reference_data
+
+    tables = ", ".join(t.name for t in Base.metadata.sorted_tables)
+    with pg_engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE;"))
+    seed_reference_data()
+    with SessionLocal() as db:
+        yield db
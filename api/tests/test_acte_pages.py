@@ -0,0 +1,104 @@
+# api/tests/test_acte_pages.py
+import pytest
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.exc import IntegrityError
+
+from app.acte_pages import acte_text, save_pages
+from app.database import engine
+from app.fulltext_migration import check_copy, drop_old_column, old_column_exists
+from app.main import _ensure_search_vector, _move_fulltext_to_pages
+from app.models import Acte, ActePage
+from app.search import search_match, search_query
+
+
+def _acte(db, titre: str = "Registre") -> Acte:
+    acte = Acte(titre=titre, pdf_path="/data/uploads/registre.pdf")
+    db.add(acte)
+    db.commit()
+    return acte
+
+
+def _acte_updates(db) -> int:
+    """Lignes de actes modifiées depuis le début de la transaction."""
+    return db.execute(text(
+        "SELECT n_tup_upd FROM pg_stat_xact_user_tables WHERE relname = 'actes'"
+    )).scalar_one()
+
+
+def _found(db, acte: Acte, q: str) -> bool:
+    stmt = select(func.count()).where(Acte.id == acte.id, search_match(search_query(q)))
+    return db.execute(stmt).scalar_one() == 1
+
+
+def test_replacing_the_pages_rebuilds_the_document_once(pg_db):
+    acte = _acte(pg_db)
+    save_pages(pg_db, acte.id, [(1, "texte provisoire")])
+    pg_db.commit()
+
+    before = _acte_updates(pg_db)
+    save_pages(pg_db, acte.id, [(1, "stationnement"), (2, ""), (3, "voirie")])
+    assert _acte_updates(pg_db) - before == 1
+    pg_db.commit()
+
+    assert acte_text(pg_db, acte.id) == "stationnement\nvoirie"
+    assert _found(pg_db, acte, "stationnement voirie")
+    assert not _found(pg_db, acte, "provisoire")
+
+
+def test_failed_save_does_not_leave_the_triggers_suspended(pg_db):
+    acte = _acte(pg_db)
+    save_pages(pg_db, acte.id, [(1, "stationnement")])
+    pg_db.commit()
+
+    with pytest.raises(IntegrityError):
+        with pg_db.begin_nested():
+            save_pages(pg_db, acte.id, [(1, "voirie"), (1, "doublon")])
+
+    # suppression directe : le trigger recalcule toujours le document
+    pg_db.execute(delete(ActePage).where(ActePage.acte_id == acte.id))
+    pg_db.commit()
+    assert not _found(pg_db, acte, "stationnement")
+
+
+@pytest.fixture
+def legacy_fulltext_column(pg_db):
+    """Base d'avant acte_pages : texte intégral dans actes.fulltext_content."""
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE actes ADD COLUMN fulltext_content TEXT;"))
+    yield
+    pg_db.rollback()      # libère les verrous de la session avant l'ALTER
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE actes DROP COLUMN IF EXISTS fulltext_content;"))
+        drop_old_column(conn)
+    _ensure_search_vector()
+
+
+def test_startup_copies_the_old_text_and_keeps_the_column(pg_db, legacy_fulltext_column):
+    old = _acte(pg_db, "Arrêté").id
+    reextracted = _acte(pg_db, "Délibération").id
+    _acte(pg_db, "Sans texte")
+    for acte_id, fulltext in ((old, "ancien texte OCR"), (reextracted, "texte à refaire")):
+        pg_db.execute(text("UPDATE actes SET fulltext_content = :t WHERE id = :id"),
+                      {"t": fulltext, "id": acte_id})
+    pg_db.commit()
+
+    assert _move_fulltext_to_pages() == 2
+    assert _move_fulltext_to_pages() == 0      # une seule fois
+    _ensure_search_vector()
+
+    assert acte_text(pg_db, old) == "ancien texte OCR"
+    pg_db.commit()
+    with engine.begin() as conn:
+        assert old_column_exists(conn)
+        assert check_copy(conn) == {"actes": 2, "copied": 2, "replaced": 0, "missing": []}
+
+    # ré-extraction : la page 0 est remplacée par de vraies pages
+    save_pages(pg_db, reextracted, [(1, "Délibération du conseil")])
+    # texte perdu (ne doit pas arriver) : signalé avant la suppression
+    save_pages(pg_db, old, [])
+    pg_db.commit()
+    with engine.begin() as conn:
+        assert check_copy(conn) == {"actes": 2, "copied": 0, "replaced": 1, "missing": [old]}
+        drop_old_column(conn)
+        assert not old_column_exists(conn)
+        assert check_copy(conn) is None
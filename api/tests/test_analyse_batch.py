@@ -0,0 +1,123 @@
+# api/tests/test_analyse_batch.py
+import asyncio
+import io
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app import routers_admin
+from app.extraction_executor import ExtractionExecutor
+from app.schemas import AnalysePDFOut
+from app.staging import staging_dir
+
+USER = SimpleNamespace(id=1)
+
+
+class _Upload:
+    """UploadFile minimal (nom, type, lecture par blocs)."""
+
+    def __init__(self, filename: str, data: bytes, content_type: str = "application/pdf"):
+        self.filename = filename
+        self.content_type = content_type
+        self._buf = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._buf.read(size)
+
+
+def _pdf(name: str) -> _Upload:
+    return _Upload(name, b"%PDF-1.7\n" + name.encode())
+
+
+async def _lines(response) -> list:
+    return [json.loads(chunk) async for chunk in response.body_iterator]
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    ex = ExtractionExecutor(workers=2, queue_max=10)
+    monkeypatch.setattr(routers_admin, "extraction_executor", ex)
+    yield ex
+    ex.shutdown()
+
+
+def test_batch_streams_one_line_per_file_as_they_finish(executor, monkeypatch):
+    release_first = threading.Event()
+
+    def analyse(pdf, filename, user_id):
+        # "a.pdf" est le plus long à analyser : il arrive en dernier
+        if filename == "a.pdf":
+            release_first.wait(5)
+        with open(pdf.path, "rb") as f:
+            return AnalysePDFOut(fulltext_excerpt=f.read().decode(), staging_token=filename)
+
+    monkeypatch.setattr(routers_admin, "_analyse_pdf_isolated", analyse)
+
+    async def run():
+        response = await routers_admin.analyse_pdf_batch(
+            pdfs=[_pdf("a.pdf"), _Upload("notes.txt", b"bonjour", "text/plain"), _pdf("b.pdf")],
+            user=USER,
+        )
+        assert response.media_type == "application/x-ndjson"
+        lines = []
+        async for chunk in response.body_iterator:
+            lines.append(json.loads(chunk))
+            if len(lines) == 2:
+                release_first.set()
+        return lines
+
+    lines = asyncio.run(run())
+
+    assert [line["index"] for line in lines] == [1, 2, 0]
+    assert lines[0] == {
+        "index": 1, "filename": "notes.txt", "ok": False, "status": 415,
+        "error": "Only PDF files are allowed",
+    }
+    assert lines[1]["ok"] and lines[1]["staging_token"] == "b.pdf"
+    assert lines[2]["fulltext_excerpt"] == "%PDF-1.7\na.pdf"
+
+
+def test_analysis_error_is_reported_on_its_line(executor, monkeypatch):
+    def analyse(pdf, filename, user_id):
+        if filename == "broken.pdf":
+            raise RuntimeError("PDF illisible")
+        return AnalysePDFOut(fulltext_excerpt="")
+
+    monkeypatch.setattr(routers_admin, "_analyse_pdf_isolated", analyse)
+
+    async def run():
+        response = await routers_admin.analyse_pdf_batch(
+            pdfs=[_pdf("ok.pdf"), _pdf("broken.pdf")], user=USER
+        )
+        return await _lines(response)
+
+    lines = sorted(asyncio.run(run()), key=lambda line: line["index"])
+
+    assert lines[0]["ok"]
+    assert lines[1] == {
+        "index": 1, "filename": "broken.pdf", "ok": False, "status": 500, "error": "PDF illisible",
+    }
+
+
+def test_full_queue_rejects_the_whole_batch(monkeypatch):
+    ex = ExtractionExecutor(workers=1, queue_max=1)
+    monkeypatch.setattr(routers_admin, "extraction_executor", ex)
+    before = set(os.listdir(staging_dir()))
+
+    async def run():
+        return await routers_admin.analyse_pdf_batch(
+            pdfs=[_pdf("a.pdf"), _pdf("b.pdf"), _pdf("c.pdf")], user=USER
+        )
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(run())
+
+    assert exc.value.status_code == 503
+    assert int(exc.value.headers["Retry-After"]) >= 1
+    # aucun fichier reçu ne reste dans la zone d'attente
+    assert set(os.listdir(staging_dir())) == before
+    assert ex.stats()["queued"] == 0
@@ -0,0 +1,79 @@
+# api/tests/test_backfill.py
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+
+from app import worker
+from app.backfill import REEXTRACT_KINDS, backfill_status, enqueue_reextraction
+from app.config import settings
+from app.extraction_cache import extraction_version
+from app.lanes import BULK, INTERACTIVE, LaneScheduler
+from app.models import Acte, IngestJob
+
+
+def _acte(db, version, status="done") -> Acte:
+    acte = Acte(titre="Arrêté", pdf_path="/data/uploads/arrete.pdf",
+                extraction_status=status, extraction_version=version)
+    db.add(acte)
+    db.commit()
+    return acte
+
+
+def test_stale_actes_get_one_job_per_version(pg_db):
+    _acte(pg_db, extraction_version())
+    old = _acte(pg_db, "1.00000000")
+    never = _acte(pg_db, None)
+
+    assert backfill_status(pg_db)["stale"] == 2
+    assert enqueue_reextraction(pg_db) == 2
+    jobs = pg_db.query(IngestJob).order_by(IngestJob.acte_id).all()
+    assert [j.acte_id for j in jobs] == [old.id, never.id]
+    assert {j.lane for j in jobs} == {"bulk"}
+
+    # déjà un job pour cette version : pas de doublon, même après un échec
+    jobs[0].status = "failed"
+    pg_db.commit()
+    assert enqueue_reextraction(pg_db) == 0
+
+
+def test_truncated_actes_are_reextracted_when_the_budget_changes(pg_db, monkeypatch):
+    monkeypatch.setattr(settings, "EXTRACTION_MAX_PAGES", 300)
+    truncated = _acte(pg_db, extraction_version(partial=True), status="partial")
+    _acte(pg_db, extraction_version())
+
+    # même budget : le texte ne serait pas plus complet
+    assert backfill_status(pg_db)["up_to_date"] == 2
+    assert enqueue_reextraction(pg_db) == 0
+
+    monkeypatch.setattr(settings, "EXTRACTION_MAX_PAGES", 1000)
+    assert enqueue_reextraction(pg_db) == 1
+    assert pg_db.query(IngestJob.acte_id).scalar() == truncated.id
+    assert enqueue_reextraction(pg_db) == 0
+
+
+def test_old_backfill_does_not_hold_back_new_uploads(pg_db, monkeypatch):
+    monkeypatch.setattr(settings, "LANE_STARVATION_SECONDS", 30.0)
+    monkeypatch.setattr(worker, "_lane_scheduler", LaneScheduler({INTERACTIVE: 4, BULK: 1}))
+    for _ in range(20):
+        _acte(pg_db, "1.00000000")
+    assert enqueue_reextraction(pg_db) == 20
+    # ré-extractions en file depuis deux heures : toujours "affamées"
+    pg_db.execute(
+        update(IngestJob).values(created_at=datetime.now(timezone.utc) - timedelta(hours=2))
+    )
+    pg_db.commit()
+
+    # nouveaux PDF déposés par les agents
+    for _ in range(8):
+        acte = _acte(pg_db, None, status="pending")
+        pg_db.add(IngestJob(acte_id=acte.id, pdf_path=acte.pdf_path, status="pending",
+                            lane=INTERACTIVE))
+    pg_db.commit()
+
+    claimed = [pg_db.get(IngestJob, worker.claim_next_job()) for _ in range(10)]
+
+    lanes = [job.lane for job in claimed]
+    # part des agents (4 sur 5) respectée malgré l'arriéré de ré-extractions
+    assert lanes.count(INTERACTIVE) == 8
+    assert INTERACTIVE in lanes[:5] and INTERACTIVE in lanes[5:]
+    assert {job.kind for job in claimed if job.lane == BULK} <= set(REEXTRACT_KINDS)
@@ -0,0 +1,82 @@
+# api/tests/test_bulk_create.py
+import asyncio
+import io
+import json
+import os
+from types import SimpleNamespace
+
+from app.config import settings
+from app.models import Acte, AuditLog, IngestJob
+from app.routers_admin import admin_create_actes_bulk
+
+AGENT = SimpleNamespace(id=1)
+
+
+class _Upload:
+    """UploadFile minimal (nom, type, lecture par blocs)."""
+
+    content_type = "application/pdf"
+
+    def __init__(self, filename: str, data: bytes):
+        self.filename = filename
+        self._buf = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._buf.read(size)
+
+
+def _pdf(name: str) -> _Upload:
+    return _Upload(name, b"%PDF-1.7\n" + name.encode())
+
+
+def _bulk(db, items, files) -> dict:
+    return asyncio.run(admin_create_actes_bulk(
+        items=json.dumps(items), files=files, db=db, user=AGENT,
+    ))
+
+
+def _uploaded() -> set:
+    return {f for f in os.listdir(settings.UPLOAD_DIR) if f.endswith(".pdf")}
+
+
+def test_each_acte_succeeds_or_fails_alone(pg_db, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_COMMIT_BATCH", 2)
+    before = _uploaded()
+    items = [
+        {"titre": "Arrêté de voirie", "date_signature": "03/02/2024"},
+        {"titre": "Date impossible", "date_signature": "31/02/2024"},
+        {"titre": "x" * 300},                               # refusé par la base
+        {"titre": "Jeton inconnu", "staging_token": "absent"},
+        {"titre": "Pas un PDF"},
+        {"titre": "Délibération", "date_publication": "2024-03-01"},
+        {"titre": "Sans fichier"},
+    ]
+    files = [
+        _pdf("voirie.pdf"), _pdf("date.pdf"), _pdf("long.pdf"),
+        _Upload("notes.pdf", b"bonjour"), _pdf("delib.pdf"),
+    ]
+
+    out = _bulk(pg_db, items, files)
+
+    assert out["detail"] == "partial"
+    assert [r["status"] for r in out["results"]] == [
+        "created", "failed", "failed", "failed", "failed", "created", "failed",
+    ]
+    assert "Date invalide" in out["results"][1]["error"]
+    assert "Analyse introuvable" in out["results"][3]["error"]
+    assert "Invalid PDF signature" in out["results"][4]["error"]
+    assert "PDF manquant" in out["results"][6]["error"]
+
+    # l'échec en base d'un acte n'annule pas celui créé dans le même lot
+    pg_db.expire_all()
+    actes = pg_db.query(Acte).order_by(Acte.id).all()
+    assert [a.titre for a in actes] == ["Arrêté de voirie", "Délibération"]
+    assert [a.id for a in actes] == out["created"]
+    assert {j.acte_id for j in pg_db.query(IngestJob)} == set(out["created"])
+    assert {j.lane for j in pg_db.query(IngestJob)} == {"bulk"}
+    assert pg_db.query(AuditLog).count() == 2
+
+    # seuls les PDF des actes créés restent sur le disque, à leur place
+    assert _uploaded() - before == {"voirie.pdf", "delib.pdf"}
+    with open(actes[1].pdf_path, "rb") as f:
+        assert f.read() == b"%PDF-1.7\ndelib.pdf"
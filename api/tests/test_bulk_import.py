@@ -0,0 +1,77 @@
+# api/tests/test_bulk_import.py
+import json
+import shutil
+
+import fitz  # PyMuPDF
+
+from app.acte_pages import acte_text
+from app.bulk_import import run_import
+from app.models import Acte
+
+
+def _pdf(path, text: str):
+    """PDF avec une couche texte (pas d'OCR)."""
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), text)
+    page.insert_text((72, 100), "Vu le code général des collectivités territoriales, " * 2, fontsize=6)
+    doc.save(str(path))
+    doc.close()
+
+
+def _archive(tmp_path):
+    root = tmp_path / "archives"
+    (root / "2012").mkdir(parents=True)
+    _pdf(root / "2012" / "a.pdf", "Arrêté du Maire n° 1 du 3 mars 2012")
+    _pdf(root / "2012" / "b.pdf", "Délibération du conseil municipal")
+    _pdf(root / "c.pdf", "Décision du Maire n° 7")
+    shutil.copy(root / "c.pdf", root / "copie de c.pdf")      # même contenu
+    (root / "notes.pdf").write_bytes(b"pas un pdf")
+    manifest = tmp_path / "actes.csv"
+    manifest.write_text(
+        "fichier;titre;date_signature\n"
+        "2012/b.pdf;Budget primitif 2012;12/04/2012\n",
+        encoding="utf-8",
+    )
+    return root, manifest
+
+
+def _checkpoint(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_interrupted_import_resumes_from_its_checkpoint(pg_db, tmp_path):
+    root, manifest = _archive(tmp_path)
+    checkpoint = tmp_path / "import.jsonl"
+
+    # premier passage interrompu après 2 fichiers
+    first = run_import(str(root), str(manifest), str(checkpoint), workers=2, batch_size=2, limit=2)
+    assert (first.total, first.imported) == (2, 2)
+    assert {e["key"] for e in _checkpoint(checkpoint)} == {"2012/a.pdf", "2012/b.pdf"}
+
+    # reprise : les fichiers déjà importés sont sautés
+    second = run_import(str(root), str(manifest), str(checkpoint), workers=2, batch_size=2)
+    assert second.total == 3
+    assert (second.imported, second.duplicates, second.failed) == (1, 1, 1)
+
+    pg_db.expire_all()
+    actes = {a.titre: a for a in pg_db.query(Acte)}
+    # c.pdf et sa copie : le premier extrait est importé, l'autre est un doublon
+    copies = {"c", "copie de c"}
+    assert len(actes) == 3 and len(set(actes) & copies) == 1
+    budget = actes["Budget primitif 2012"]
+    assert str(budget.date_signature) == "2012-04-12"
+    assert budget.extraction_status == "done"
+    assert "Délibération" in acte_text(pg_db, budget.id)
+    assert actes["a"].type == "Arrêté"
+
+    statuses = {e["key"]: e["status"] for e in _checkpoint(checkpoint)}
+    assert statuses["2012/a.pdf"] == statuses["2012/b.pdf"] == "done"
+    assert sorted([statuses["c.pdf"], statuses["copie de c.pdf"]]) == ["done", "duplicate"]
+    assert statuses["notes.pdf"] == "failed"
+
+    # troisième passage : seul le fichier en échec est retenté
+    third = run_import(str(root), str(manifest), str(checkpoint), workers=2, batch_size=2)
+    assert (third.total, third.imported, third.failed) == (1, 0, 1)
+    assert pg_db.query(Acte).count() == 3
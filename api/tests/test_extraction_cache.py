@@ -0,0 +1,135 @@
+# api/tests/test_extraction_cache.py
+from datetime import datetime, timedelta, timezone
+
+import fitz  # PyMuPDF
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import Session
+
+from app import ocr_backends, pdf_utils
+from app.config import settings
+from app.extraction_cache import (
+    _evict_lru, extract_cached, extraction_cache_key, extraction_version,
+)
+from app.models import ExtractionCache
+from app.pdf_utils import ExtractionFailed
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    ExtractionCache.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _cached_entries(db: Session) -> int:
+    return db.execute(select(func.count()).select_from(ExtractionCache)).scalar_one()
+
+
+def _pdf(path, pages: int, text: str = "") -> str:
+    """PDF de pages sans texte (à OCRiser), ou avec ce texte natif."""
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        if text:
+            page.insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_ocr_error_is_raised_and_not_cached(db, tmp_path, monkeypatch):
+    def broken_ocr(*args, **kwargs):
+        raise RuntimeError("tesseract introuvable")
+
+    monkeypatch.setattr(pdf_utils, "_ocr_pages", broken_ocr)
+    pdf_path = _pdf(tmp_path / "scan.pdf", 2)
+
+    with pytest.raises(ExtractionFailed) as exc:
+        extract_cached(db, pdf_path)
+
+    assert exc.value.failed_pages == [1, 2]
+    assert exc.value.result.partial
+    assert "tesseract introuvable" in exc.value.result.note
+    assert _cached_entries(db) == 0
+
+
+def test_truncated_document_is_partial_and_not_cached(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EXTRACTION_MAX_PAGES", 2)
+    pdf_path = _pdf(tmp_path / "long.pdf", 3, "Arrêté portant réglementation " * 3)
+
+    result = extract_cached(db, pdf_path)
+
+    assert result.partial
+    assert result.page_numbers == [1, 2]
+    assert "3 pages" in result.note
+    assert _cached_entries(db) == 0
+
+
+class _Backend:
+    def __init__(self, name, lang):
+        self.name = name
+        self.lang = lang
+
+
+def test_cache_key_follows_the_backend_in_use(monkeypatch):
+    monkeypatch.setattr(settings, "OCR_BACKEND", "tesserocr")
+
+    monkeypatch.setattr(ocr_backends, "_backend", _Backend("tesserocr", "fra"))
+    key = extraction_cache_key("0" * 64)
+    version = extraction_version()
+
+    # repli sur pytesseract, ou langue non installée : autre clé, autre version
+    monkeypatch.setattr(ocr_backends, "_backend", _Backend("pytesseract", "fra"))
+    assert extraction_cache_key("0" * 64) != key
+    assert extraction_version() != version
+
+    monkeypatch.setattr(ocr_backends, "_backend", _Backend("tesserocr", None))
+    assert extraction_cache_key("0" * 64) != key
+
+
+def _entry(key: str, mb: int, minutes_ago: int) -> ExtractionCache:
+    used = datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)
+    return ExtractionCache(
+        key=key, text="", size_bytes=mb * 1024 * 1024,
+        created_at=used, last_used_at=used,
+    )
+
+
+def test_eviction_only_sorts_the_cache_when_over_the_limit(db, monkeypatch):
+    monkeypatch.setattr(settings, "EXTRACTION_CACHE_MAX_MB", 10)
+    db.add_all([_entry("old", 4, 30), _entry("mid", 3, 20), _entry("new", 3, 10)])
+    db.commit()
+
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute",
+                 lambda conn, cursor, stmt, *args: statements.append(stmt))
+    _evict_lru(db)
+    assert not any(s.lstrip().upper().startswith("DELETE") for s in statements)
+    assert _cached_entries(db) == 3
+
+    # 12 Mo > 10 Mo : retour sous 9 Mo en supprimant les moins récentes
+    db.add(_entry("newest", 2, 0))
+    db.commit()
+    _evict_lru(db)
+    db.commit()
+    keys = set(db.execute(select(ExtractionCache.key)).scalars())
+    assert keys == {"newest", "new", "mid"}
+
+
+def test_cache_key_does_not_create_an_ocr_backend(monkeypatch):
+    def no_backend(*args, **kwargs):
+        raise AssertionError("backend OCR créé pour une clé de cache")
+
+    monkeypatch.setattr(ocr_backends, "_backend", None)
+    monkeypatch.setattr(ocr_backends.TesserocrBackend, "__init__", no_backend)
+    monkeypatch.setattr(ocr_backends.PytesseractBackend, "__init__", no_backend)
+    # tesserocr absent, "fra" non installée : ce que get_ocr_backend utiliserait
+    monkeypatch.setattr(ocr_backends, "tesserocr", None)
+    monkeypatch.setattr(ocr_backends, "_installed_languages", lambda: ["eng"])
+    monkeypatch.setattr(settings, "OCR_BACKEND", "tesserocr")
+    monkeypatch.setattr(settings, "OCR_LANG", "fra")
+
+    assert ocr_backends.ocr_backend_identity() == ("pytesseract", None)
+    assert extraction_cache_key("0" * 64)
@@ -0,0 +1,85 @@
+# api/tests/test_extraction_executor.py
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.extraction_executor import ExtractionExecutor, ExtractionQueueFull
+from app.lanes import BULK, INTERACTIVE
+
+
+@pytest.fixture
+def executor():
+    ex = ExtractionExecutor(workers=1, queue_max=2)
+    yield ex
+    ex.shutdown()
+
+
+def test_extraction_does_not_block_the_event_loop(executor):
+    def extract():
+        time.sleep(0.3)   # OCR : travail bloquant
+        return "texte"
+
+    async def run():
+        ticks = 0
+
+        async def other_requests():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(other_requests())
+        result = await executor.run(extract)
+        ticker.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(run())
+
+    assert result == "texte"
+    assert ticks >= 10
+
+
+def test_full_lane_is_rejected_with_a_retry_delay(executor):
+    gate = threading.Event()
+
+    async def run():
+        # 1 thread occupé + 2 places dans la file interactive
+        futures = executor.submit_many([(gate.wait, (5,))] * 3, lane=INTERACTIVE)
+        with pytest.raises(ExtractionQueueFull) as exc:
+            executor.submit_many([(gate.wait, (5,))], lane=INTERACTIVE)
+        # l'autre file a ses propres places
+        (bulk,) = executor.submit_many([(gate.wait, (5,))], lane=BULK)
+        stats = executor.stats()
+        gate.set()
+        await asyncio.gather(*futures, bulk)
+        return exc.value, stats
+
+    error, stats = asyncio.run(run())
+
+    assert error.retry_after >= 1
+    assert stats["lanes"][INTERACTIVE]["rejected"] == 1
+    assert stats["lanes"][INTERACTIVE]["queued"] + stats["lanes"][INTERACTIVE]["running"] == 3
+    assert stats["lanes"][BULK]["queued"] == 1
+
+
+def test_cancelled_task_leaves_the_queue(executor):
+    gate = threading.Event()
+    ran = []
+
+    async def run():
+        (busy,) = executor.submit_many([(gate.wait, (5,))])
+        (queued,) = executor.submit_many([(ran.append, ("exécutée",))])
+        await asyncio.sleep(0.05)
+        queued.cancel()        # client parti avant le début de l'analyse
+        await asyncio.sleep(0.05)
+        stats = executor.stats()
+        gate.set()
+        await busy
+        return stats
+
+    stats = asyncio.run(run())
+
+    assert stats["queued"] == 0
+    assert ran == []
@@ -0,0 +1,76 @@
+# api/tests/test_lanes.py
+import asyncio
+import threading
+from collections import Counter
+
+import pytest
+
+from app.config import settings
+from app.extraction_executor import ExtractionExecutor
+from app.lanes import BULK, INTERACTIVE, LaneScheduler
+
+WEIGHTS = {INTERACTIVE: 4, BULK: 1}
+
+
+@pytest.fixture(autouse=True)
+def starvation_threshold(monkeypatch):
+    monkeypatch.setattr(settings, "LANE_STARVATION_SECONDS", 30.0)
+
+
+def _picks(scheduler: LaneScheduler, waiting, n: int):
+    return [scheduler.pick(waiting) for _ in range(n)]
+
+
+def test_weighted_share_without_starvation():
+    picks = _picks(LaneScheduler(WEIGHTS), {INTERACTIVE: 1.0, BULK: 5.0}, 100)
+
+    assert Counter(picks) == {INTERACTIVE: 80, BULK: 20}
+    # lissé : jamais deux tâches bulk de suite
+    assert all(a != BULK or b != BULK for a, b in zip(picks, picks[1:]))
+
+
+def test_old_bulk_backlog_keeps_interactive_at_its_share():
+    # arriéré bulk de plusieurs heures : il reste toujours "affamé"
+    picks = _picks(LaneScheduler(WEIGHTS), {INTERACTIVE: 0.5, BULK: 4 * 3600.0}, 100)
+
+    assert Counter(picks) == {INTERACTIVE: 80, BULK: 20}
+    # au moins une tâche interactive sur chaque fenêtre de 5 choix
+    assert all(INTERACTIVE in picks[i:i + 5] for i in range(0, 100, 5))
+
+
+def test_starving_lane_is_served_first_within_its_share():
+    scheduler = LaneScheduler(WEIGHTS)
+    # hors famine, le round-robin commence par la file interactive
+    assert LaneScheduler(WEIGHTS).pick({INTERACTIVE: 0.5, BULK: 5.0}) == INTERACTIVE
+    assert scheduler.pick({INTERACTIVE: 0.5, BULK: 60.0}) == BULK
+    assert _picks(scheduler, {INTERACTIVE: 0.5, BULK: 60.0}, 4) == [INTERACTIVE] * 4
+
+
+def test_both_lanes_starving_keep_the_weights():
+    picks = _picks(LaneScheduler(WEIGHTS), {INTERACTIVE: 600.0, BULK: 3600.0}, 100)
+
+    assert Counter(picks) == {INTERACTIVE: 80, BULK: 20}
+
+
+def test_executor_serves_interactive_tasks_behind_an_old_bulk_backlog(monkeypatch):
+    # toute tâche en file est "affamée" dès son admission
+    monkeypatch.setattr(settings, "LANE_STARVATION_SECONDS", 0.0)
+    ex = ExtractionExecutor(workers=1, queue_max=100)
+    ex._scheduler = LaneScheduler(WEIGHTS)
+    gate = threading.Event()
+    order = []
+
+    async def run():
+        (busy,) = ex.submit_many([(gate.wait, (5,))], lane=BULK)
+        bulk = ex.submit_many([(order.append, (BULK,))] * 40, lane=BULK)
+        interactive = ex.submit_many([(order.append, (INTERACTIVE,))] * 8, lane=INTERACTIVE)
+        gate.set()
+        await asyncio.gather(busy, *bulk, *interactive)
+
+    try:
+        asyncio.run(run())
+    finally:
+        ex.shutdown()
+
+    # les 8 tâches interactives passent dans les 10 premières, pas après les 40 bulk
+    assert Counter(order[:10]) == {INTERACTIVE: 8, BULK: 2}
@@ -0,0 +1,139 @@
+# api/tests/test_metadata_matcher.py
+# Le matcher précompilé (metadata_matcher.py) doit donner exactement les
+# résultats des anciennes boucles de pdf_utils : celles-ci sont recopiées
+# ci-dessous (_baseline_*) et servent de référence.
+import random
+import re
+import unicodedata
+
+import pytest
+
+from app.metadata_matcher import MetadataMatcher, NameMatcher
+from app.normalized_text import fold
+
+SERVICES = ["Culture", "Direction de la culture", "Mairie", "Voirie", "Urbanisme", "État civil"]
+TYPES = ["Arrêté", "Délibération", "Décision", "Arrêté municipal", "Autre"]
+
+
+# --------------------------------------------------
+# Anciennes implémentations (référence)
+# --------------------------------------------------
+
+def _strip_accents(s: str) -> str:
+    return "".join(
+        c for c in unicodedata.normalize("NFD", s)
+        if unicodedata.category(c) != "Mn"
+    )
+
+
+def _baseline_first_in(text: str, names):
+    low_na = _strip_accents(text.lower())
+    for s in names:
+        s_na = _strip_accents(s.lower())
+        if s and s_na and s_na in low_na:
+            return s
+    return None
+
+
+def _baseline_pick_known_type(variants, known_types):
+    for variant in variants:
+        v = _strip_accents(variant.lower())
+        for t in known_types:
+            if v in _strip_accents(t.lower()):
+                return t
+    return None
+
+
+def _baseline_guess_type(text: str, known_types):
+    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+    top15 = "\n".join(lines[:15])
+    full = "\n".join(lines)
+
+    def _score_block(block: str):
+        block_low_na = _strip_accents(block.lower())
+        if re.search(r"\bdecision\s+du\s+maire\b", block_low_na, flags=re.IGNORECASE) \
+           or re.search(r"\bdecision\b", block_low_na, flags=re.IGNORECASE):
+            m = _baseline_pick_known_type(["décision", "decision"], known_types)
+            if m:
+                return m
+        if re.search(r"\barre?t[ée]?\s*(n|n°|num|du|de )", block_low_na, flags=re.IGNORECASE) \
+           or re.search(r"\bpar\s+arre?t[ée]?\b", block_low_na, flags=re.IGNORECASE):
+            m = _baseline_pick_known_type(["arrêté", "arrete", "arreté", "arrete municipal"], known_types)
+            if m:
+                return m
+        if re.search(r"\bdelib[ée]ration\s*(n|n°|num|du|de )", block_low_na, flags=re.IGNORECASE) \
+           or re.search(r"\bdelib[ée]ration\b", block_low_na, flags=re.IGNORECASE):
+            m = _baseline_pick_known_type(["délibération", "deliberation"], known_types)
+            if m:
+                return m
+        return None
+
+    return _score_block(top15) or _score_block(full) or _baseline_first_in(full, known_types)
+
+
+# --------------------------------------------------
+# Cas choisis
+# --------------------------------------------------
+
+TEXTS = [
+    "",
+    "DIRECTION DE LA CULTURE\nArrêté n° 2024-12",
+    "Direction de la Culture",                       # "culture" contenu dans un nom plus long
+    "Service culture\n\nFait à Lyon, le 3 mars 2024",
+    "MAIRIE DE LYON\nDÉLIBÉRATION DU CONSEIL MUNICIPAL\nséance du 12/01/24",
+    "Décision du Maire n° 15\nVoirie\nPublié le 22/10/2025\nFait le 21/10/2025",
+    "par arrete municipal\nURBANISME",
+    "Etat civil\nle 1er janvier 2024\n5 fevrier 2023",
+    "22\noctobre\n2025",                             # date coupée sur plusieurs lignes
+    "Le 31/12/2023 et le 1/1/24\nsigné le 2 Août 2024",
+    "rien d'utile ici\n" * 40 + "Voirie",          # service seulement en bas
+    "arreté de voirie\nrien",
+    "AUTRE document, decisionnel",
+]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_name_matcher_matches_the_old_loop(text):
+    for names in (SERVICES, list(reversed(SERVICES)), TYPES):
+        assert NameMatcher(names).first_in(fold(text)) == _baseline_first_in(text, names)
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_guess_type_matches_the_old_rules(text):
+    for types in (TYPES, list(reversed(TYPES)), ["Autre"]):
+        assert MetadataMatcher([], types).guess_type(text) == _baseline_guess_type(text, types)
+
+
+def test_nested_names_keep_the_list_order():
+    # "culture" est aussi trouvé dans "direction de la culture" : le premier
+    # nom de la liste l'emporte, comme avec l'ancienne boucle
+    text = fold("DIRECTION DE LA CULTURE")
+    assert NameMatcher(["Culture", "Direction de la culture"]).first_in(text) == "Culture"
+    assert NameMatcher(["Direction de la culture", "Culture"]).first_in(text) == "Direction de la culture"
+    assert NameMatcher(["Voirie", "Culture"]).first_in(text) == "Culture"
+
+
+# --------------------------------------------------
+# Textes aléatoires
+# --------------------------------------------------
+
+_WORDS = [
+    "culture", "direction", "de", "la", "Culture", "DIRECTION DE LA CULTURE", "mairie",
+    "voirie", "urbanisme", "état", "civil", "etat civil", "arrêté", "arrete", "n°",
+    "du", "par", "décision", "decision", "maire", "délibération", "deliberation",
+    "municipal", "autre", "fait", "à", "le", "publié", "12/03/2024", "1-2-24",
+    "3", "mars", "2024", "octobre", "aout", "Août", "31/12/99", "\n", "\n", "\n\n",
+]
+
+
+def _random_text(rng: random.Random) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(0, 60)))
+
+
+def test_random_texts_match_the_old_loops():
+    rng = random.Random(2024)
+    services, types = NameMatcher(SERVICES), MetadataMatcher([], TYPES)
+    for _ in range(500):
+        text = _random_text(rng)
+        assert services.first_in(fold(text)) == _baseline_first_in(text, SERVICES), text
+        assert types.guess_type(text) == _baseline_guess_type(text, TYPES), text
@@ -0,0 +1,132 @@
+# api/tests/test_normalized_text.py
+# Les dates trouvées via NormalizedText (un parcours regex du texte entier)
+# doivent être celles de l'ancienne recherche ligne par ligne de pdf_utils :
+# elle est recopiée ci-dessous (_baseline_*) et sert de référence.
+import random
+import re
+import unicodedata
+
+import pytest
+
+from app.normalized_text import NormalizedText, fold
+from app.pdf_utils import guess_date_from_text
+
+
+def _strip_accents(s: str) -> str:
+    return "".join(
+        c for c in unicodedata.normalize("NFD", s)
+        if unicodedata.category(c) != "Mn"
+    )
+
+
+_MOIS = {
+    "janvier": "01", "fevrier": "02", "février": "02", "mars": "03", "avril": "04",
+    "mai": "05", "juin": "06", "juillet": "07", "aout": "08", "août": "08",
+    "septembre": "09", "octobre": "10", "novembre": "11", "decembre": "12", "décembre": "12",
+}
+
+
+def _baseline_date_of_line(line: str):
+    m = re.search(r'\b(\d{1,2})[/-](\d{1,2})[/-](\d{2,4})\b', line)
+    if m:
+        d, mo, y = (x.strip() for x in m.groups())
+        if len(y) == 2:
+            y = "20" + y
+        if len(y) == 4:
+            return f"{y}-{mo.zfill(2)}-{d.zfill(2)}"
+    m2 = re.search(r'\b(\d{1,2})\s+([A-Za-zéûôîàùç\.]+)\s+(\d{4})\b', line, flags=re.IGNORECASE)
+    if m2:
+        d, month_txt, y = m2.groups()
+        mo = _MOIS.get(_strip_accents(month_txt.lower().strip().strip(".")))
+        if mo and len(y.strip()) == 4:
+            return f"{y.strip()}-{mo}-{d.strip().zfill(2)}"
+    return None
+
+
+def _baseline_date_candidates(text: str):
+    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+    found = ((i, _baseline_date_of_line(ln)) for i, ln in enumerate(lines))
+    return [(i, d) for i, d in found if d]
+
+
+_PRIORITY = [
+    "fait à", "fait le", "fait a", "pour le maire", "pour la maire",
+    "le maire", "madame la maire", "monsieur le maire",
+    "le directeur", "la directrice", "directeur", "directrice",
+    "par délégation", "par delegation",
+    "signé le", "signee le", "signée le", "signature",
+    "décision du", "decision du",
+    "arrêté du", "arrete du", "arrêté n", "arrete n", "arrêté n°", "arrete n°",
+    "délibération du", "deliberation du", "fait a l", "fait a l'", "fait a la",
+]
+_PUBLISH = [
+    "publié le", "publie le", "publiée le", "publiee le",
+    "publié le :", "diffusé le", "date de publication",
+]
+
+
+def _baseline_guess_date(text: str):
+    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+    n = len(lines)
+    candidates = []
+    for idx, line in enumerate(lines):
+        low = _strip_accents(line.lower())
+        extracted = _baseline_date_of_line(line)
+        if not extracted:
+            continue
+        score = 0.0
+        if any(k in low for k in _PRIORITY):
+            score += 5.0
+        if any(k in low for k in _PUBLISH):
+            score -= 2.5
+        score += (idx / (n - 1) if n > 1 else 1.0) * 2.0
+        if "fait a" in low or "fait à" in low:
+            score += 1.5
+        candidates.append((score, idx, extracted))
+    if candidates:
+        candidates.sort(key=lambda t: (t[0], t[1]), reverse=True)
+        return candidates[0][2]
+    return _baseline_date_of_line("\n".join(lines))
+
+
+TEXTS = [
+    "",
+    "Fait à Lyon, le 3 mars 2024",
+    "MAIRIE DE LYON\nDÉLIBÉRATION DU CONSEIL MUNICIPAL\nséance du 12/01/24",
+    "Décision du Maire n° 15\nPublié le 22/10/2025\nFait le 21/10/2025",
+    "le 1er janvier 2024\n5 fevrier 2023\n\n",
+    "22\noctobre\n2025",                     # date coupée sur plusieurs lignes par l'OCR
+    "22   octobre\t2025",
+    "Le 31/12/2023 et le 1/1/24\nsigné le 2 Août 2024",
+    "12/13/123 puis 4 mai 2021",               # date numérique invalide : format textuel
+    "3 Floréal 2024\n7 déc. 2023",
+    "  \n\t\n",
+]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_date_candidates_match_the_old_line_scan(text):
+    assert NormalizedText(text).date_candidates == _baseline_date_candidates(text)
+    assert guess_date_from_text(text) == _baseline_guess_date(text)
+
+
+def test_folded_lines_follow_the_original_lines():
+    nt = NormalizedText("  ARRÊTÉ N° 12\n\nDirection de la Culture  \n")
+    assert nt.lines == ["ARRÊTÉ N° 12", "Direction de la Culture"]
+    assert nt.folded == [fold(line) for line in nt.lines] == ["arrete n° 12", "direction de la culture"]
+    assert nt.raw_index == [0, 2]
+
+
+_WORDS = [
+    "fait", "à", "le", "publié", "signé", "maire", "12/03/2024", "1-2-24", "31/12/99",
+    "5/5/12345", "3", "mars", "2024", "octobre", "aout", "Août", "déc.", "1er",
+    "\n", "\n", "\n\n", "\t",
+]
+
+
+def test_random_texts_match_the_old_line_scan():
+    rng = random.Random(2024)
+    for _ in range(500):
+        text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(0, 60)))
+        assert NormalizedText(text).date_candidates == _baseline_date_candidates(text), text
+        assert guess_date_from_text(text) == _baseline_guess_date(text), text
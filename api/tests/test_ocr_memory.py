@@ -0,0 +1,82 @@
+# api/tests/test_ocr_memory.py
+import io
+import json
+import os
+import subprocess
+import sys
+
+import fitz  # PyMuPDF
+import pytest
+from PIL import Image, ImageDraw
+
+from conftest import API_DIR
+
+PAGES = 40
+# une page A4 rendue à 300 dpi en niveaux de gris : ~8,7 Mo ; si les images
+# des pages étaient gardées (ancien convert_from_path), 40 pages > 340 Mo
+MAX_PEAK_GROWTH_MB = 150
+
+
+def _scanned_pdf(path: str, pages: int):
+    """PDF "scanné" : une image pleine page (la même, une seule fois dans le fichier)."""
+    img = Image.new("L", (1240, 1754), 255)
+    draw = ImageDraw.Draw(img)
+    for y in range(150, 1600, 60):
+        draw.rectangle((120, y, 1100, y + 18), fill=0)
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+
+    doc = fitz.open()
+    xref = 0
+    for _ in range(pages):
+        page = doc.new_page(width=595, height=842)
+        xref = page.insert_image(page.rect, stream=buf.getvalue(), xref=xref)
+    doc.save(path)
+    doc.close()
+
+
+# exécuté dans un processus neuf : ru_maxrss n'y mesure que l'extraction.
+# Le pool OCR est remplacé par un thread (pas de processus fils, dont la
+# mémoire ne serait pas comptée) et tesseract par un backend factice.
+_SCRIPT = """
+import json, resource, sys
+from concurrent.futures import ThreadPoolExecutor
+
+from app import ocr_engine, pdf_utils
+
+
+class FakeBackend:
+    name = "fake"
+
+    def image_to_string(self, img):
+        return "texte reconnu " * 20
+
+
+pool = ThreadPoolExecutor(max_workers=1)
+ocr_engine.get_ocr_pool = lambda: pool
+ocr_engine.get_ocr_backend = lambda: FakeBackend()
+
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+result = pdf_utils.extract_document(sys.argv[1])
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"pages": len(result.pages), "partial": result.partial,
+                  "growth_kb": after - before}))
+"""
+
+
+@pytest.mark.slow
+def test_extraction_peak_rss_stays_bounded(tmp_path):
+    pdf_path = str(tmp_path / "scan.pdf")
+    _scanned_pdf(pdf_path, PAGES)
+
+    env = dict(os.environ, PYTHONPATH=API_DIR, OCR_DPI="300")
+    proc = subprocess.run(
+        [sys.executable, "-c", _SCRIPT, pdf_path],
+        cwd=API_DIR, env=env, capture_output=True, text=True, timeout=600,
+    )
+    assert proc.returncode == 0, proc.stderr
+    out = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    assert out["pages"] == PAGES
+    assert not out["partial"]
+    assert out["growth_kb"] / 1024 < MAX_PEAK_GROWTH_MB
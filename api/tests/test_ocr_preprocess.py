@@ -0,0 +1,74 @@
+# api/tests/test_ocr_preprocess.py
+import random
+
+import fitz  # PyMuPDF
+import pytest
+from PIL import Image, ImageDraw
+
+from app.ocr_preprocess import _sampled_histogram, is_blank_page, preprocess_for_ocr
+
+A4_300_DPI = (2480, 3508)
+
+
+def _rendered_page(lines, gray: float = 0.0, top: int = 100) -> Image.Image:
+    """Page A4 avec quelques lignes de texte, rendue à 300 dpi comme pour l'OCR."""
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)
+    for i, line in enumerate(lines):
+        page.insert_text((72, top + 14 * i), line, fontsize=11, color=(gray,) * 3)
+    pix = page.get_pixmap(dpi=300, colorspace=fitz.csGRAY, alpha=False)
+    doc.close()
+    return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+
+
+def _dusty_page(specks: int) -> Image.Image:
+    """Page blanche scannée : quelques poussières de 4x4 pixels."""
+    img = Image.new("L", A4_300_DPI, 255)
+    draw = ImageDraw.Draw(img)
+    rng = random.Random(1)
+    for _ in range(specks):
+        x, y = rng.randrange(A4_300_DPI[0] - 4), rng.randrange(A4_300_DPI[1] - 4)
+        draw.rectangle((x, y, x + 3, y + 3), fill=40)
+    return img
+
+
+def test_white_page_is_blank():
+    img = Image.new("L", A4_300_DPI, 255)
+    assert is_blank_page(_sampled_histogram(img))
+    assert preprocess_for_ocr(img) is None
+
+
+def test_page_with_scanner_dust_is_blank():
+    img = _dusty_page(40)
+    assert is_blank_page(_sampled_histogram(img))
+    assert preprocess_for_ocr(img) is None
+
+
+@pytest.mark.parametrize("lines", [
+    ["Le Maire, Jean Dupont"],
+    ["Arrêté n° 2024-125 portant réglementation temporaire de la circulation"],
+    ["Vu le code général des collectivités territoriales,", "ARRÊTE", "Article 1er"],
+])
+def test_sparse_text_page_is_not_blank(lines):
+    img = _rendered_page(lines)
+    assert not is_blank_page(_sampled_histogram(img))
+    assert preprocess_for_ocr(img) is not None
+
+
+def test_page_with_only_a_page_number_is_blank():
+    img = _rendered_page(["- 2 -"], top=800)
+    assert is_blank_page(_sampled_histogram(img))
+
+
+def test_grey_paper_with_scan_noise_is_blank():
+    # papier recyclé gris clair, grain du scanner
+    img = Image.effect_noise(A4_300_DPI, 12).point(lambda v: min(255, v + 105))
+    assert is_blank_page(_sampled_histogram(img))
+
+
+def test_faint_text_page_is_not_blank():
+    # photocopie pâle : le texte est gris clair (~150), jamais sous 128
+    img = _rendered_page(["Le Maire, Jean Dupont"], gray=0.6)
+    assert min(img.getdata()) > 128
+    assert not is_blank_page(_sampled_histogram(img))
+    assert preprocess_for_ocr(img) is not None
@@ -0,0 +1,44 @@
+# api/tests/test_pdf_utils.py
+import fitz  # PyMuPDF
+
+from app import pdf_utils
+from app.ocr_engine import OcrInterrupted
+from app.pdf_utils import guess_metadata_from_pdf
+
+
+def _scanned_pdf(path, pages: int) -> str:
+    """PDF sans couche texte : toutes les pages passent par l'OCR."""
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page()
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_metadata_mode_reports_a_time_budget_overrun(tmp_path, monkeypatch):
+    def slow_ocr(data, page_numbers, *args, **kwargs):
+        # seule la première page a le temps d'être OCRisée
+        raise OcrInterrupted("temps maximal dépassé (1 s)", {page_numbers[0]: "Le Maire"})
+
+    monkeypatch.setattr(pdf_utils, "_ocr_pages", slow_ocr)
+    pdf_path = _scanned_pdf(tmp_path / "scan.pdf", 2)
+
+    text, guess, pages, page_count, partial = guess_metadata_from_pdf(pdf_path, [], [])
+
+    # toutes les pages ont été "lues", mais leur texte n'est pas complet
+    assert len(pages) == page_count == 2
+    assert partial
+    assert "Le Maire" in text
+
+
+def test_metadata_mode_complete_read(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        pdf_utils, "_ocr_pages", lambda data, page_numbers, *a, **k: ["texte"] * len(page_numbers)
+    )
+    pdf_path = _scanned_pdf(tmp_path / "scan.pdf", 2)
+
+    _, _, pages, page_count, partial = guess_metadata_from_pdf(pdf_path, [], [])
+
+    assert pages == {1: "texte", 2: "texte"}
+    assert not partial
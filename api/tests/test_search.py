@@ -0,0 +1,152 @@
+# api/tests/test_search.py
+from sqlalchemy import select, text
+
+from app.acte_pages import save_pages
+from app.models import Acte, AuditLog, User
+from app.routers_actes import list_actes, search_fulltext
+from app.routers_admin import list_audit_logs_admin
+from app.search import contains
+
+
+def _acte(db, titre: str, pages=(), resume=None) -> Acte:
+    acte = Acte(titre=titre, resume=resume, pdf_path=f"/data/uploads/{titre[:20]}.pdf")
+    db.add(acte)
+    db.flush()
+    save_pages(db, acte.id, enumerate(pages, 1))
+    db.commit()
+    return acte
+
+
+def _search(db, q: str, **kwargs) -> list:
+    return search_fulltext(q=q, page=kwargs.get("page", 1), size=kwargs.get("size", 10), db=db)
+
+
+# --------------------------------------------------
+# Plein texte (tsvector)
+# --------------------------------------------------
+
+def test_search_ignores_accents_case_and_plurals(pg_db):
+    acte = _acte(pg_db, "Registre", ["LE CONSEIL MUNICIPAL", "DÉLIBÉRATION relative aux piscines"])
+    _acte(pg_db, "Arrêté de voirie", ["stationnement interdit"])
+
+    hits = _search(pg_db, "deliberations piscine")
+
+    assert [h["id"] for h in hits] == [acte.id]
+    assert hits[0]["page"] == 2
+
+
+def test_title_match_ranks_before_text_match(pg_db):
+    in_text = _acte(pg_db, "Registre 2024", ["une subvention est accordée au club"])
+    in_title = _acte(pg_db, "Subvention au club de rugby", ["Le Maire de la commune"])
+
+    assert [h["id"] for h in _search(pg_db, "subvention")] == [in_title.id, in_text.id]
+
+
+def test_search_vector_follows_page_and_title_changes(pg_db):
+    acte = _acte(pg_db, "Registre", ["texte provisoire"])
+    assert _search(pg_db, "stationnement") == []
+
+    save_pages(pg_db, acte.id, [(1, "stationnement réglementé")])
+    pg_db.commit()
+    assert [h["id"] for h in _search(pg_db, "stationnement")] == [acte.id]
+    assert _search(pg_db, "provisoire") == []
+
+    acte.titre = "Marché public de voirie"
+    pg_db.commit()
+    assert [h["id"] for h in _search(pg_db, "marche")] == [acte.id]
+
+
+def test_websearch_syntax_never_fails(pg_db):
+    keep = _acte(pg_db, "Arrêté", ["stationnement rue de la Paix"])
+    _acte(pg_db, "Arrêté", ["stationnement place du Marché"])
+
+    assert [h["id"] for h in _search(pg_db, "stationnement -marché")] == [keep.id]
+    assert [h["id"] for h in _search(pg_db, '"rue de la paix"')] == [keep.id]
+    for q in ('"stationnement', "& | !", "((", "-"):
+        assert isinstance(_search(pg_db, q), list)
+
+
+# --------------------------------------------------
+# Extraits (ts_headline)
+# --------------------------------------------------
+
+def test_excerpt_is_cut_around_the_match_by_the_database(pg_db):
+    filler = "Vu le code général des collectivités territoriales. " * 2000   # ~100 Ko
+    acte = _acte(pg_db, "Registre", ["page de garde", filler + "<b>DÉLIBÉRATION</b> n° 12 " + filler])
+
+    (hit,) = _search(pg_db, "deliberations")
+
+    assert set(hit) == {"id", "titre", "service", "date_publication", "page", "excerpt"}
+    assert hit["id"] == acte.id and hit["page"] == 2
+    # le HTML du texte OCR est échappé : seules les balises <mark> passent
+    assert "&lt;b&gt;<mark>DÉLIBÉRATION</mark>&lt;/b&gt;" in hit["excerpt"]
+    assert len(hit["excerpt"]) < 400
+
+
+def test_title_match_gets_the_start_of_the_text(pg_db):
+    _acte(pg_db, "Subvention au club", ["Le Maire de la commune, " * 50])
+
+    (hit,) = _search(pg_db, "subvention")
+
+    assert hit["page"] is None
+    assert hit["excerpt"].startswith("Le Maire de la commune")
+    assert "<mark>" not in hit["excerpt"]
+
+
+# --------------------------------------------------
+# "Contient" et recherche approchée (pg_trgm)
+# --------------------------------------------------
+
+def _list(db, q: str, fuzzy: bool = False) -> list:
+    rows = list_actes(q=q, type=None, service=None, date_min=None, date_max=None,
+                      page=1, size=10, fuzzy=fuzzy, db=db)
+    return [a.titre for a in rows]
+
+
+def test_contains_filter_ignores_accents_and_escapes_wildcards(pg_db):
+    _acte(pg_db, "Délibération budget 2024", resume="Taux de 100% appliqué")
+    _acte(pg_db, "Arrêté de voirie", resume="rue_du_port")
+
+    assert _list(pg_db, "deliberation") == ["Délibération budget 2024"]
+    assert _list(pg_db, "ARRETE") == ["Arrêté de voirie"]
+    assert _list(pg_db, "100%") == ["Délibération budget 2024"]
+    # "_" et "%" saisis sont des caractères, pas des jokers
+    assert _list(pg_db, "rue_du") == ["Arrêté de voirie"]
+    assert _list(pg_db, "%") == ["Délibération budget 2024"]
+
+
+def test_fuzzy_search_tolerates_ocr_and_typing_errors(pg_db):
+    _acte(pg_db, "Subvention au club de rugby")
+    _acte(pg_db, "Stationnement rue de la Paix")
+    _acte(pg_db, "Délibération du conseil municipal")
+
+    assert _list(pg_db, "subvenlion", fuzzy=True) == ["Subvention au club de rugby"]
+    assert _list(pg_db, "stati0nnement", fuzzy=True) == ["Stationnement rue de la Paix"]
+    assert _list(pg_db, "dlibration", fuzzy=True)[0] == "Délibération du conseil municipal"
+    assert _list(pg_db, "subvenlion") == []
+
+
+def test_contains_filter_uses_the_trigram_index(pg_db):
+    _acte(pg_db, "Arrêté de voirie")
+    pg_db.execute(text("SET LOCAL enable_seqscan = off"))
+
+    stmt = select(Acte.id).where(contains("voirie", Acte.titre))
+    sql = str(stmt.compile(pg_db.get_bind(), compile_kwargs={"literal_binds": True}))
+    plan = "\n".join(pg_db.execute(text(f"EXPLAIN {sql}")).scalars())
+    pg_db.rollback()
+
+    assert "ix_actes_titre_trgm" in plan
+
+
+def test_audit_log_filter_on_part_of_an_email(pg_db):
+    acte = _acte(pg_db, "Arrêté de voirie")
+    agents = [User(email=e, password_hash="x") for e in ("j.dupont@mairie.fr", "m.durand@mairie.fr")]
+    pg_db.add_all(agents)
+    pg_db.flush()
+    pg_db.add_all([AuditLog(acte_id=acte.id, user_id=u.id, action="create") for u in agents])
+    pg_db.commit()
+
+    entries = list_audit_logs_admin(user_email="DUPONT", action=None, acte_id=None,
+                                    page=1, size=50, db=pg_db, admin=None)
+
+    assert [e.user_email for e in entries] == ["j.dupont@mairie.fr"]
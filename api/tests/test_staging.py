@@ -0,0 +1,85 @@
+# api/tests/test_staging.py
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.acte_pages import acte_text
+from app.config import settings
+from app.models import Acte, IngestJob, StagedUpload
+from app.pdf_utils import pack_pages
+from app.routers_admin import create_acte_one_shot
+from app.staging import purge_expired_staging, stage_upload, staging_dir
+from app.utils import StoredPdf
+
+AGENT = SimpleNamespace(id=1)
+
+
+def _staged(db, fulltext=None, user_id=1) -> StagedUpload:
+    path = os.path.join(staging_dir(), f"upload_{os.urandom(4).hex()}.pdf")
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.7\n")
+    return stage_upload(db, StoredPdf(path, 9, "a" * 64), "registre.pdf", user_id, fulltext=fulltext)
+
+
+def _create(db, token: str, user=AGENT) -> dict:
+    return asyncio.run(create_acte_one_shot(
+        titre="Arrêté de voirie", type=None, service=None,
+        date_signature=None, date_publication=None,
+        pdf=None, staging_token=token, db=db, user=user,
+    ))
+
+
+def test_token_creates_the_acte_without_a_second_extraction(pg_db):
+    staged = _staged(pg_db, fulltext=pack_pages(["Le Maire", "ARRÊTE"]))
+    token, staged_path = staged.token, staged.path
+
+    out = _create(pg_db, token)
+
+    acte = pg_db.get(Acte, out["id"])
+    assert out["job_id"] is None
+    assert acte.extraction_status == "done"
+    assert acte_text(pg_db, acte.id) == "Le Maire\nARRÊTE"
+    assert os.path.dirname(acte.pdf_path) == settings.UPLOAD_DIR
+    assert os.path.exists(acte.pdf_path) and not os.path.exists(staged_path)
+    assert pg_db.query(StagedUpload).count() == 0
+
+    # jeton déjà utilisé
+    with pytest.raises(HTTPException) as exc:
+        _create(pg_db, token)
+    assert exc.value.status_code == 404
+
+
+def test_token_without_full_text_queues_an_extraction(pg_db):
+    out = _create(pg_db, _staged(pg_db).token)
+
+    job = pg_db.get(IngestJob, out["job_id"])
+    assert job.status == "pending"
+    assert job.pdf_sha256 == "a" * 64
+
+
+def test_token_of_another_agent_is_unknown(pg_db):
+    token = _staged(pg_db, user_id=2).token
+
+    with pytest.raises(HTTPException) as exc:
+        _create(pg_db, token)
+    assert exc.value.status_code == 404
+
+
+def test_expired_token_is_gone_then_purged(pg_db):
+    staged = _staged(pg_db)
+    staged.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    pg_db.commit()
+    token, path = staged.token, staged.path
+
+    with pytest.raises(HTTPException) as exc:
+        _create(pg_db, token)
+    assert exc.value.status_code == 410
+    pg_db.rollback()
+
+    assert purge_expired_staging(pg_db) == 1
+    assert not os.path.exists(path)
+    assert pg_db.query(StagedUpload).count() == 0
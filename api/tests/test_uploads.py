@@ -0,0 +1,240 @@
+# api/tests/test_uploads.py
+import asyncio
+import hashlib
+import io
+import os
+import threading
+from datetime import date
+from types import SimpleNamespace
+
+import fitz  # PyMuPDF
+import pytest
+from fastapi import HTTPException
+
+from app import routers_admin
+from app.config import settings
+from app.extraction_executor import ExtractionExecutor
+from app.models import StagedUpload, UploadSession
+from app.routers_admin import (
+    append_upload_chunk, create_upload_session, finalise_upload, get_upload_session,
+)
+from app.schemas import UploadSessionCreate
+from app.staging import staging_dir
+from app.utils import parse_date, spool_pdf_validated, store_pdf_validated, unique_upload_path
+
+
+class _Upload:
+    """UploadFile minimal : chaque lecture rend la main à la boucle asyncio."""
+
+    content_type = "application/pdf"
+
+    def __init__(self, filename: str, data: bytes):
+        self.filename = filename
+        self._buf = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        await asyncio.sleep(0)
+        return self._buf.read(size)
+
+
+def test_concurrent_uploads_with_the_same_filename(tmp_path):
+    payloads = [b"%PDF-1.7\n" + f"document {i}\n".encode() * 100 for i in range(8)]
+
+    async def bulk():
+        # comme /admin/actes/bulk : plusieurs PDF écrits en même temps
+        sem = asyncio.Semaphore(4)
+
+        async def store(data):
+            async with sem:
+                return await store_pdf_validated(str(tmp_path), _Upload("scan.pdf", data))
+
+        return await asyncio.gather(*(store(data) for data in payloads))
+
+    stored = asyncio.run(bulk())
+
+    paths = [s.path for s in stored]
+    assert len(set(paths)) == len(payloads)
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(p) for p in paths)
+    for s, data in zip(stored, payloads):
+        with open(s.path, "rb") as f:
+            assert f.read() == data
+        assert s.size == len(data)
+
+
+def test_unique_upload_path_reserves_the_name(tmp_path):
+    first = unique_upload_path(str(tmp_path), "scan.pdf")
+    second = unique_upload_path(str(tmp_path), "scan.pdf")
+
+    assert os.path.basename(first) == "scan.pdf"
+    assert os.path.basename(second) == "scan_1.pdf"
+    assert os.path.exists(first)
+
+
+def test_upload_is_hashed_while_it_is_written(tmp_path):
+    data = b"%PDF-1.7\n" + os.urandom(3 * 1024 * 1024)
+
+    stored = asyncio.run(spool_pdf_validated(_Upload("scan.pdf", data), dir=str(tmp_path)))
+
+    assert stored.size == len(data)
+    assert stored.sha256 == hashlib.sha256(data).hexdigest()
+    with open(stored.path, "rb") as f:
+        assert f.read() == data
+
+
+@pytest.mark.parametrize("data, status", [
+    (b"<html>pas un pdf</html>", 415),
+    (b"", 415),
+    (b"%PDF-1.7\n" + b"0" * (1024 * 1024 + 1), 413),
+])
+def test_rejected_upload_leaves_no_file(tmp_path, monkeypatch, data, status):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_MB", 1)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(store_pdf_validated(str(tmp_path), _Upload("scan.pdf", data)))
+
+    assert exc.value.status_code == status
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("03/02/2024", date(2024, 2, 3)),
+    (" 3/2/24 ", date(2024, 2, 3)),
+    ("2024-02-03", date(2024, 2, 3)),
+    ("", None),
+    (None, None),
+])
+def test_parse_date(value, expected):
+    assert parse_date(value) == expected
+
+
+def test_parse_date_rejects_unknown_formats():
+    with pytest.raises(ValueError, match="Format de date invalide"):
+        parse_date("03.02.2024")
+
+
+# --------------------------------------------------
+# Envoi reprenable par morceaux (/admin/uploads)
+# --------------------------------------------------
+
+AGENT = SimpleNamespace(id=1)
+
+
+class _Body:
+    """Request minimale : le corps du morceau, lu en flux."""
+
+    def __init__(self, data: bytes):
+        self._data = data
+
+    async def stream(self):
+        for i in range(0, len(self._data), 1000):
+            yield self._data[i:i + 1000]
+
+
+def _scan_bytes() -> bytes:
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 72), "Arrêté du Maire portant réglementation du stationnement")
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def _put(db, upload_id: str, offset: int, chunk: bytes, checksum: str = None):
+    return asyncio.run(append_upload_chunk(
+        upload_id, _Body(chunk),
+        upload_offset=offset,
+        upload_checksum=checksum or hashlib.sha256(chunk).hexdigest(),
+        db=db, user=AGENT,
+    ))
+
+
+@pytest.fixture
+def executor(monkeypatch):
+    ex = ExtractionExecutor(workers=1, queue_max=10)
+    monkeypatch.setattr(routers_admin, "extraction_executor", ex)
+    yield ex
+    ex.shutdown()
+
+
+def _staged_files() -> set:
+    return set(os.listdir(staging_dir()))
+
+
+def test_chunked_upload_is_resumed_then_analysed(pg_db, executor):
+    data = _scan_bytes()
+    half = len(data) // 2
+    created = create_upload_session(
+        UploadSessionCreate(filename="registre.pdf", size=len(data),
+                            sha256=hashlib.sha256(data).hexdigest()),
+        db=pg_db, user=AGENT,
+    )
+    upload_id = created.upload_id
+    assert created.offset == 0
+
+    assert _put(pg_db, upload_id, 0, data[:half]).offset == half
+
+    # connexion coupée : le même morceau est renvoyé à l'ancien offset
+    with pytest.raises(HTTPException) as exc:
+        _put(pg_db, upload_id, 0, data[:half])
+    assert exc.value.status_code == 409
+    assert exc.value.headers["Upload-Offset"] == str(half)
+
+    # morceau abîmé en route : refusé, l'offset ne bouge pas
+    with pytest.raises(HTTPException) as exc:
+        _put(pg_db, upload_id, half, data[half:], checksum="0" * 64)
+    assert exc.value.status_code == 400
+    assert get_upload_session(upload_id, db=pg_db, user=AGENT).offset == half
+
+    assert _put(pg_db, upload_id, half, data[half:]).offset == len(data)
+
+    out = asyncio.run(finalise_upload(upload_id, db=pg_db, user=AGENT))
+
+    assert "Arrêté du Maire" in out.fulltext_excerpt
+    staged = pg_db.query(StagedUpload).filter_by(token=out.staging_token).one()
+    with open(staged.path, "rb") as f:
+        assert f.read() == data
+    assert pg_db.query(UploadSession).count() == 0
+
+
+def test_incomplete_upload_cannot_be_finalised(pg_db, executor):
+    data = _scan_bytes()
+    upload_id = create_upload_session(
+        UploadSessionCreate(filename="registre.pdf", size=len(data)), db=pg_db, user=AGENT
+    ).upload_id
+    _put(pg_db, upload_id, 0, data[:100])
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(finalise_upload(upload_id, db=pg_db, user=AGENT))
+    assert exc.value.status_code == 409
+    assert exc.value.headers["Upload-Offset"] == "100"
+
+
+def test_client_leaving_before_the_analysis_removes_the_file(pg_db, executor):
+    data = _scan_bytes()
+    upload_id = create_upload_session(
+        UploadSessionCreate(filename="registre.pdf", size=len(data)), db=pg_db, user=AGENT
+    ).upload_id
+    _put(pg_db, upload_id, 0, data)
+    before = _staged_files()
+    gate = threading.Event()
+
+    async def run():
+        # le seul thread d'analyse est occupé : la finalisation attend en file
+        (busy,) = executor.submit_many([(gate.wait, (5,))])
+        while executor.stats()["running"] == 0:
+            await asyncio.sleep(0.01)
+        task = asyncio.create_task(finalise_upload(upload_id, db=pg_db, user=AGENT))
+        while executor.stats()["queued"] == 0:
+            await asyncio.sleep(0.01)
+        task.cancel()     # client déconnecté
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.05)
+        gate.set()
+        await busy
+
+    asyncio.run(run())
+
+    assert _staged_files() == before
+    assert pg_db.query(UploadSession).count() == 0
+    assert executor.stats()["queued"] == 0
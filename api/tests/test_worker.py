@@ -0,0 +1,35 @@
+# api/tests/test_worker.py
+from app import worker
+from app.config import settings
+from app.extraction_cache import extraction_version
+from app.models import Acte, IngestJob
+from app.pdf_utils import ExtractionResult
+
+
+def _acte_with_job(db, **job) -> IngestJob:
+    acte = Acte(titre="Registre des arrêtés", pdf_path="/data/uploads/registre.pdf",
+                extraction_status="pending")
+    db.add(acte)
+    db.flush()
+    job = IngestJob(acte_id=acte.id, pdf_path=acte.pdf_path, status="pending", **job)
+    db.add(job)
+    db.commit()
+    return job
+
+
+def test_truncated_extraction_records_its_budget(pg_db, monkeypatch):
+    job = _acte_with_job(pg_db)
+    truncated = ExtractionResult(
+        ["page 1"], True, "900 pages : seules les 300 premières ont été extraites", [1]
+    )
+    monkeypatch.setattr(worker, "extract_cached", lambda *args, **kwargs: truncated)
+
+    assert worker.claim_next_job() == job.id
+    worker.run_job(job.id)
+
+    pg_db.expire_all()
+    acte = pg_db.get(Acte, job.acte_id)
+    assert acte.extraction_status == "partial"
+    assert acte.extraction_version == extraction_version(partial=True)
+    assert acte.extraction_version != extraction_version()
+    assert f"p{settings.EXTRACTION_MAX_PAGES}" in acte.extraction_version
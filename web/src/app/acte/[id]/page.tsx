@@ -42,6 +42,9 @@ export default function ActePage() {
     backHref = '/admin'
   }
 
+  // page du PDF où la recherche a trouvé le texte (?page=N)
+  const initialPage = Math.max(1, Number(search.get('page')) || 1)
+
   useEffect(() => {
     const load = async () => {
       const res = await fetch(`${API}/actes/${params.id}`, { cache: 'no-store' })
@@ -90,6 +93,7 @@ export default function ActePage() {
           url={`${API}/actes/${acte.id}/pdf`}
           height={900}
           initialScale={1.25}
+          initialPage={initialPage}
           fitModeDefault="page"
           extraActions={
             <button
@@ -16,6 +16,69 @@ const PDFViewer = dynamic<PDFViewerProps>(
   { ssr: false }
 );
 
+// Gros scans : envoi par morceaux, reprenable après une coupure (/admin/uploads).
+// La finalisation renvoie la même réponse que /admin/analyse-pdf.
+const CHUNKED_UPLOAD_MIN_BYTES = 4 * 1024 * 1024;
+const CHUNK_MAX_RETRIES = 5;
+
+const sha256Hex = async (buf: ArrayBuffer) => {
+  const digest = await crypto.subtle.digest('SHA-256', buf);
+  return Array.from(new Uint8Array(digest))
+    .map(b => b.toString(16).padStart(2, '0'))
+    .join('');
+};
+
+const analyseResumable = async (f: File): Promise<Response> => {
+  const opts = { credentials: 'include' as const, cache: 'no-store' as const };
+
+  const created = await fetch(`${API}/admin/uploads`, {
+    ...opts,
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ filename: f.name, size: f.size }),
+  });
+  if (!created.ok) return created;
+  const session = await created.json();
+  const url = `${API}/admin/uploads/${session.upload_id}`;
+
+  let offset: number = session.offset;
+  let failures = 0;
+  while (offset < f.size) {
+    const chunk = await f.slice(offset, offset + session.chunk_max_bytes).arrayBuffer();
+    try {
+      const res = await fetch(url, {
+        ...opts,
+        method: 'PUT',
+        headers: {
+          'Content-Type': 'application/octet-stream',
+          'Upload-Offset': String(offset),
+          'Upload-Checksum': await sha256Hex(chunk),
+        },
+        body: chunk,
+      });
+      if (res.ok) {
+        offset = (await res.json()).offset;
+        failures = 0;
+        continue;
+      }
+      // 404 / 413 / 415 : inutile de réessayer
+      if (res.status !== 400 && res.status !== 409 && res.status < 500) return res;
+    } catch (err) {
+      console.warn('chunk upload failed, retrying', err);
+    }
+
+    failures += 1;
+    if (failures > CHUNK_MAX_RETRIES) throw new Error('Envoi interrompu');
+    await new Promise(resolve => setTimeout(resolve, 1000 * failures));
+
+    // reprise là où le serveur en est
+    const status = await fetch(url, opts).catch(() => null);
+    if (status?.ok) offset = (await status.json()).offset;
+  }
+
+  return fetch(`${url}/finalise`, { ...opts, method: 'POST' });
+};
+
 export default function AdminUpload() {
   const search = useSearchParams();
   const router = useRouter();
@@ -50,6 +113,8 @@ export default function AdminUpload() {
 
   // pdf sélectionné
   const [file, setFile] = useState<File | null>(null);
+  // jeton renvoyé par l'analyse : la création n'a pas à renvoyer le PDF
+  const [stagingToken, setStagingToken] = useState<string | null>(null);
 
   // UI state
   const [msg, setMsg] = useState('');
@@ -120,25 +185,32 @@ export default function AdminUpload() {
   // Analyse auto du PDF dès qu'on le choisit
   const handleFileChange = async (f: File | null) => {
     setFile(f);
+    setStagingToken(null);
     if (!f) return;
 
     setAnalyzing(true);
     setMsg('');
 
     try {
-      const fd = new FormData();
-      fd.set('pdf', f);
-
-      const res = await fetch(`${API}/admin/analyse-pdf`, {
-        method: 'POST',
-        body: fd,
-        credentials: 'include',
-        cache: 'no-store',
-      });
+      let res: Response;
+      if (f.size >= CHUNKED_UPLOAD_MIN_BYTES) {
+        res = await analyseResumable(f);
+      } else {
+        const fd = new FormData();
+        fd.set('pdf', f);
+
+        res = await fetch(`${API}/admin/analyse-pdf`, {
+          method: 'POST',
+          body: fd,
+          credentials: 'include',
+          cache: 'no-store',
+        });
+      }
 
       if (res.ok) {
         const data = await res.json();
-        // data = { fulltext_excerpt, date_auto, service_auto, type_auto }
+        // data = { fulltext_excerpt, date_auto, service_auto, type_auto, staging_token }
+        setStagingToken(data.staging_token || null);
 
         // propose la date de signature détectée si le champ est encore vide
         setForm(prev => ({
@@ -198,28 +270,38 @@ export default function AdminUpload() {
     setSubmitting(true);
 
     try {
-      const fd = new FormData();
+      const send = (token: string | null) => {
+        const fd = new FormData();
 
-      fd.set('titre', form.titre);
+        fd.set('titre', form.titre);
 
-      // valeurs finales type / service
-      const finalType = useCustomType ? customType : form.type;
-      const finalService = useCustomService ? customService : form.service;
+        // valeurs finales type / service
+        const finalType = useCustomType ? customType : form.type;
+        const finalService = useCustomService ? customService : form.service;
 
-      if (finalType) fd.set('type', finalType);
-      if (finalService) fd.set('service', finalService);
-      if (form.date_signature) fd.set('date_signature', form.date_signature);
-      if (form.date_publication) fd.set('date_publication', form.date_publication);
+        if (finalType) fd.set('type', finalType);
+        if (finalService) fd.set('service', finalService);
+        if (form.date_signature) fd.set('date_signature', form.date_signature);
+        if (form.date_publication) fd.set('date_publication', form.date_publication);
 
-      // fichier PDF
-      fd.set('pdf', file);
+        // PDF déjà analysé : son jeton suffit ; sinon le fichier
+        if (token) fd.set('staging_token', token);
+        else fd.set('pdf', file);
 
-      const res = await fetch(`${API}/admin/actes`, {
-        method: 'POST',
-        body: fd,
-        credentials: 'include',
-        cache: 'no-store',
-      });
+        return fetch(`${API}/admin/actes`, {
+          method: 'POST',
+          body: fd,
+          credentials: 'include',
+          cache: 'no-store',
+        });
+      };
+
+      let res = await send(stagingToken);
+      // analyse expirée (ou jeton inconnu) : on renvoie le PDF
+      if (stagingToken && (res.status === 404 || res.status === 410)) {
+        setStagingToken(null);
+        res = await send(null);
+      }
 
       if (!res.ok) {
         const text = await res.text().catch(() => '');
@@ -24,6 +24,9 @@ type BulkRow = {
   date_signature: string
   date_publication: string
   pdf?: File | null
+  analysing?: boolean
+  // PDF déjà reçu par le serveur lors de l'analyse : pas besoin de le renvoyer
+  stagingToken?: string | null
 }
 
 export default function BulkUploadPage() {
@@ -70,86 +73,112 @@ export default function BulkUploadPage() {
     return ''
   }
 
-  // Sélection de plusieurs PDF -> analyse automatique pour chaque
+  // Pré-remplit une ligne avec le résultat d'analyse d'un PDF
+  const applyAnalysis = (row: BulkRow, data: any): BulkRow => {
+    const next: BulkRow = { ...row, analysing: false, stagingToken: data.staging_token ?? null }
+    const detectedDate = data.date_auto ? normalizeDate(data.date_auto) : ''
+
+    // Type : si l'OCR trouve un type qui est dans la liste, on le sélectionne
+    if (data.type_auto) {
+      if (KNOWN_TYPES.includes(data.type_auto)) {
+        next.type = data.type_auto
+        next.typeChoice = data.type_auto
+      } else {
+        next.type = data.type_auto
+        next.typeChoice = '__other__'
+        next.typeCustom = data.type_auto
+      }
+    }
+
+    // Service : si l'OCR trouve un service qui est dans la liste, on le sélectionne
+    if (data.service_auto) {
+      if (KNOWN_SERVICES.includes(data.service_auto)) {
+        next.service = data.service_auto
+        next.serviceChoice = data.service_auto
+      } else {
+        next.service = data.service_auto
+        next.serviceChoice = '__other__'
+        next.serviceCustom = data.service_auto
+      }
+    }
+
+    if (detectedDate) {
+      next.date_signature = detectedDate
+    }
+    return next
+  }
+
+  // Sélection de plusieurs PDF -> une seule requête d'analyse pour tous.
+  // Le serveur renvoie une ligne JSON par PDF dès que son analyse est finie
+  // (NDJSON) : les lignes du formulaire se remplissent au fur et à mesure.
   const handleFilesChange = async (fileList: FileList | null) => {
     if (!fileList || fileList.length === 0) return
     const files = Array.from(fileList)
 
+    const today = getTodayISO()
+    setRows(
+      files.map(file => ({
+        titre: file.name.replace(/\.[^.]+$/, ''),
+        type: '',
+        typeChoice: '',
+        typeCustom: '',
+        service: '',
+        serviceChoice: '',
+        serviceCustom: '',
+        date_signature: '',
+        date_publication: today, // par défaut : date du jour
+        pdf: file,
+        analysing: true,
+      })),
+    )
+
     setAnalyzing(true)
+    let analysed = 0
     try {
-      const today = getTodayISO()
-      const newRows: BulkRow[] = []
-
-      for (const file of files) {
-        let row: BulkRow = {
-          titre: file.name.replace(/\.[^.]+$/, ''),
-          type: '',
-          typeChoice: '',
-          typeCustom: '',
-          service: '',
-          serviceChoice: '',
-          serviceCustom: '',
-          date_signature: '',
-          date_publication: today, // par défaut : date du jour
-          pdf: file,
-        }
+      const fd = new FormData()
+      files.forEach(file => fd.append('pdfs', file))
 
-        try {
-          const fd = new FormData()
-          fd.set('pdf', file)
-
-          const res = await fetch(`${API}/admin/analyse-pdf`, {
-            method: 'POST',
-            body: fd,
-            credentials: 'include',
-            cache: 'no-store',
-          })
-
-          if (res.ok) {
-            const data = await res.json()
-            const detectedDate = data.date_auto ? normalizeDate(data.date_auto) : ''
-
-            // Type : si l'OCR trouve un type qui est dans la liste, on le sélectionne
-            if (data.type_auto) {
-              if (KNOWN_TYPES.includes(data.type_auto)) {
-                row.type = data.type_auto
-                row.typeChoice = data.type_auto
-              } else {
-                row.type = data.type_auto
-                row.typeChoice = '__other__'
-                row.typeCustom = data.type_auto
-              }
-            }
-
-            // Service : si l'OCR trouve un service qui est dans la liste, on le sélectionne
-            if (data.service_auto) {
-              if (KNOWN_SERVICES.includes(data.service_auto)) {
-                row.service = data.service_auto
-                row.serviceChoice = data.service_auto
-              } else {
-                row.service = data.service_auto
-                row.serviceChoice = '__other__'
-                row.serviceCustom = data.service_auto
-              }
-            }
+      const res = await fetch(`${API}/admin/analyse-pdf/batch`, {
+        method: 'POST',
+        body: fd,
+        credentials: 'include',
+        cache: 'no-store',
+      })
+      if (!res.ok || !res.body) {
+        throw new Error(`HTTP ${res.status}`)
+      }
 
-            if (detectedDate) {
-              row.date_signature = detectedDate
-            }
-          }
-        } catch (err) {
-          console.error('Erreur analyse PDF', err)
-        }
+      const reader = res.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ''
+
+      const handleLine = (line: string) => {
+        if (!line.trim()) return
+        const data = JSON.parse(line)
+        if (data.ok) analysed += 1
+        setRows(prev =>
+          prev.map((r, i) =>
+            i === data.index ? (data.ok ? applyAnalysis(r, data) : { ...r, analysing: false }) : r,
+          ),
+        )
+      }
 
-        newRows.push(row)
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+        const lines = buffer.split('\n')
+        buffer = lines.pop() ?? ''
+        lines.forEach(handleLine)
       }
+      handleLine(buffer)
 
-      setRows(newRows)
-      toast.success(`${newRows.length} acte(s) analysé(s) automatiquement.`)
+      toast.success(`${analysed} acte(s) analysé(s) automatiquement.`)
     } catch (e) {
-      console.error(e)
+      console.error('Erreur analyse PDF', e)
       toast.error("Erreur lors de l'analyse des PDF.")
     } finally {
+      setRows(prev => prev.map(r => (r.analysing ? { ...r, analysing: false } : r)))
       setAnalyzing(false)
     }
   }
@@ -245,6 +274,8 @@ export default function BulkUploadPage() {
 
     setSubmitting(true)
     try {
+      // Les PDF déjà analysés sont référencés par leur jeton (staging_token) :
+      // seuls les autres sont renvoyés, dans l'ordre des lignes.
       const formData = new FormData()
 
       const itemsToSend = rows.map(r => ({
@@ -253,11 +284,12 @@ export default function BulkUploadPage() {
         service: r.service,
         date_signature: r.date_signature,
         date_publication: r.date_publication,
+        staging_token: r.stagingToken || null,
       }))
       formData.append('items', JSON.stringify(itemsToSend))
 
       rows.forEach((r, idx) => {
-        if (r.pdf) {
+        if (r.pdf && !r.stagingToken) {
           formData.append('files', r.pdf, `pdf_${idx}.pdf`)
         }
       })
@@ -274,14 +306,26 @@ export default function BulkUploadPage() {
         return
       }
 
-      // Récupère le nombre créé pour l’afficher dans le toast du dashboard
-      let count = rows.length
-      try {
-        const data = await res.json()
-        if (typeof data?.count === 'number') {
-          count = data.count
-        }
-      } catch {
+      // Chaque acte réussit ou échoue seul : results = un résultat par ligne
+      const data = await res.json().catch(() => null)
+      const count = typeof data?.count === 'number' ? data.count : rows.length
+      const results: { index: number; status: string; error?: string }[] = data?.results ?? []
+      const failed = results.filter(r => r.status === 'failed')
+
+      if (failed.length > 0) {
+        // on ne garde que les lignes en échec, à corriger puis republier
+        // (sans jeton : leur PDF sera renvoyé)
+        const failedIdx = new Set(failed.map(r => r.index))
+        setRows(prev =>
+          prev
+            .filter((_, i) => failedIdx.has(i))
+            .map(r => ({ ...r, stagingToken: null })),
+        )
+        toast.error(
+          `${count} acte(s) créé(s), ${failed.length} en échec : ` +
+            failed.map(r => r.error).join(' ; '),
+        )
+        return
       }
 
       // Redirection vers le tableau de bord qui affichera le toast global
@@ -342,7 +386,10 @@ export default function BulkUploadPage() {
 
           {rows.map((row, idx) => (
             <fieldset key={idx} className="bulk-group">
-              <legend>Acte #{idx + 1}</legend>
+              <legend>
+                Acte #{idx + 1}
+                {row.analysing && ' — analyse en cours…'}
+              </legend>
 
               <div className="f-field">
                 <label>Titre *</label>
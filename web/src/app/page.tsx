@@ -27,6 +27,7 @@ const norm = (s?: string) => (s ?? '').normalize('NFD').replace(/[\u0300-\u036f]
 export default function HomePage() {
   // Filtres
   const [q, setQ] = useState('')
+  const [fuzzy, setFuzzy] = useState(false)     // recherche approchée (fautes, OCR)
   const [type, setType] = useState('')
   const [service, setService] = useState('')
   const [dateMin, setDateMin] = useState('')
@@ -67,7 +68,12 @@ export default function HomePage() {
   }
 
   // Avancé OCR
-  const [advFilter, setAdvFilter] = useState<{ term: string; ids: number[] } | null>(null)
+  const [advFilter, setAdvFilter] = useState<{ term: string; ids: number[]; pages: Record<number, number> } | null>(null)
+  // lien vers l'acte, ouvert à la page trouvée par la recherche avancée
+  const acteHref = (id: number) => {
+    const p = advFilter?.pages[id]
+    return p ? `/acte/${id}?page=${p}` : `/acte/${id}`
+  }
 
   // Abort pour éviter les races + flash
   const abortRef = useRef<AbortController | null>(null)
@@ -83,6 +89,7 @@ export default function HomePage() {
     try {
       const params = new URLSearchParams()
       if (q) params.set('q', q)
+      if (q && fuzzy) params.set('fuzzy', '1')
       if (dateMin) params.set('date_min', dateMin)
       if (dateMax) params.set('date_max', dateMax)
       params.set('page', String(p))
@@ -130,7 +137,7 @@ export default function HomePage() {
     const t = setTimeout(() => search(1), 300)
     return () => clearTimeout(t)
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [q, type, service, dateMin, dateMax])
+  }, [q, fuzzy, type, service, dateMin, dateMax])
 
   function toggleSort(key: SortKey) {
     if (sortKey === key) setSortDir(d => (d === 'asc' ? 'desc' : 'asc'))
@@ -143,7 +150,8 @@ export default function HomePage() {
     const nq = norm(q), nt = norm(type), ns = norm(service)
 
     let filtered = items.filter(a => {
-      if (nq) {
+      // recherche approchée : le filtrage exact est fait par l'API seule
+      if (nq && !fuzzy) {
         const hay = norm(`${a.titre} ${a.resume ?? ''} ${a.type ?? ''} ${a.service ?? ''}`)
         if (!hay.includes(nq)) return false
       }
@@ -170,7 +178,7 @@ export default function HomePage() {
       return 0
     })
     return arr
-  }, [items, q, type, service, sortKey, sortDir, advFilter])
+  }, [items, q, fuzzy, type, service, sortKey, sortDir, advFilter])
 
   const hasPrev = page > 1
   const hasNext = typeof totalPages === 'number' ? page < totalPages : items.length === PAGE_SIZE
@@ -232,7 +240,7 @@ export default function HomePage() {
   useEffect(() => { setActiveIndex(i => clamp(i, 0, Math.max(0, displayItems.length - 1))) }, [displayItems.length])
   useEffect(() => { const el = rowRefs.current[activeIndex]; if (el) el.focus() }, [activeIndex])
   const focusRow = useCallback((i: number) => setActiveIndex(clamp(i, 0, Math.max(0, displayItems.length - 1))), [displayItems.length])
-  const openRow = useCallback((i: number) => { const it = displayItems[i]; if (it) window.location.assign(`/acte/${it.id}`) }, [displayItems])
+  const openRow = useCallback((i: number) => { const it = displayItems[i]; if (it) window.location.assign(acteHref(it.id)) }, [displayItems, advFilter])
   const toggleRow = useCallback((i: number) => { const it = displayItems[i]; if (it) toggleOne(it.id) }, [displayItems])
   const downloadRow = useCallback((i: number) => { const it = displayItems[i]; if (it) downloadOne(it) }, [displayItems])
   const onRowKeyDown = useCallback((e: React.KeyboardEvent, index: number) => {
@@ -269,9 +277,12 @@ export default function HomePage() {
 
       {/* Filtres simples (live) */}
       <div className="raa-filters">
-        <div className="raa-field">
+        <div className="raa-field raa-field-q">
           <label htmlFor="q">Recherche</label>
           <input id="q" title="Champ Recherche" value={q} onChange={e => setQ(e.target.value)} placeholder="Titre" className="raa-input"/>
+          <label className="raa-fuzzy" title="Tolère les fautes de frappe et les mots mal reconnus">
+            <input type="checkbox" checked={fuzzy} onChange={e => setFuzzy(e.target.checked)} /> Recherche approchée
+          </label>
         </div>
         <div className="raa-field">
           <label htmlFor="type">Type</label>
@@ -295,7 +306,7 @@ export default function HomePage() {
       {/* Recherche avancée (OCR) */}
       <AdvancedSearchPanel
         advActive={!!advFilter}
-        onApply={(term, ids) => { setAdvFilter({ term, ids }); clearSelection() }}
+        onApply={(term, ids, pages) => { setAdvFilter({ term, ids, pages }); clearSelection() }}
         onReset={() => { setAdvFilter(null); clearSelection() }}
       />
 
@@ -406,7 +417,7 @@ export default function HomePage() {
                 >
                   <div className="raa-cell raa-col-check" role="cell">
                     <input title="Sélectionner l'acte" type="checkbox" className="raa-check" checked={isSelected(it.id)} onChange={() => toggleOne(it.id)} />
-                    <Link href={`/acte/${it.id}`} className='raa-open-icon'>🗎</Link>
+                    <Link href={acteHref(it.id)} className='raa-open-icon'>🗎</Link>
                   </div>
 
                   <div className="raa-cell raa-name" role="cell">
@@ -417,7 +428,7 @@ export default function HomePage() {
                         {it.type || ''}{it.service ? ` · ${it.service}` : ''}
                       </div>
                     )}
-                    <Link href={`/acte/${it.id}`} title="Ouvrir l'acte" className="raa-open">Ouvrir</Link>
+                    <Link href={acteHref(it.id)} title="Ouvrir l'acte" className="raa-open">Ouvrir</Link>
                   </div>
 
                   <div className="raa-cell raa-col-date" role="cell">{formatDate(date)}</div>
@@ -6,8 +6,9 @@ const API = process.env.NEXT_PUBLIC_API_BASE_URL || 'http://localhost:8000';
 
 type Props = {
   advActive: boolean;
-  // appliquer un filtre avancé (liste d'ids issus de /actes/search_fulltext)
-  onApply: (term: string, ids: number[]) => void;
+  // appliquer un filtre avancé (liste d'ids issus de /actes/search_fulltext,
+  // et page du PDF où le texte a été trouvé, par id)
+  onApply: (term: string, ids: number[], pages: Record<number, number>) => void;
   // réinitialiser le filtre avancé
   onReset: () => void;
 };
@@ -56,8 +57,18 @@ export default function AdvancedSearchPanel({ advActive, onApply, onReset }: Pro
           )
         : [];
 
+      // Page où le texte a été trouvé (null : trouvé par le titre / résumé)
+      const pages: Record<number, number> = {};
+      if (Array.isArray(data)) {
+        for (const hit of data) {
+          if (typeof hit?.id === 'number' && typeof hit?.page === 'number') {
+            pages[hit.id] = hit.page;
+          }
+        }
+      }
+
       // On envoie ça au parent pour filtrer le tableau
-      onApply(q.trim(), ids);
+      onApply(q.trim(), ids, pages);
 
       // on laisse ouvert
     } catch (err) {
@@ -34,6 +34,8 @@ type Props = {
   file?: File | Blob | null
   height?: number
   initialScale?: number
+  /** Page affichée à l'ouverture (ex: page trouvée par la recherche) */
+  initialPage?: number
   fitModeDefault?: FitMode
   extraActions?: ReactNode
 }
@@ -43,6 +45,7 @@ export default function PDFViewer({
   file,
   height = 900,
   initialScale = 1.25,
+  initialPage = 1,
   fitModeDefault = 'page',
   extraActions,
 }: Props) {
@@ -156,8 +159,9 @@ export default function PDFViewer({
 
       pdfRef.current = pdf
       setNum(pdf.numPages)
-      pageRef.current = 1
-      setPage(1)
+      const start = Math.max(1, Math.min(pdf.numPages, Math.floor(initialPage)))
+      pageRef.current = start
+      setPage(start)
 
       if (fitRef.current === 'page') await fitPage()
       else setScale(initialScale)